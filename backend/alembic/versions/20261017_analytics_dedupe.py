@@ -0,0 +1,31 @@
+"""Add analytics_dedupe table for cross-worker view deduplication
+
+Revision ID: 20261017_analytics_dedupe
+Revises: 20260323_sensitive_posts
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_analytics_dedupe'
+down_revision: str = '20260323_sensitive_posts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analytics_dedupe',
+        sa.Column('dedupe_key', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('seen_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('dedupe_key')
+    )
+    op.create_index(op.f('ix_analytics_dedupe_seen_at'), 'analytics_dedupe', ['seen_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_analytics_dedupe_seen_at'), table_name='analytics_dedupe')
+    op.drop_table('analytics_dedupe')
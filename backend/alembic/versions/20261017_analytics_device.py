@@ -0,0 +1,88 @@
+"""Add device column to analytics
+
+Revision ID: 20261017_analytics_device
+Revises: 20261017_analytics_hourly
+Create Date: 2026-10-17
+"""
+
+import re
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_analytics_device'
+down_revision: str = '20261017_analytics_hourly'
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of app.utils.user_agent.parse_user_agent as of this revision, so
+# the backfill keeps producing the same labels when the live classifier changes
+BOT_PATTERN = re.compile(r'bot|crawl|spider|slurp|mediapartners', re.I)
+APPLE_MOBILE_PATTERN = re.compile(r'iPhone|iPad|iPod')
+DEVICE_PATTERNS = (
+    ("Android", re.compile(r'Android')),
+    ("Mac", re.compile(r'Mac OS X')),
+    ("Windows", re.compile(r'Windows')),
+    ("Linux", re.compile(r'Linux')),
+)
+BROWSER_PATTERNS = (
+    ("Edge", re.compile(r'Edg/')),
+    ("Chrome", re.compile(r'Chrome/')),
+    ("Safari", re.compile(r'Safari/')),
+    ("Firefox", re.compile(r'Firefox/')),
+    ("IE", re.compile(r'MSIE|Trident')),
+)
+
+
+def parse_user_agent(ua: str) -> str:
+    if not ua:
+        return "Unknown"
+    if BOT_PATTERN.search(ua):
+        return "Bot"
+
+    device = "Desktop"
+    if APPLE_MOBILE_PATTERN.search(ua):
+        device = "iPhone" if "iPhone" in ua else "iPad"
+    else:
+        for name, pattern in DEVICE_PATTERNS:
+            if pattern.search(ua):
+                device = name
+                break
+
+    browser = "Other"
+    for name, pattern in BROWSER_PATTERNS:
+        if pattern.search(ua):
+            browser = name
+            break
+
+    return f"{device} / {browser}"
+
+
+def upgrade() -> None:
+    op.add_column('analytics', sa.Column('device', sa.String(100), nullable=True))
+
+    # Backfill existing rows: classify each distinct user agent once, then
+    # update all rows of the same device label in one statement
+    conn = op.get_bind()
+    user_agents = conn.execute(
+        sa.text("SELECT DISTINCT user_agent FROM analytics WHERE user_agent IS NOT NULL")
+    ).scalars().all()
+
+    by_device = defaultdict(list)
+    for user_agent in user_agents:
+        by_device[parse_user_agent(user_agent)].append(user_agent)
+
+    for device, agents in by_device.items():
+        conn.execute(
+            sa.text("UPDATE analytics SET device = :device WHERE user_agent = ANY(:agents)"),
+            {"device": device, "agents": agents},
+        )
+    op.execute("UPDATE analytics SET device = 'Unknown' WHERE user_agent IS NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('analytics', 'device')
@@ -0,0 +1,36 @@
+"""Add analytics_hourly rollup table
+
+Revision ID: 20261017_analytics_hourly
+Revises: 20261017_analytics_dedupe
+Create Date: 2026-10-17
+
+Populate it for existing data with:
+    python -m app.services.rollups backfill
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_analytics_hourly'
+down_revision: str = '20261017_analytics_dedupe'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analytics_hourly',
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('page_type', sa.String(50), nullable=False),
+        sa.Column('resource_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('country', sa.String(100), nullable=False),
+        sa.Column('device_class', sa.String(100), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('hour', 'page_type', 'resource_id', 'country', 'device_class')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_hourly')
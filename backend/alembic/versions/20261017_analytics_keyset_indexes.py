@@ -0,0 +1,34 @@
+"""Add keyset pagination indexes on analytics
+
+Revision ID: 20261017_analytics_keyset_indexes
+Revises: 20261017_analytics_uniques
+Create Date: 2026-10-17
+
+Back the (timestamp, id) cursors of /api/analytics/visitors, with and
+without a page_type filter.
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision: str = '20261017_analytics_keyset_indexes'
+down_revision: str = '20261017_analytics_uniques'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_analytics_timestamp_id', 'analytics', ['timestamp', 'id'], unique=False, if_not_exists=True)
+    op.create_index(
+        'idx_analytics_page_type_timestamp_id',
+        'analytics',
+        ['page_type', 'timestamp', 'id'],
+        unique=False,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_analytics_page_type_timestamp_id', table_name='analytics')
+    op.drop_index('idx_analytics_timestamp_id', table_name='analytics')
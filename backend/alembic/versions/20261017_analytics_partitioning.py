@@ -0,0 +1,161 @@
+"""Partition analytics by month on timestamp
+
+Revision ID: 20261017_analytics_partitioning
+Revises: 20261017_visitor_sessions
+Create Date: 2026-10-17
+
+Rebuilds analytics as a RANGE-partitioned table with one partition per
+month (primary key (id, timestamp)) and copies the existing rows over. ids
+keep coming from the same sequence. Single-column indexes on id, timestamp
+and page_type are not recreated; the primary key and the (timestamp, id) /
+(page_type, timestamp, id) indexes cover them.
+
+The copy rewrites the whole table; run it in a maintenance window. Only
+PARTITIONS_AHEAD months past the current one are created here; later
+partitions are created by the maintenance task in app.services.partitions.
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_analytics_partitioning'
+down_revision: str = '20261017_visitor_sessions'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = (
+    "id, page_type, resource_id, post_id, ip_address, country, city, "
+    "user_agent, device, referrer, timestamp, session_id"
+)
+
+INDEXES = (
+    ("ix_analytics_post_id", "post_id"),
+    ("ix_analytics_resource_id", "resource_id"),
+    ("ix_analytics_session_id", "session_id"),
+    ("idx_analytics_ip_session", "ip_address, session_id"),
+    ("idx_analytics_timestamp_id", "timestamp, id"),
+    ("idx_analytics_page_type_timestamp_id", "page_type, timestamp, id"),
+)
+
+# Future months created by this revision, independent of the app's settings
+PARTITIONS_AHEAD = 3
+
+
+def _month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def _create_partition(month: datetime) -> None:
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS analytics_{month:%Y_%m} PARTITION OF analytics "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+    )
+
+
+def _set_aside(conn, old_name: str) -> str:
+    """
+    Rename analytics to `old_name` and free the index names it holds.
+
+    Returns:
+        Name of the sequence backing analytics.id
+    """
+    sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence('analytics', 'id')")).scalar()
+    op.execute(f"ALTER TABLE analytics RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {old_name} RENAME CONSTRAINT analytics_pkey TO {old_name}_pkey")
+    index_names = conn.execute(
+        sa.text(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE tablename = :table AND indexname <> :pkey"
+        ),
+        {"table": old_name, "pkey": f"{old_name}_pkey"},
+    ).scalars().all()
+    for index_name in index_names:
+        op.execute(f"DROP INDEX {index_name}")
+    return sequence
+
+
+def _create_indexes() -> None:
+    for index_name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {index_name} ON analytics ({columns})")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    sequence = _set_aside(conn, "analytics_unpartitioned")
+
+    op.execute(f"""
+        CREATE TABLE analytics (
+            id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+            page_type VARCHAR(50) DEFAULT 'post',
+            resource_id INTEGER,
+            post_id INTEGER REFERENCES posts (id) ON DELETE CASCADE,
+            ip_address VARCHAR(45),
+            country VARCHAR(100),
+            city VARCHAR(100),
+            user_agent TEXT,
+            device VARCHAR(100),
+            referrer TEXT,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            session_id VARCHAR(255),
+            CONSTRAINT analytics_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY analytics.id")
+
+    # Rows without a timestamp cannot be routed to a partition
+    op.execute(
+        "UPDATE analytics_unpartitioned SET timestamp = timezone('utc', now()) WHERE timestamp IS NULL"
+    )
+
+    # One partition per month from the oldest row through the months ahead
+    oldest = conn.execute(sa.text("SELECT min(timestamp) FROM analytics_unpartitioned")).scalar()
+    current = _month_start(datetime.utcnow())
+    month = _month_start(oldest) if oldest is not None and oldest < current else current
+    last = _add_months(current, PARTITIONS_AHEAD)
+    while month <= last:
+        _create_partition(month)
+        month = _add_months(month, 1)
+
+    op.execute(f"INSERT INTO analytics ({COLUMNS}) SELECT {COLUMNS} FROM analytics_unpartitioned")
+    op.execute("DROP TABLE analytics_unpartitioned")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    sequence = _set_aside(conn, "analytics_partitioned")
+
+    op.execute(f"""
+        CREATE TABLE analytics (
+            id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+            page_type VARCHAR(50) DEFAULT 'post',
+            resource_id INTEGER,
+            post_id INTEGER REFERENCES posts (id) ON DELETE CASCADE,
+            ip_address VARCHAR(45),
+            country VARCHAR(100),
+            city VARCHAR(100),
+            user_agent TEXT,
+            device VARCHAR(100),
+            referrer TEXT,
+            timestamp TIMESTAMP WITHOUT TIME ZONE,
+            session_id VARCHAR(255),
+            CONSTRAINT analytics_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY analytics.id")
+    op.execute(f"INSERT INTO analytics ({COLUMNS}) SELECT {COLUMNS} FROM analytics_partitioned")
+    # Drops the attached partitions with it
+    op.execute("DROP TABLE analytics_partitioned")
+    _create_indexes()
+    op.execute("CREATE INDEX ix_analytics_page_type ON analytics (page_type)")
+    op.execute("CREATE INDEX idx_analytics_timestamp ON analytics (timestamp)")
@@ -0,0 +1,34 @@
+"""Add analytics_uniques HyperLogLog sketch table
+
+Revision ID: 20261017_analytics_uniques
+Revises: 20261017_analytics_device
+Create Date: 2026-10-17
+
+Populate it for existing data with:
+    python -m app.services.unique_sketches backfill
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_analytics_uniques'
+down_revision: str = '20261017_analytics_device'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analytics_uniques',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('page_type', sa.String(50), nullable=False),
+        sa.Column('resource_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'page_type', 'resource_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_uniques')
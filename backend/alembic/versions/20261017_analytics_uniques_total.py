@@ -0,0 +1,33 @@
+"""Add analytics_uniques_total all-time sketch table
+
+Revision ID: 20261017_analytics_uniques_total
+Revises: 20261017_gallery_renditions
+Create Date: 2026-10-17
+
+Populate it from the daily sketches with:
+    python -m app.services.unique_sketches totals
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_analytics_uniques_total'
+down_revision: str = '20261017_gallery_renditions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'analytics_uniques_total',
+        sa.Column('page_type', sa.String(50), nullable=False),
+        sa.Column('resource_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('sketch', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('page_type', 'resource_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('analytics_uniques_total')
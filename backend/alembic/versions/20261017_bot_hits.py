@@ -0,0 +1,32 @@
+"""Add bot_hits daily crawler counts
+
+Revision ID: 20261017_bot_hits
+Revises: 20261017_analytics_partitioning
+Create Date: 2026-10-17
+
+Bot views tracked before this revision stay in analytics with device 'Bot'.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_bot_hits'
+down_revision: str = '20261017_analytics_partitioning'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'bot_hits',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('bot', sa.String(100), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('day', 'bot')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('bot_hits')
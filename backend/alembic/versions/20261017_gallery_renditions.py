@@ -0,0 +1,27 @@
+"""Add renditions to gallery_media
+
+Revision ID: 20261017_gallery_renditions
+Revises: 20261017_bot_hits
+Create Date: 2026-10-17
+
+Generate renditions for existing images with:
+    python -m app.services.gallery_renditions backfill
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_gallery_renditions'
+down_revision: str = '20261017_bot_hits'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('gallery_media', sa.Column('renditions', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('gallery_media', 'renditions')
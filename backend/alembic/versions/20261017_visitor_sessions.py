@@ -0,0 +1,76 @@
+"""Add visitor_sessions summary table
+
+Revision ID: 20261017_visitor_sessions
+Revises: 20261017_analytics_keyset_indexes
+Create Date: 2026-10-17
+
+Backfilled from the analytics history in a single INSERT ... SELECT.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers
+revision: str = '20261017_visitor_sessions'
+down_revision: str = '20261017_analytics_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+
+# Page type bits as of this revision (app.services.visitor_sessions), frozen so
+# a fresh upgrade writes the same bits production holds
+PAGE_TYPE_BITS = {
+    "home": 1 << 0,
+    "post": 1 << 1,
+    "message": 1 << 2,
+    "music": 1 << 3,
+    "memories": 1 << 4,
+}
+OTHER_PAGE_TYPE_BIT = 1 << 14
+
+
+def upgrade() -> None:
+    op.create_table(
+        'visitor_sessions',
+        sa.Column('session_id', sa.String(255), nullable=False),
+        sa.Column('ip_address', sa.String(45), nullable=True),
+        sa.Column('country', sa.String(100), nullable=True),
+        sa.Column('city', sa.String(100), nullable=True),
+        sa.Column('device', sa.String(100), nullable=True),
+        sa.Column('first_seen', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=False),
+        sa.Column('visit_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('page_types', sa.SmallInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index('ix_visitor_sessions_last_seen', 'visitor_sessions', ['last_seen'], unique=False)
+
+    page_type_bit = "CASE COALESCE(page_type, 'post') {} ELSE {} END".format(
+        " ".join(f"WHEN '{page_type}' THEN {bit}" for page_type, bit in PAGE_TYPE_BITS.items()),
+        OTHER_PAGE_TYPE_BIT,
+    )
+    op.execute(f"""
+        INSERT INTO visitor_sessions (
+            session_id, ip_address, country, city, device,
+            first_seen, last_seen, visit_count, page_types
+        )
+        SELECT
+            session_id,
+            (array_agg(ip_address ORDER BY timestamp, id))[1],
+            (array_agg(country ORDER BY timestamp, id))[1],
+            (array_agg(city ORDER BY timestamp, id))[1],
+            (array_agg(device ORDER BY timestamp, id))[1],
+            min(timestamp),
+            max(timestamp),
+            count(*),
+            bit_or({page_type_bit})::smallint
+        FROM analytics
+        WHERE session_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY session_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_visitor_sessions_last_seen', table_name='visitor_sessions')
+    op.drop_table('visitor_sessions')
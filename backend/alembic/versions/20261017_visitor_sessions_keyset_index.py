@@ -0,0 +1,34 @@
+"""Add keyset pagination index on visitor_sessions
+
+Revision ID: 20261017_visitor_sessions_keyset_index
+Revises: 20261017_analytics_uniques_total
+Create Date: 2026-10-17
+
+Back the (last_seen, session_id) cursors of /api/analytics/sessions. The
+composite index replaces the single-column last_seen index.
+"""
+
+from alembic import op
+
+
+# revision identifiers
+revision: str = '20261017_visitor_sessions_keyset_index'
+down_revision: str = '20261017_analytics_uniques_total'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'idx_visitor_sessions_last_seen_session',
+        'visitor_sessions',
+        ['last_seen', 'session_id'],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.drop_index('ix_visitor_sessions_last_seen', table_name='visitor_sessions', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_visitor_sessions_last_seen', 'visitor_sessions', ['last_seen'], unique=False)
+    op.drop_index('idx_visitor_sessions_last_seen_session', table_name='visitor_sessions')
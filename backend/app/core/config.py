@@ -27,9 +27,76 @@ class Settings(BaseSettings):
     BASE_URL: str = "http://localhost:10000"
     MAX_VIDEO_SIZE_MB: int = 100
     
-    # IP Geolocation API
-    GEOIP_API_URL: str = "http://ip-api.com/json"
+    # Image processing pool (per worker process)
+    IMAGE_WORKERS: int = 2
+    # Jobs queued or running before image requests are turned away with 503
+    IMAGE_WORKER_MAX_PENDING: int = 8
+    IMAGE_WORKER_MAX_TASKS: int = 50
     
+    # On-demand media transforms (/api/media/...?w=&h=&fit=&fmt=&q=)
+    MEDIA_TRANSFORM_CACHE_DIR: str = "cache/media"
+    MEDIA_TRANSFORM_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    
+    # IP Geolocation
+    # Local range database (CSV: start, end, country, city) or a compiled .idx file
+    GEOIP_DATABASE_PATH: Optional[str] = None
+    # HTTP fallback for addresses the local database misses; empty disables it
+    GEOIP_API_URL: Optional[str] = "http://ip-api.com/json"
+    GEOIP_CACHE_SIZE: int = 10000
+    GEOIP_CACHE_TTL_SECONDS: int = 86400
+    GEOIP_NEGATIVE_CACHE_TTL_SECONDS: int = 300
+    
+    # Analytics ingestion buffer (per worker process)
+    ANALYTICS_BUFFER_MAX_SIZE: int = 10000
+    ANALYTICS_FLUSH_BATCH_SIZE: int = 500
+    ANALYTICS_FLUSH_INTERVAL_SECONDS: float = 1.0
+    ANALYTICS_ENQUEUE_TIMEOUT_SECONDS: float = 0.25
+    # A failed batch write is retried this many times, the backoff doubling each time
+    ANALYTICS_FLUSH_RETRIES: int = 3
+    ANALYTICS_FLUSH_RETRY_BACKOFF_SECONDS: float = 0.5
+    # "memory" dedupes per worker; "database" also claims views in analytics_dedupe
+    ANALYTICS_DEDUPE_MODE: str = "memory"
+    ANALYTICS_DEDUPE_MAX_KEYS: int = 500000
+    # Most events accepted in one /track request
+    ANALYTICS_TRACK_MAX_BATCH: int = 50
+    
+    # Write-behind Post/Message view counters
+    VIEW_COUNT_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Crawler hits on /track: "count" adds them to bot_hits, "drop" ignores them
+    ANALYTICS_BOT_MODE: str = "count"
+    BOT_HITS_FLUSH_INTERVAL_SECONDS: float = 30.0
+
+    # Dashboard stats cache (per worker process)
+    # Served as-is while younger than the TTL, then served stale while refreshing
+    STATS_CACHE_TTL_SECONDS: float = 30.0
+    # Older entries are recomputed before responding
+    STATS_CACHE_MAX_STALE_SECONDS: float = 600.0
+    # Pooled connections all stats computations in a worker may hold at once
+    STATS_SECTION_CONCURRENCY: int = 4
+
+    # Post/message titles used by analytics; reload picks up other workers' edits
+    TITLE_REGISTRY_TTL_SECONDS: float = 300.0
+
+    # Analytics table partitioning (one partition per month of timestamp)
+    ANALYTICS_PARTITIONS_AHEAD: int = 3
+    ANALYTICS_PARTITION_CHECK_INTERVAL_SECONDS: float = 21600.0
+    # Months of raw rows kept; older partitions are archived to CSV.gz and dropped. None keeps all
+    ANALYTICS_RETENTION_MONTHS: Optional[int] = None
+    ANALYTICS_ARCHIVE_DIR: str = "archive/analytics"
+
+    # Optional NumPy columnar copy of recent analytics for dashboard breakdowns
+    ANALYTICS_COLUMNAR_ENABLED: bool = False
+    ANALYTICS_COLUMNAR_WINDOW_DAYS: int = 90
+    ANALYTICS_COLUMNAR_REFRESH_SECONDS: float = 5.0
+    ANALYTICS_COLUMNAR_REBUILD_SECONDS: float = 3600.0
+
+    # Live visitor stream (SSE, per worker process)
+    LIVE_SUBSCRIBER_QUEUE_SIZE: int = 256
+    LIVE_HEARTBEAT_SECONDS: float = 15.0
+    LIVE_MAX_SUBSCRIBERS: int = 20
+    LIVE_STREAM_TICKET_SECONDS: int = 30  # Lifetime of a single-use stream ticket
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -2,6 +2,7 @@
 Security utilities for authentication and JWT handling.
 """
 
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -9,6 +10,9 @@ from passlib.context import CryptContext
 
 from app.core.config import settings
 
+# `purpose` claim of stream tickets; tokens with any purpose are not access tokens
+STREAM_TICKET_PURPOSE = "stream"
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -59,6 +63,34 @@ def decode_access_token(token: str) -> Optional[dict]:
     """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    # Single-purpose tokens such as stream tickets do not grant API access
+    if "purpose" in payload:
+        return None
+    return payload
+
+
+def create_stream_ticket(subject: str) -> str:
+    """
+    Create a short-lived ticket for opening one event stream.
+
+    Tickets go in the stream URL, where they end up in access logs, so they
+    expire after LIVE_STREAM_TICKET_SECONDS, are accepted once, and are
+    rejected as access tokens.
+    """
+    return create_access_token(
+        data={"sub": subject, "purpose": STREAM_TICKET_PURPOSE, "jti": secrets.token_urlsafe(16)},
+        expires_delta=timedelta(seconds=settings.LIVE_STREAM_TICKET_SECONDS),
+    )
+
+
+def decode_stream_ticket(ticket: str) -> Optional[dict]:
+    """Decode a stream ticket; None if it is invalid, expired or not a ticket."""
+    try:
+        payload = jwt.decode(ticket, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("purpose") != STREAM_TICKET_PURPOSE or "jti" not in payload:
+        return None
+    return payload
@@ -2,13 +2,20 @@
 Authentication dependencies for protected routes.
 """
 
-from fastapi import Depends, HTTPException, status
+import time
+from typing import Dict, Optional
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.core.security import decode_access_token
+from app.core.security import decode_access_token, decode_stream_ticket
 
 # HTTP Bearer scheme for JWT
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Stream ticket ids already used on this worker, with their expiry times
+_redeemed_tickets: Dict[str, float] = {}
 
 
 async def get_current_admin(
@@ -37,3 +44,51 @@ async def get_current_admin(
         )
     
     return payload
+
+
+def _redeem_ticket(payload: dict) -> bool:
+    """Mark a stream ticket as used; False if this worker has seen it before."""
+    now = time.time()
+    for jti, expires in list(_redeemed_tickets.items()):
+        if expires < now:
+            del _redeemed_tickets[jti]
+    if payload["jti"] in _redeemed_tickets:
+        return False
+    _redeemed_tickets[payload["jti"]] = payload["exp"]
+    return True
+
+
+async def get_current_admin_for_stream(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    ticket: Optional[str] = Query(None, description="Stream ticket from POST /api/analytics/live/ticket"),
+) -> dict:
+    """
+    Dependency to verify admin authentication on streaming endpoints.
+    
+    Browsers' EventSource cannot send an Authorization header, so instead of
+    the bearer token the URL may carry a `ticket`: short-lived, single-use
+    and only valid for opening a stream, so one leaked through access logs
+    is worthless. Tickets are remembered per worker, so a replay that lands
+    on another worker within the ticket's lifetime is not caught.
+    
+    Raises:
+        HTTPException: 401 if no token or ticket is given, or it is invalid,
+        expired or already used
+    """
+    if credentials:
+        payload = decode_access_token(credentials.credentials)
+    elif ticket:
+        payload = decode_stream_ticket(ticket)
+        if payload is not None and not _redeem_ticket(payload):
+            payload = None
+    else:
+        payload = None
+    
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return payload
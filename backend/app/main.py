@@ -3,6 +3,7 @@ Letters to Likhah - FastAPI Backend
 Main application entry point
 """
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -15,7 +16,15 @@ from slowapi.errors import RateLimitExceeded
 
 from app.core.config import settings
 from app.core.database import engine, Base
-from app.routes import posts, analytics, auth, gallery, music, messages, uploads
+from app.routes import posts, analytics, auth, gallery, media, music, messages, uploads
+from app.services.analytics_ingest import ingest_buffer
+from app.services.bot_hits import bot_hits
+from app.services.columnar import columnar_analytics
+from app.services.geolocation import start_geolocation, stop_geolocation
+from app.services.image_workers import start_image_workers, stop_image_workers
+from app.services.partitions import partition_maintenance
+from app.services.transform_cache import transform_cache
+from app.services.view_counters import view_counters
 
 
 # Rate limiter setup
@@ -25,11 +34,31 @@ limiter = Limiter(key_func=get_remote_address)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup and shutdown events."""
+    columnar_enabled = settings.ANALYTICS_COLUMNAR_ENABLED
+    if columnar_enabled and not columnar_analytics.available:
+        print("ANALYTICS_COLUMNAR_ENABLED is set but numpy is not installed; using SQL breakdowns")
+        columnar_enabled = False
     # Startup: Create database tables if they don't exist
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await partition_maintenance.start()
+    await start_geolocation()
+    await start_image_workers()
+    await asyncio.to_thread(transform_cache.load)
+    await view_counters.start()
+    await bot_hits.start()
+    await ingest_buffer.start()
+    if columnar_enabled:
+        await columnar_analytics.start()
     yield
-    # Shutdown: Dispose of engine connections
+    # Shutdown: Write out queued analytics, bot hits and view counts, then dispose of engine connections
+    await columnar_analytics.stop()
+    await ingest_buffer.stop()
+    await bot_hits.stop()
+    await view_counters.stop()
+    await stop_image_workers()
+    await stop_geolocation()
+    await partition_maintenance.stop()
     await engine.dispose()
 
 
@@ -62,6 +91,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Stats-Age", "X-Stats-Cache"],
 )
 
 
@@ -71,6 +101,7 @@ app.include_router(posts.router, prefix="/api/posts", tags=["Posts"])
 app.include_router(messages.router, prefix="/api/messages", tags=["Messages"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(gallery.router, prefix="/api/gallery", tags=["Gallery"])
+app.include_router(media.router, prefix="/api/media", tags=["Media"])
 app.include_router(music.router, prefix="/api/music", tags=["Music"])
 app.include_router(uploads.router, prefix="/api/uploads", tags=["Uploads"])
 
@@ -1,8 +1,8 @@
 # Models module
 from app.models.post import Post
-from app.models.analytics import Analytics
+from app.models.analytics import Analytics, AnalyticsDedupe, AnalyticsHourly, AnalyticsUniques, AnalyticsUniquesTotal, BotHit, VisitorSession
 from app.models.gallery import GalleryMedia
 from app.models.music import MusicTrack
 from app.models.message import Message
 
-__all__ = ["Post", "Analytics", "GalleryMedia", "MusicTrack", "Message"]
+__all__ = ["Post", "Analytics", "AnalyticsDedupe", "AnalyticsHourly", "AnalyticsUniques", "AnalyticsUniquesTotal", "BotHit", "VisitorSession", "GalleryMedia", "MusicTrack", "Message"]
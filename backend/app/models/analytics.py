@@ -3,7 +3,7 @@ Analytics model for tracking page views and visitor information.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Text, Date, DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -13,8 +13,12 @@ class Analytics(Base):
     """
     Analytics model for tracking visitor information across all pages.
     
+    Partitioned by month on timestamp (see app.services.partitions), so the
+    primary key is (id, timestamp); id alone is still unique, drawn from one
+    sequence.
+    
     Attributes:
-        id: Primary key
+        id: Row identifier
         page_type: Which page was viewed (home, post, message, music, memories)
         resource_id: ID of the specific resource viewed (post_id, message_id, etc.)
         post_id: Legacy FK to posts (kept for backwards compat)
@@ -22,22 +26,31 @@ class Analytics(Base):
         country: Visitor's country from geolocation
         city: Visitor's city from geolocation
         user_agent: Browser/device information
+        device: Device/browser label parsed from the user agent at ingest
         referrer: Where the visitor came from
         timestamp: When the page was viewed
         session_id: Unique session identifier for deduplication
     """
     __tablename__ = "analytics"
+    __table_args__ = (
+        # Keyset pagination on /visitors, also serving plain timestamp and page_type filters
+        Index("idx_analytics_timestamp_id", "timestamp", "id"),
+        Index("idx_analytics_page_type_timestamp_id", "page_type", "timestamp", "id"),
+        Index("idx_analytics_ip_session", "ip_address", "session_id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
-    page_type = Column(String(50), nullable=True, index=True, default="post")  # home, post, message, music, memories
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    page_type = Column(String(50), nullable=True, default="post")  # home, post, message, music, memories
     resource_id = Column(Integer, nullable=True, index=True)  # ID of the specific resource
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), index=True)
     ip_address = Column(String(45), nullable=True)  # Supports IPv6
     country = Column(String(100), nullable=True)
     city = Column(String(100), nullable=True)
     user_agent = Column(Text, nullable=True)
+    device = Column(String(100), nullable=True)  # e.g. "iPhone / Safari"
     referrer = Column(Text, nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
     session_id = Column(String(255), nullable=True, index=True)
     
     # Relationship to post
@@ -45,3 +58,149 @@ class Analytics(Base):
     
     def __repr__(self):
         return f"<Analytics(id={self.id}, page={self.page_type}, ip={self.ip_address})>"
+
+
+class AnalyticsDedupe(Base):
+    """
+    Shared claims used to deduplicate views across worker processes.
+    
+    Attributes:
+        dedupe_key: 64-bit hash of (page_type, resource_id, ip_address, session_id)
+        seen_at: When the view that holds the claim was recorded
+    """
+    __tablename__ = "analytics_dedupe"
+    
+    dedupe_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    seen_at = Column(DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<AnalyticsDedupe(key={self.dedupe_key}, seen_at={self.seen_at})>"
+
+
+class AnalyticsHourly(Base):
+    """
+    Hourly view counts rolled up from analytics rows at ingest time.
+    
+    Attributes:
+        hour: Start of the hour (UTC)
+        page_type: Which page was viewed
+        resource_id: ID of the resource viewed, 0 when the page has none
+        country: Visitor's country from geolocation
+        device_class: Device/browser label from the user agent
+        views: Number of views in the bucket
+    """
+    __tablename__ = "analytics_hourly"
+    
+    hour = Column(DateTime, primary_key=True)
+    page_type = Column(String(50), primary_key=True)
+    resource_id = Column(Integer, primary_key=True, autoincrement=False)
+    country = Column(String(100), primary_key=True)
+    device_class = Column(String(100), primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<AnalyticsHourly(hour={self.hour}, page={self.page_type}, views={self.views})>"
+
+
+class AnalyticsUniques(Base):
+    """
+    Daily HyperLogLog sketches of visitor IPs, updated at ingest time.
+    
+    Each day has one sketch per scope: page_type "*" with resource_id 0 for
+    the whole site, a page type with resource_id 0 for that page type, and
+    a page type with a resource_id for a single resource.
+    
+    Attributes:
+        day: Calendar day (UTC)
+        page_type: Page type, or "*" for all pages
+        resource_id: ID of the resource, 0 for the whole scope
+        sketch: Serialized HyperLogLog registers
+    """
+    __tablename__ = "analytics_uniques"
+    
+    day = Column(Date, primary_key=True)
+    page_type = Column(String(50), primary_key=True)
+    resource_id = Column(Integer, primary_key=True, autoincrement=False)
+    sketch = Column(LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f"<AnalyticsUniques(day={self.day}, page={self.page_type}, resource={self.resource_id})>"
+
+
+class AnalyticsUniquesTotal(Base):
+    """
+    All-time HyperLogLog sketches of visitor IPs, one per analytics_uniques scope.
+    
+    Updated at ingest time alongside the daily sketches, so all-time counts
+    read one sketch per scope instead of merging every day.
+    
+    Attributes:
+        page_type: Page type, or "*" for all pages
+        resource_id: ID of the resource, 0 for the whole scope
+        sketch: Serialized HyperLogLog registers
+    """
+    __tablename__ = "analytics_uniques_total"
+    
+    page_type = Column(String(50), primary_key=True)
+    resource_id = Column(Integer, primary_key=True, autoincrement=False)
+    sketch = Column(LargeBinary, nullable=False)
+    
+    def __repr__(self):
+        return f"<AnalyticsUniquesTotal(page={self.page_type}, resource={self.resource_id})>"
+
+
+class VisitorSession(Base):
+    """
+    One row per client session, maintained at ingest time.
+    
+    Attributes:
+        session_id: Client session identifier
+        ip_address: IP address of the session's first recorded view
+        country: Country of the session's first recorded view
+        city: City of the session's first recorded view
+        device: Device/browser label of the session's first recorded view
+        first_seen: Timestamp of the earliest view
+        last_seen: Timestamp of the latest view
+        visit_count: Number of recorded views
+        page_types: Bitmask of the page types viewed (see app.services.visitor_sessions)
+    """
+    __tablename__ = "visitor_sessions"
+    __table_args__ = (
+        # Keyset pagination on /sessions, also serving plain last_seen filters
+        Index("idx_visitor_sessions_last_seen_session", "last_seen", "session_id"),
+    )
+    
+    session_id = Column(String(255), primary_key=True)
+    ip_address = Column(String(45), nullable=True)
+    country = Column(String(100), nullable=True)
+    city = Column(String(100), nullable=True)
+    device = Column(String(100), nullable=True)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    visit_count = Column(Integer, nullable=False, default=0)
+    page_types = Column(SmallInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<VisitorSession(session={self.session_id}, visits={self.visit_count})>"
+
+
+class BotHit(Base):
+    """
+    Daily hit counts for crawlers the tracking endpoint turned away.
+    
+    Bot views are not stored in analytics; they are counted in memory and
+    added here periodically (see app.services.bot_hits).
+    
+    Attributes:
+        day: UTC date of the hits
+        bot: Crawler name from app.utils.user_agent.BOT_TOKENS
+        hits: Number of tracking events from the crawler that day
+    """
+    __tablename__ = "bot_hits"
+    
+    day = Column(Date, primary_key=True)
+    bot = Column(String(100), primary_key=True)
+    hits = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<BotHit(day={self.day}, bot={self.bot}, hits={self.hits})>"
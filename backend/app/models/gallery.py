@@ -3,7 +3,7 @@ Gallery model for storing media items (images/videos).
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON
 import enum
 
 from app.core.database import Base
@@ -22,11 +22,13 @@ class GalleryMedia(Base):
     Attributes:
         id: Primary key
         media_type: Type of media (image or video)
-        url: URL or base64 data of the media
-        thumbnail_url: Thumbnail for images/videos (optimized small version)
+        url: URL of the media, usually a blob URL (older rows may hold base64 data)
+        thumbnail_url: Thumbnail for images/videos (optimized small version), usually a blob URL
         blur_placeholder: Tiny base64 image for progressive loading
         width: Original image width
         height: Original image height
+        renditions: Responsive sizes of the image as blobs, a list of
+            {width, height, format, bytes, url}; None for videos and older rows
         caption: Optional caption for the media
         order_index: For ordering media in the gallery
         created_at: When the media was uploaded
@@ -35,11 +37,12 @@ class GalleryMedia(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     media_type = Column(String(10), nullable=False, default="image")
-    url = Column(Text, nullable=False)  # Base64 data or URL
+    url = Column(Text, nullable=False)  # Blob URL, external URL or legacy base64 data
     thumbnail_url = Column(Text, nullable=True)  # Optimized thumbnail
     blur_placeholder = Column(Text, nullable=True)  # Tiny blur placeholder
     width = Column(Integer, nullable=True)  # Original width
     height = Column(Integer, nullable=True)  # Original height
+    renditions = Column(JSON, nullable=True)  # Responsive WebP/JPEG sizes
     caption = Column(String(255), nullable=True)
     order_index = Column(Integer, default=0, index=True)  # Added index
     created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Added index
@@ -1,4 +1,4 @@
 # Routes module
-from app.routes import posts, analytics, auth, gallery, music, uploads
+from app.routes import posts, analytics, auth, gallery, media, music, uploads
 
-__all__ = ["posts", "analytics", "auth", "gallery", "music", "uploads"]
+__all__ = ["posts", "analytics", "auth", "gallery", "media", "music", "uploads"]
@@ -2,25 +2,27 @@
 Analytics routes for tracking and reporting.
 """
 
+import asyncio
+import json
 import math
 from datetime import datetime, timedelta
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, BackgroundTasks
-from sqlalchemy import select, func, distinct, case, literal_column, text
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select, func, distinct, case, literal, literal_column, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-import httpx
-import re
 
-from app.core.database import get_db
-from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_db
 from app.models.post import Post
-from app.models.message import Message
-from app.models.analytics import Analytics
+from app.models.analytics import Analytics, AnalyticsHourly, BotHit, VisitorSession
 from app.schemas.analytics import (
     AnalyticsTrack,
     VisitorResponse,
     VisitorListResponse,
     StatsResponse,
+    BotStats,
     PostStats,
     GeoStats,
     DailyStats,
@@ -30,145 +32,90 @@ from app.schemas.analytics import (
     TopResource,
     SessionInfo,
     SessionListResponse,
+    StreamTicketResponse,
+    TrackResponse,
+)
+from app.core.config import settings
+from app.core.security import create_stream_ticket
+from app.dependencies.auth import get_current_admin, get_current_admin_for_stream
+from app.services.analytics_ingest import ingest_buffer, TrackedView, IngestBufferFull
+from app.services.analytics_export import EXPORT_FORMATS, stream_export
+from app.services.bot_hits import bot_hits
+from app.services.columnar import columnar_analytics
+from app.services.geolocation import geolocation_stats
+from app.services.image_workers import image_worker_stats
+from app.services.live_events import Subscription, TooManySubscribers, live_events
+from app.services.stats_cache import stats_cache
+from app.services.title_registry import title_registry
+from app.services.transform_cache import transform_cache
+from app.services.unique_sketches import (
+    SKETCH_RELATIVE_ERROR,
+    count_total_uniques,
+    count_uniques_by_page_type,
+    count_uniques_by_resource,
 )
-from app.dependencies.auth import get_current_admin
+from app.services.view_counters import view_counters
+from app.services.visitor_sessions import count_page_types
+from app.utils.pagination import NEXT, PREV, InvalidCursor, decode_cursor, encode_cursor
+from app.utils.user_agent import detect_bot, parse_user_agent
 
 router = APIRouter()
 
 
-def parse_user_agent(ua: str) -> str:
-    """Extract a readable device/browser string from user agent."""
-    if not ua:
-        return "Unknown"
-    
-    # Detect bots
-    if re.search(r'bot|crawl|spider|slurp|mediapartners', ua, re.I):
-        return "Bot"
-    
-    # Detect device
-    device = "Desktop"
-    if re.search(r'iPhone|iPad|iPod', ua):
-        device = "iPhone" if "iPhone" in ua else "iPad"
-    elif re.search(r'Android', ua):
-        device = "Android"
-    elif re.search(r'Mac OS X', ua):
-        device = "Mac"
-    elif re.search(r'Windows', ua):
-        device = "Windows"
-    elif re.search(r'Linux', ua):
-        device = "Linux"
-    
-    # Detect browser
-    browser = ""
-    if re.search(r'Edg/', ua):
-        browser = "Edge"
-    elif re.search(r'Chrome/', ua) and not re.search(r'Edg/', ua):
-        browser = "Chrome"
-    elif re.search(r'Safari/', ua) and not re.search(r'Chrome/', ua):
-        browser = "Safari"
-    elif re.search(r'Firefox/', ua):
-        browser = "Firefox"
-    elif re.search(r'MSIE|Trident', ua):
-        browser = "IE"
-    else:
-        browser = "Other"
-    
-    return f"{device} / {browser}"
+# A tracking body is one event or a list of them
+_track_body = TypeAdapter(Union[AnalyticsTrack, List[AnalyticsTrack]])
 
 
-async def get_geolocation(ip_address: str) -> dict:
+@router.post(
+    "/track",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=TrackResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": _track_body.json_schema()},
+                "text/plain": {"schema": {"type": "string", "description": "The same JSON, as sent by navigator.sendBeacon"}},
+            },
+        }
+    },
+)
+async def track_view(request: Request):
     """
-    Get geolocation data for an IP address using ip-api.com.
+    Track one or more page views for any page type.
+    
+    The body is a single event or a JSON array of up to
+    ANALYTICS_TRACK_MAX_BATCH events. It is parsed as JSON whatever the
+    Content-Type, so `navigator.sendBeacon` text/plain bodies work too.
+    Events are queued for the ingest buffer and written in a later batch.
+    Crawlers are recognised from the user agent up front and only counted
+    in bot_hits (or dropped), never geolocated or stored as views.
+    
+    When the buffer is full the response is a 503 whose `resume_from` is
+    the index of the first event not queued; events before it were handled,
+    so resend only the rest.
     """
-    if ip_address in ["127.0.0.1", "localhost", "::1"] or ip_address.startswith("192.168.") or ip_address.startswith("10."):
-        return {"country": "Local", "city": "Development"}
+    user_agent = request.headers.get("User-Agent", "Unknown")
+    bot = detect_bot(user_agent)
+    if bot is not None and settings.ANALYTICS_BOT_MODE == "drop":
+        return TrackResponse(status="ignored", accepted=0, deduplicated=0)
     
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{settings.GEOIP_API_URL}/{ip_address}")
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("status") == "success":
-                    return {
-                        "country": data.get("country", "Unknown"),
-                        "city": data.get("city", "Unknown"),
-                    }
-    except Exception:
-        pass
-    
-    return {"country": "Unknown", "city": "Unknown"}
-
-
-async def track_view_background(
-    page_type: str,
-    resource_id: Optional[int],
-    post_id: Optional[int],
-    ip_address: str,
-    user_agent: str,
-    session_id: Optional[str],
-    referrer: Optional[str],
-    db: AsyncSession,
-):
-    """
-    Background task to track a page view.
-    """
-    # Get geolocation
-    geo_data = await get_geolocation(ip_address)
-    
-    # Check for duplicate view (same page_type + resource + IP + session within 30 min)
-    if session_id:
-        thirty_min_ago = datetime.utcnow() - timedelta(minutes=30)
-        existing_query = select(Analytics).where(
-            Analytics.page_type == page_type,
-            Analytics.resource_id == resource_id,
-            Analytics.ip_address == ip_address,
-            Analytics.session_id == session_id,
-            Analytics.timestamp > thirty_min_ago,
+        parsed = _track_body.validate_json(await request.body())
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors)
+    events = parsed if isinstance(parsed, list) else [parsed]
+    if len(events) > settings.ANALYTICS_TRACK_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.ANALYTICS_TRACK_MAX_BATCH} events per request",
         )
-        result = await db.execute(existing_query)
-        if result.scalar_one_or_none():
-            return  # Skip duplicate
-    
-    # Create analytics entry
-    analytics = Analytics(
-        page_type=page_type,
-        resource_id=resource_id,
-        post_id=post_id if page_type == "post" else None,
-        ip_address=ip_address,
-        country=geo_data["country"],
-        city=geo_data["city"],
-        user_agent=user_agent,
-        referrer=referrer,
-        session_id=session_id,
-    )
-    
-    db.add(analytics)
     
-    # Increment view count on post/message
-    if page_type == "post" and resource_id:
-        post_result = await db.execute(select(Post).where(Post.id == resource_id))
-        post = post_result.scalar_one_or_none()
-        if post:
-            post.view_count = (post.view_count or 0) + 1
-    elif page_type == "message" and resource_id:
-        msg_result = await db.execute(select(Message).where(Message.id == resource_id))
-        msg = msg_result.scalar_one_or_none()
-        if msg:
-            msg.view_count = (msg.view_count or 0) + 1
+    if bot is not None:
+        bot_hits.add(bot, len(events))
+        return TrackResponse(status="ignored", accepted=0, deduplicated=0)
     
-    await db.commit()
-
-
-@router.post("/track", status_code=status.HTTP_202_ACCEPTED)
-async def track_view(
-    data: AnalyticsTrack,
-    request: Request,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_db),
-):
-    """
-    Track a page view for any page type.
-    """
     # Extract IP from headers (handle proxies)
     forwarded_for = request.headers.get("X-Forwarded-For")
     if forwarded_for:
@@ -176,215 +123,375 @@ async def track_view(
     else:
         ip_address = request.client.host if request.client else "Unknown"
     
-    user_agent = request.headers.get("User-Agent", "Unknown")
-    
-    # Legacy compat: if post_id is set but page_type is default, treat as post
-    page_type = data.page_type or "post"
-    resource_id = data.resource_id or data.post_id
-    
-    background_tasks.add_task(
-        track_view_background,
-        page_type,
-        resource_id,
-        data.post_id,
-        ip_address,
-        user_agent,
-        data.session_id,
-        data.referrer,
-        db,
-    )
+    views = [
+        TrackedView(
+            # Legacy compat: if post_id is set but page_type is default, treat as post
+            page_type=data.page_type or "post",
+            resource_id=data.resource_id or data.post_id,
+            post_id=data.post_id,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            session_id=data.session_id,
+            referrer=data.referrer,
+        )
+        for data in events
+    ]
+    try:
+        queued = await ingest_buffer.submit_many(views)
+    except IngestBufferFull as e:
+        _publish_live(e.queued, user_agent)
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "detail": "Analytics ingestion is overloaded, try again later",
+                "accepted": len(e.queued),
+                "resume_from": e.processed,
+            },
+            headers={"Retry-After": "1"},
+        )
     
-    return {"status": "accepted"}
+    _publish_live(queued, user_agent)
+    return TrackResponse(accepted=len(queued), deduplicated=len(views) - len(queued))
 
 
-@router.get("/stats", response_model=StatsResponse)
-async def get_stats(
-    days: int = Query(30, ge=1, le=365),
-    db: AsyncSession = Depends(get_db),
+def _publish_live(views: List[TrackedView], user_agent: str) -> None:
+    """Send queued views to the live dashboard stream."""
+    if not views:
+        return
+    device = parse_user_agent(user_agent)
+    for view in views:
+        live_events.publish({
+            "timestamp": view.timestamp.isoformat(),
+            "page_type": view.page_type,
+            "resource_id": view.resource_id,
+            "device": device,
+            "referrer": view.referrer,
+        })
+
+
+@router.get("/pipeline")
+async def get_pipeline_stats(
     _admin: dict = Depends(get_current_admin),
 ):
     """
-    Get comprehensive analytics statistics (admin only).
-    """
-    now = datetime.utcnow()
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = today_start - timedelta(days=7)
-    period_start = today_start - timedelta(days=days)
-    
-    # ── Totals ──────────────────────────────────────────────────────
-    total_views_result = await db.execute(select(func.count(Analytics.id)))
-    total_views = total_views_result.scalar() or 0
-    
-    unique_visitors_result = await db.execute(
-        select(func.count(distinct(Analytics.ip_address)))
-    )
-    total_unique_visitors = unique_visitors_result.scalar() or 0
-    
-    total_posts_result = await db.execute(select(func.count(Post.id)))
-    total_posts = total_posts_result.scalar() or 0
-    
-    views_today_result = await db.execute(
-        select(func.count(Analytics.id)).where(Analytics.timestamp >= today_start)
-    )
-    views_today = views_today_result.scalar() or 0
-    
-    views_week_result = await db.execute(
-        select(func.count(Analytics.id)).where(Analytics.timestamp >= week_start)
-    )
-    views_this_week = views_week_result.scalar() or 0
-    
-    views_month_result = await db.execute(
-        select(func.count(Analytics.id)).where(Analytics.timestamp >= period_start)
-    )
-    views_this_month = views_month_result.scalar() or 0
+    Get ingestion pipeline counters for this worker process (admin only).
     
-    # ── Per-post stats ──────────────────────────────────────────────
-    posts_stats_query = (
+    Useful for sizing the ingest buffer and the geolocation cache.
+    """
+    return {
+        "ingest": ingest_buffer.stats(),
+        "geolocation": geolocation_stats(),
+        "view_counters": view_counters.stats(),
+        "stats_cache": stats_cache.stats(),
+        "title_registry": title_registry.stats(),
+        "columnar": columnar_analytics.stats(),
+        "live": live_events.stats(),
+        "bots": bot_hits.stats(),
+        "image_workers": image_worker_stats(),
+        "transform_cache": transform_cache.stats(),
+    }
+
+
+# ── Stats sections ──────────────────────────────────────────────────
+# Each section is an independent query set. get_stats runs the sections
+# concurrently, each on its own pooled connection, so the dashboard waits for
+# the slowest few sections instead of the sum of all of them. The semaphore is
+# shared by every computation in the worker, so concurrent dashboards queue
+# for a slot instead of draining the pool the ingest flush writes through.
+
+rollup_views = func.sum(AnalyticsHourly.views)
+
+_section_slots = asyncio.Semaphore(settings.STATS_SECTION_CONCURRENCY)
+
+
+async def _run_section(section, *args):
+    """Run one stats section in its own session once a section slot is free."""
+    async with _section_slots:
+        async with AsyncSessionLocal() as db:
+            return await section(db, *args)
+
+
+async def _stats_totals(db: AsyncSession, today_start: datetime, week_start: datetime, period_start: datetime):
+    result = await db.execute(
         select(
-            Post.id,
-            Post.title,
-            Post.view_count,
-            func.count(distinct(Analytics.ip_address)).label("unique_visitors")
+            func.coalesce(rollup_views, 0).label("total"),
+            func.coalesce(rollup_views.filter(AnalyticsHourly.hour >= today_start), 0).label("today"),
+            func.coalesce(rollup_views.filter(AnalyticsHourly.hour >= week_start), 0).label("week"),
+            func.coalesce(rollup_views.filter(AnalyticsHourly.hour >= period_start), 0).label("period"),
+            select(func.count(Post.id)).scalar_subquery().label("posts"),
         )
-        .outerjoin(Analytics, Post.id == Analytics.post_id)
-        .group_by(Post.id)
-        .order_by(Post.view_count.desc())
     )
-    posts_stats_result = await db.execute(posts_stats_query)
-    posts_stats = [
+    return result.one()
+
+
+async def _stats_total_uniques(db: AsyncSession, approx_uniques: bool) -> int:
+    if approx_uniques:
+        return await count_total_uniques(db)
+    result = await db.execute(select(func.count(distinct(Analytics.ip_address))))
+    return result.scalar() or 0
+
+
+async def _stats_posts(db: AsyncSession, approx_uniques: bool) -> List[PostStats]:
+    if approx_uniques:
+        rows = (await db.execute(
+            select(Post.id, Post.title, Post.view_count).order_by(Post.view_count.desc())
+        )).all()
+        uniques = await count_uniques_by_resource(db, [("post", row.id) for row in rows])
+        unique_visitors = [uniques.get(("post", row.id), 0) for row in rows]
+    else:
+        rows = (await db.execute(
+            select(
+                Post.id,
+                Post.title,
+                Post.view_count,
+                func.count(distinct(Analytics.ip_address)).label("unique_visitors")
+            )
+            .outerjoin(Analytics, Post.id == Analytics.post_id)
+            .group_by(Post.id)
+            .order_by(Post.view_count.desc())
+        )).all()
+        unique_visitors = [row.unique_visitors or 0 for row in rows]
+
+    uniques_error = SKETCH_RELATIVE_ERROR if approx_uniques else None
+    return [
         PostStats(
             post_id=row.id,
             title=row.title,
             view_count=row.view_count or 0,
-            unique_visitors=row.unique_visitors or 0,
+            unique_visitors=visitors,
+            unique_visitors_error=uniques_error,
         )
-        for row in posts_stats_result.all()
+        for row, visitors in zip(rows, unique_visitors)
     ]
-    
-    # ── Geographic distribution ─────────────────────────────────────
-    geo_query = (
-        select(Analytics.country, func.count(Analytics.id).label("count"))
-        .where(Analytics.country.isnot(None))
-        .group_by(Analytics.country)
-        .order_by(func.count(Analytics.id).desc())
+
+
+async def _stats_geo(db: AsyncSession) -> List[GeoStats]:
+    result = await db.execute(
+        select(AnalyticsHourly.country, rollup_views.label("count"))
+        .group_by(AnalyticsHourly.country)
+        .order_by(rollup_views.desc())
         .limit(15)
     )
-    geo_result = await db.execute(geo_query)
-    geo_stats = [
-        GeoStats(country=row.country, count=row.count)
-        for row in geo_result.all()
-    ]
-    
-    # ── Daily stats ─────────────────────────────────────────────────
-    daily_query = (
-        select(
-            func.date(Analytics.timestamp).label("date"),
-            func.count(Analytics.id).label("views")
+    return [GeoStats(country=row.country, count=row.count) for row in result.all()]
+
+
+async def _stats_daily(db: AsyncSession, period_start: datetime, use_columnar: bool) -> List[DailyStats]:
+    if use_columnar:
+        rows = columnar_analytics.daily_views(period_start)
+    else:
+        day = func.date(AnalyticsHourly.hour)
+        result = await db.execute(
+            select(day.label("date"), rollup_views.label("views"))
+            .where(AnalyticsHourly.hour >= period_start)
+            .group_by(day)
+            .order_by(day)
         )
-        .where(Analytics.timestamp >= period_start)
-        .group_by(func.date(Analytics.timestamp))
-        .order_by(func.date(Analytics.timestamp))
+        rows = result.all()
+    return [DailyStats(date=str(day), views=views) for day, views in rows]
+
+
+async def _stats_page_type_views(db: AsyncSession, period_start: datetime, use_columnar: bool) -> List[Tuple[str, int]]:
+    if use_columnar:
+        return columnar_analytics.page_type_views(period_start)
+    result = await db.execute(
+        select(AnalyticsHourly.page_type, rollup_views.label("views"))
+        .where(AnalyticsHourly.hour >= period_start)
+        .group_by(AnalyticsHourly.page_type)
+        .order_by(rollup_views.desc())
     )
-    daily_result = await db.execute(daily_query)
-    daily_stats = [
-        DailyStats(date=str(row.date), views=row.views)
-        for row in daily_result.all()
-    ]
-    
-    # ── Page type breakdown ─────────────────────────────────────────
-    page_type_query = (
+    return result.all()
+
+
+async def _stats_page_type_uniques(db: AsyncSession, period_start: datetime, approx_uniques: bool) -> Dict[str, int]:
+    if approx_uniques:
+        return await count_uniques_by_page_type(db, period_start.date())
+    result = await db.execute(
         select(
             func.coalesce(Analytics.page_type, "post").label("page_type"),
-            func.count(Analytics.id).label("views"),
             func.count(distinct(Analytics.ip_address)).label("unique_visitors"),
         )
         .where(Analytics.timestamp >= period_start)
         .group_by(Analytics.page_type)
-        .order_by(func.count(Analytics.id).desc())
     )
-    page_type_result = await db.execute(page_type_query)
-    page_type_stats = [
-        PageTypeStats(page_type=row.page_type, views=row.views, unique_visitors=row.unique_visitors)
-        for row in page_type_result.all()
-    ]
-    
-    # ── Hourly distribution ─────────────────────────────────────────
-    hourly_query = (
-        select(
-            func.extract("hour", Analytics.timestamp).label("hour"),
-            func.count(Analytics.id).label("views"),
+    return {row.page_type: row.unique_visitors for row in result.all()}
+
+
+async def _stats_hourly(db: AsyncSession, period_start: datetime, use_columnar: bool) -> List[HourlyStats]:
+    if use_columnar:
+        rows = columnar_analytics.hourly_views(period_start)
+    else:
+        hour_of_day = func.extract("hour", AnalyticsHourly.hour)
+        result = await db.execute(
+            select(hour_of_day.label("hour"), rollup_views.label("views"))
+            .where(AnalyticsHourly.hour >= period_start)
+            .group_by(hour_of_day)
+            .order_by(hour_of_day)
         )
-        .where(Analytics.timestamp >= period_start)
-        .group_by(func.extract("hour", Analytics.timestamp))
-        .order_by(func.extract("hour", Analytics.timestamp))
-    )
-    hourly_result = await db.execute(hourly_query)
-    hourly_stats = [
-        HourlyStats(hour=int(row.hour), views=row.views)
-        for row in hourly_result.all()
-    ]
-    
-    # ── Device / Browser breakdown ──────────────────────────────────
-    all_ua_query = (
-        select(Analytics.user_agent)
-        .where(
-            Analytics.timestamp >= period_start,
-            Analytics.user_agent.isnot(None),
+        rows = result.all()
+    return [HourlyStats(hour=int(hour), views=views) for hour, views in rows]
+
+
+async def _stats_devices(db: AsyncSession, period_start: datetime, use_columnar: bool) -> List[DeviceStats]:
+    if use_columnar:
+        rows = columnar_analytics.device_views(period_start, limit=15)
+    else:
+        result = await db.execute(
+            select(AnalyticsHourly.device_class, rollup_views.label("count"))
+            .where(AnalyticsHourly.hour >= period_start)
+            .group_by(AnalyticsHourly.device_class)
+            .order_by(rollup_views.desc())
+            .limit(15)
         )
+        rows = result.all()
+    return [DeviceStats(device=device, count=count) for device, count in rows]
+
+
+async def _stats_bots(db: AsyncSession, period_start: datetime) -> List[BotStats]:
+    hits = func.sum(BotHit.hits)
+    result = await db.execute(
+        select(BotHit.bot, hits.label("hits"))
+        .where(BotHit.day >= period_start.date())
+        .group_by(BotHit.bot)
+        .order_by(hits.desc())
     )
-    ua_result = await db.execute(all_ua_query)
-    device_counts = {}
-    for row in ua_result.all():
-        device = parse_user_agent(row.user_agent)
-        device_counts[device] = device_counts.get(device, 0) + 1
-    
-    device_stats = sorted(
-        [DeviceStats(device=d, count=c) for d, c in device_counts.items()],
-        key=lambda x: x.count,
-        reverse=True,
-    )[:15]
-    
-    # ── Top resources (across all page types) ───────────────────────
-    top_res_query = (
+    return [BotStats(bot=row.bot, hits=row.hits) for row in result]
+
+
+async def _stats_top_resource_uniques(
+    db: AsyncSession,
+    resources: List[Tuple[str, int]],
+    period_start: datetime,
+    approx_uniques: bool,
+) -> Dict[Tuple[str, int], int]:
+    if not resources:
+        return {}
+    if approx_uniques:
+        return await count_uniques_by_resource(db, resources, since=period_start.date())
+    result = await db.execute(
         select(
             func.coalesce(Analytics.page_type, "post").label("page_type"),
             Analytics.resource_id,
-            func.count(Analytics.id).label("views"),
             func.count(distinct(Analytics.ip_address)).label("unique_visitors"),
         )
         .where(
             Analytics.timestamp >= period_start,
-            Analytics.resource_id.isnot(None),
+            Analytics.resource_id.in_({resource_id for _, resource_id in resources}),
         )
         .group_by(Analytics.page_type, Analytics.resource_id)
-        .order_by(func.count(Analytics.id).desc())
-        .limit(10)
     )
-    top_res_result = await db.execute(top_res_query)
-    top_resources = []
-    for row in top_res_result.all():
-        title = None
-        if row.page_type == "post" and row.resource_id:
-            t = await db.execute(select(Post.title).where(Post.id == row.resource_id))
-            title = t.scalar()
-        elif row.page_type == "message" and row.resource_id:
-            t = await db.execute(select(Message.title).where(Message.id == row.resource_id))
-            title = t.scalar()
-        top_resources.append(TopResource(
-            page_type=row.page_type,
-            resource_id=row.resource_id,
-            title=title,
-            views=row.views,
-            unique_visitors=row.unique_visitors,
-        ))
-    
-    return StatsResponse(
-        total_views=total_views,
+    return {(row.page_type, row.resource_id): row.unique_visitors for row in result.all()}
+
+
+async def _stats_top_resources(
+    db: AsyncSession,
+    period_start: datetime,
+    approx_uniques: bool,
+    use_columnar: bool,
+) -> List[TopResource]:
+    if use_columnar:
+        rows = columnar_analytics.top_resources(period_start, limit=10)
+    else:
+        result = await db.execute(
+            select(
+                AnalyticsHourly.page_type,
+                AnalyticsHourly.resource_id,
+                rollup_views.label("views"),
+            )
+            .where(
+                AnalyticsHourly.hour >= period_start,
+                AnalyticsHourly.resource_id != 0,
+            )
+            .group_by(AnalyticsHourly.page_type, AnalyticsHourly.resource_id)
+            .order_by(rollup_views.desc())
+            .limit(10)
+        )
+        rows = result.all()
+    resources = [(page_type, resource_id) for page_type, resource_id, _ in rows]
+
+    # Uniques and titles only depend on which resources made the top list.
+    # Uniques reuse this section's connection rather than taking a second slot.
+    uniques, titles = await asyncio.gather(
+        _stats_top_resource_uniques(db, resources, period_start, approx_uniques),
+        title_registry.get_titles(resources),
+    )
+
+    uniques_error = SKETCH_RELATIVE_ERROR if approx_uniques else None
+    return [
+        TopResource(
+            page_type=page_type,
+            resource_id=resource_id,
+            title=titles.get((page_type, resource_id)),
+            views=views,
+            unique_visitors=uniques.get((page_type, resource_id), 0),
+            unique_visitors_error=uniques_error,
+        )
+        for page_type, resource_id, views in rows
+    ]
+
+
+async def _compute_stats(days: int, approx_uniques: bool) -> bytes:
+    """
+    Build the serialized StatsResponse for a window.
+
+    View counts come from the hourly rollups. Unique visitor counts read the
+    raw analytics rows, or with `approx_uniques` are estimated from the daily
+    sketches (windows are then whole days) and report their relative error.
+    Sections run concurrently on their own connections, at most
+    STATS_SECTION_CONCURRENCY at a time across the worker. When the columnar
+    engine holds the whole period, the windowed view breakdowns are computed
+    from it instead.
+    """
+    now = datetime.utcnow()
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = today_start - timedelta(days=7)
+    period_start = today_start - timedelta(days=days)
+    use_columnar = columnar_analytics.covers(period_start)
+    
+    (
+        totals,
+        total_unique_visitors,
+        posts_stats,
+        geo_stats,
+        daily_stats,
+        page_type_rows,
+        page_type_uniques,
+        hourly_stats,
+        device_stats,
+        top_resources,
+        bot_stats,
+    ) = await asyncio.gather(
+        _run_section(_stats_totals, today_start, week_start, period_start),
+        _run_section(_stats_total_uniques, approx_uniques),
+        _run_section(_stats_posts, approx_uniques),
+        _run_section(_stats_geo),
+        _run_section(_stats_daily, period_start, use_columnar),
+        _run_section(_stats_page_type_views, period_start, use_columnar),
+        _run_section(_stats_page_type_uniques, period_start, approx_uniques),
+        _run_section(_stats_hourly, period_start, use_columnar),
+        _run_section(_stats_devices, period_start, use_columnar),
+        _run_section(_stats_top_resources, period_start, approx_uniques, use_columnar),
+        _run_section(_stats_bots, period_start),
+    )
+    
+    uniques_error = SKETCH_RELATIVE_ERROR if approx_uniques else None
+    page_type_stats = [
+        PageTypeStats(
+            page_type=page_type,
+            views=views,
+            unique_visitors=page_type_uniques.get(page_type, 0),
+            unique_visitors_error=uniques_error,
+        )
+        for page_type, views in page_type_rows
+    ]
+    
+    stats = StatsResponse(
+        total_views=totals.total,
         total_unique_visitors=total_unique_visitors,
-        total_posts=total_posts,
-        views_today=views_today,
-        views_this_week=views_this_week,
-        views_this_month=views_this_month,
+        total_unique_visitors_error=uniques_error,
+        total_posts=totals.posts or 0,
+        views_today=totals.today,
+        views_this_week=totals.week,
+        views_this_month=totals.period,
         posts_stats=posts_stats,
         geo_stats=geo_stats,
         daily_stats=daily_stats,
@@ -392,6 +499,35 @@ async def get_stats(
         hourly_stats=hourly_stats,
         device_stats=device_stats,
         top_resources=top_resources,
+        bot_stats=bot_stats,
+    )
+    return stats.model_dump_json().encode()
+
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_stats(
+    days: int = Query(30, ge=1, le=365),
+    approx_uniques: bool = Query(False, description="Estimate unique visitors from HyperLogLog sketches"),
+    fresh: bool = Query(False, description="Recompute instead of serving cached stats"),
+    _admin: dict = Depends(get_current_admin),
+):
+    """
+    Get comprehensive analytics statistics (admin only).
+    
+    Served from a short-lived per-worker cache; once an entry expires the
+    stale copy is returned while it is recomputed in the background. The
+    X-Stats-Age header gives the age of the data in seconds, and `fresh`
+    forces a recomputation.
+    """
+    payload, age, outcome = await stats_cache.get(
+        (days, approx_uniques),
+        lambda: _compute_stats(days, approx_uniques),
+        fresh=fresh,
+    )
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"X-Stats-Age": str(int(age)), "X-Stats-Cache": outcome},
     )
 
 
@@ -400,43 +536,76 @@ async def get_visitors(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
     page_type: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous response"),
+    exact_total: bool = Query(False, description="Count rows exactly instead of estimating"),
     db: AsyncSession = Depends(get_db),
     _admin: dict = Depends(get_current_admin),
 ):
     """
     Get visitor details with pagination (admin only).
+    
+    Newest first. With `cursor` the page is read by keyset on
+    (timestamp, id), which costs the same at any depth; otherwise `page`
+    selects a page by offset. `total` is estimated from the hourly rollups
+    unless `exact_total` is set.
     """
     # Count total
-    count_query = select(func.count(Analytics.id))
-    if page_type:
-        count_query = count_query.where(Analytics.page_type == page_type)
+    if exact_total:
+        count_query = select(func.count(Analytics.id))
+        if page_type:
+            count_query = count_query.where(Analytics.page_type == page_type)
+    else:
+        count_query = select(func.sum(AnalyticsHourly.views))
+        if page_type:
+            count_query = count_query.where(AnalyticsHourly.page_type == page_type)
     total_result = await db.execute(count_query)
     total = total_result.scalar() or 0
     total_pages = max(1, math.ceil(total / page_size))
     
-    offset = (page - 1) * page_size
-    
-    query = (
-        select(Analytics)
-        .order_by(Analytics.timestamp.desc())
-        .offset(offset)
-        .limit(page_size)
-    )
+    position = tuple_(Analytics.timestamp, Analytics.id)
+    query = select(Analytics).limit(page_size + 1)
     if page_type:
         query = query.where(Analytics.page_type == page_type)
     
+    direction = NEXT
+    if cursor:
+        try:
+            cursor_timestamp, cursor_id, direction = decode_cursor(cursor, int)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        boundary = tuple_(literal(cursor_timestamp), literal(cursor_id))
+        if direction == NEXT:
+            query = query.where(position < boundary).order_by(Analytics.timestamp.desc(), Analytics.id.desc())
+        else:
+            query = query.where(position > boundary).order_by(Analytics.timestamp.asc(), Analytics.id.asc())
+    else:
+        query = query.order_by(Analytics.timestamp.desc(), Analytics.id.desc()).offset((page - 1) * page_size)
+    
     result = await db.execute(query)
+    rows = result.scalars().all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == PREV:
+        rows.reverse()
+    
+    # Rows on the far side of the boundary we read from always exist
+    if cursor:
+        has_older = has_more if direction == NEXT else True
+        has_newer = has_more if direction == PREV else True
+    else:
+        has_older = has_more
+        has_newer = page > 1
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id, NEXT) if rows and has_older else None
+    prev_cursor = encode_cursor(rows[0].timestamp, rows[0].id, PREV) if rows and has_newer else None
+    
+    titles = await title_registry.get_titles([(row.page_type, row.resource_id) for row in rows])
     visitors = []
     
-    for row in result.scalars().all():
+    for row in rows:
         # Resolve resource title
         resource_title = None
-        if row.page_type == "post" and row.resource_id:
-            t = await db.execute(select(Post.title).where(Post.id == row.resource_id))
-            resource_title = t.scalar()
-        elif row.page_type == "message" and row.resource_id:
-            t = await db.execute(select(Message.title).where(Message.id == row.resource_id))
-            resource_title = t.scalar()
+        if row.page_type in ("post", "message"):
+            resource_title = titles.get((row.page_type, row.resource_id))
         elif row.page_type in ["home", "music", "memories"]:
             resource_title = row.page_type.capitalize()
         
@@ -460,9 +629,134 @@ async def get_visitors(
     return VisitorListResponse(
         visitors=visitors,
         total=total,
-        page=page,
+        total_is_estimate=not exact_total,
+        page=None if cursor else page,
         page_size=page_size,
         total_pages=total_pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+@router.get("/export")
+async def export_analytics(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    start: Optional[datetime] = Query(None, description="Only views at or after this time (UTC)"),
+    end: Optional[datetime] = Query(None, description="Only views before this time (UTC)"),
+    page_type: Optional[str] = Query(None),
+    _admin: dict = Depends(get_current_admin),
+):
+    """
+    Stream raw analytics rows, oldest first (admin only).
+    
+    Rows are read through a server-side cursor and written as they arrive,
+    gzip-compressed on the fly when the client accepts it.
+    """
+    compress = "gzip" in request.headers.get("Accept-Encoding", "")
+    media_type = EXPORT_FORMATS[format][0]
+    filename = f"analytics-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    
+    return StreamingResponse(
+        stream_export(format, start=start, end=end, page_type=page_type, compress=compress),
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def _live_stream(subscription: Subscription) -> AsyncIterator[str]:
+    """Server-sent events for one subscription, until the client goes away."""
+    heartbeat = settings.LIVE_HEARTBEAT_SECONDS
+    try:
+        if subscription.aggregate:
+            idle = 0.0
+            while True:
+                await asyncio.sleep(1.0)
+                aggregate = subscription.drain_aggregate()
+                if aggregate["views"]:
+                    idle = 0.0
+                    aggregate["second"] = datetime.utcnow().replace(microsecond=0).isoformat()
+                    yield _sse("aggregate", aggregate)
+                else:
+                    idle += 1.0
+                    if idle >= heartbeat:
+                        idle = 0.0
+                        yield ": heartbeat\n\n"
+        else:
+            while True:
+                if not await subscription.wait(heartbeat):
+                    yield ": heartbeat\n\n"
+                    continue
+                events, dropped = subscription.drain_events()
+                if dropped:
+                    yield _sse("dropped", {"count": dropped})
+                for event in events:
+                    yield _sse("view", event)
+    finally:
+        live_events.unsubscribe(subscription)
+
+
+@router.post("/live/ticket", response_model=StreamTicketResponse)
+async def create_live_ticket(
+    admin: dict = Depends(get_current_admin),
+):
+    """
+    Issue a ticket for opening /live with EventSource (admin only).
+    
+    Pass it as `?ticket=`; it expires after LIVE_STREAM_TICKET_SECONDS and
+    opens a single stream, so request a new one to reconnect.
+    """
+    return StreamTicketResponse(
+        ticket=create_stream_ticket(admin.get("sub", "admin")),
+        expires_in=settings.LIVE_STREAM_TICKET_SECONDS,
+    )
+
+
+@router.get("/live")
+async def live_visitors(
+    mode: str = Query("events", pattern="^(events|aggregate)$", description="events, or one aggregate per second"),
+    _admin: dict = Depends(get_current_admin_for_stream),
+):
+    """
+    Stream views as they are tracked, as server-sent events (admin only).
+    
+    `events` mode sends a `view` event per tracked view; a client that falls
+    behind gets a `dropped` event with the number of views it missed.
+    `aggregate` mode sends one `aggregate` event per second with counts by
+    page type and device. Comment heartbeats keep idle connections open.
+    Views tracked by other worker processes are not included.
+    
+    The ticket in the URL is spent once the stream opens, so EventSource's
+    automatic reconnect fails with 401; clients close the stream on error and
+    reopen it with a new ticket.
+    """
+    try:
+        subscription = live_events.subscribe(aggregate=mode == "aggregate")
+    except TooManySubscribers:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live subscribers",
+            headers={"Retry-After": "30"},
+        )
+    
+    return StreamingResponse(
+        _live_stream(subscription),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Keep nginx from buffering the stream
+            "X-Accel-Buffering": "no",
+            # GZipMiddleware would buffer events; it leaves encoded responses alone
+            "Content-Encoding": "identity",
+        },
     )
 
 
@@ -470,62 +764,92 @@ async def get_visitors(
 async def get_sessions(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor or prev_cursor of a previous response"),
+    exact_total: bool = Query(False, description="Count sessions exactly instead of estimating"),
     db: AsyncSession = Depends(get_db),
     _admin: dict = Depends(get_current_admin),
 ):
     """
     Get unique sessions with visit counts (admin only).
     Shows how many times each visitor has returned.
+    
+    Reads the visitor_sessions summaries, most recently active first. With
+    `cursor` the page is a range read on the (last_seen, session_id) index,
+    which costs the same at any depth; otherwise `page` selects a page by
+    offset. `total` is the planner's row estimate unless `exact_total` is set.
     """
-    # Count total distinct sessions
-    count_query = select(func.count(distinct(Analytics.session_id))).where(
-        Analytics.session_id.isnot(None)
-    )
-    total_result = await db.execute(count_query)
+    if exact_total:
+        total_result = await db.execute(select(func.count()).select_from(VisitorSession))
+    else:
+        total_result = await db.execute(text(
+            "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class "
+            "WHERE oid = to_regclass(:table)"
+        ), {"table": VisitorSession.__tablename__})
     total = total_result.scalar() or 0
     total_pages = max(1, math.ceil(total / page_size))
     
-    offset = (page - 1) * page_size
+    position = tuple_(VisitorSession.last_seen, VisitorSession.session_id)
+    query = select(VisitorSession).limit(page_size + 1)
+    
+    direction = NEXT
+    if cursor:
+        try:
+            cursor_last_seen, cursor_session_id, direction = decode_cursor(cursor, str)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        boundary = tuple_(literal(cursor_last_seen), literal(cursor_session_id))
+        if direction == NEXT:
+            query = query.where(position < boundary).order_by(
+                VisitorSession.last_seen.desc(), VisitorSession.session_id.desc()
+            )
+        else:
+            query = query.where(position > boundary).order_by(
+                VisitorSession.last_seen.asc(), VisitorSession.session_id.asc()
+            )
+    else:
+        query = query.order_by(
+            VisitorSession.last_seen.desc(), VisitorSession.session_id.desc()
+        ).offset((page - 1) * page_size)
     
-    sessions_query = (
-        select(
-            Analytics.session_id,
-            func.min(Analytics.ip_address).label("ip_address"),
-            func.min(Analytics.country).label("country"),
-            func.min(Analytics.city).label("city"),
-            func.min(Analytics.user_agent).label("user_agent"),
-            func.count(Analytics.id).label("visit_count"),
-            func.min(Analytics.timestamp).label("first_seen"),
-            func.max(Analytics.timestamp).label("last_seen"),
-            func.count(distinct(Analytics.page_type)).label("pages_viewed"),
-        )
-        .where(Analytics.session_id.isnot(None))
-        .group_by(Analytics.session_id)
-        .order_by(func.max(Analytics.timestamp).desc())
-        .offset(offset)
-        .limit(page_size)
-    )
+    result = await db.execute(query)
+    rows = result.scalars().all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if direction == PREV:
+        rows.reverse()
+    
+    # Rows on the far side of the boundary we read from always exist
+    if cursor:
+        has_older = has_more if direction == NEXT else True
+        has_newer = has_more if direction == PREV else True
+    else:
+        has_older = has_more
+        has_newer = page > 1
+    next_cursor = encode_cursor(rows[-1].last_seen, rows[-1].session_id, NEXT) if rows and has_older else None
+    prev_cursor = encode_cursor(rows[0].last_seen, rows[0].session_id, PREV) if rows and has_newer else None
     
-    result = await db.execute(sessions_query)
     sessions = [
         SessionInfo(
             session_id=row.session_id,
             ip_address=row.ip_address,
             country=row.country,
             city=row.city,
-            device=parse_user_agent(row.user_agent),
+            device=row.device,
             visit_count=row.visit_count,
             first_seen=row.first_seen,
             last_seen=row.last_seen,
-            pages_viewed=row.pages_viewed,
+            pages_viewed=count_page_types(row.page_types),
         )
-        for row in result.all()
+        for row in rows
     ]
     
     return SessionListResponse(
         sessions=sessions,
         total=total,
-        page=page,
+        total_is_estimate=not exact_total,
+        page=None if cursor else page,
         page_size=page_size,
         total_pages=total_pages,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
     )
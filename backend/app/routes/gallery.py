@@ -17,17 +17,38 @@ from app.schemas.gallery import (
     GalleryMediaListResponse,
 )
 from app.dependencies import get_current_admin
-from app.utils.image_processing import (
-    optimize_image_base64,
-    create_thumbnail_base64,
-    extract_image_dimensions,
-    generate_blur_placeholder,
-)
+from app.services.blob_store import InvalidBlob, blob_store, blob_url
+from app.services.gallery_renditions import store_renditions
+from app.services.image_workers import ImageWorkersBusy, run_image_job
+from app.utils.image_processing import process_image
 
 
 router = APIRouter()
 
 
+# Columns the gallery list returns; the full-size url is left out unless
+# include_full is set, since legacy rows still hold it as base64 data
+LIST_COLUMNS = (
+    GalleryMedia.id,
+    GalleryMedia.media_type,
+    GalleryMedia.thumbnail_url,
+    GalleryMedia.blur_placeholder,
+    GalleryMedia.width,
+    GalleryMedia.height,
+    GalleryMedia.renditions,
+    GalleryMedia.caption,
+    GalleryMedia.order_index,
+    GalleryMedia.created_at,
+)
+
+
+def gallery_list_query(include_full: bool = False):
+    """Select the gallery list columns, ordered as the gallery shows them."""
+    columns = LIST_COLUMNS + (GalleryMedia.url,) if include_full else LIST_COLUMNS
+    # Ordered by order_index, then by created_at (newest first)
+    return select(*columns).order_by(GalleryMedia.order_index.asc(), GalleryMedia.created_at.desc())
+
+
 @router.get("", response_model=GalleryMediaListResponse)
 async def get_gallery_media(
     response: Response,
@@ -40,7 +61,10 @@ async def get_gallery_media(
     Get all gallery media items.
     Public endpoint - anyone can view the gallery.
     
-    Set include_full=False to get only thumbnails for faster initial load.
+    By default only thumbnails, placeholders, renditions and metadata are
+    loaded and `url` is null; fetch the full media per item from
+    GET /api/gallery/{id} or GET /api/media/{id}, or set include_full=True
+    to load it for every item.
     """
     # Add cache headers for better performance
     response.headers["Cache-Control"] = "public, max-age=300, stale-while-revalidate=60"
@@ -49,14 +73,8 @@ async def get_gallery_media(
     count_result = await db.execute(select(func.count(GalleryMedia.id)))
     total = count_result.scalar()
     
-    # Get media items ordered by order_index, then by created_at (newest first)
-    result = await db.execute(
-        select(GalleryMedia)
-        .order_by(GalleryMedia.order_index.asc(), GalleryMedia.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-    )
-    media_items = result.scalars().all()
+    result = await db.execute(gallery_list_query(include_full).offset(offset).limit(limit))
+    media_items = result.all()
     
     return GalleryMediaListResponse(media=media_items, total=total)
 
@@ -91,34 +109,51 @@ async def create_gallery_media(
     Create a new gallery media item.
     Requires admin authentication.
     
-    Automatically generates optimized thumbnail and blur placeholder for images.
+    Automatically generates optimized thumbnail, blur placeholder and
+    responsive WebP/JPEG renditions for images.
+    Data URLs are moved into the blob store and the row keeps their blob URLs;
+    the blur placeholder is small and stays inline.
     """
     thumbnail_url = media_data.thumbnail_url
     blur_placeholder = None
     width = None
     height = None
+    renditions = None
     optimized_url = media_data.url
     
-    # Process images for optimization
+    # Process images for optimization: one decode in the image worker pool gives
+    # the dimensions, main image (max 1920x1080, quality 85), thumbnail
+    # (400x400, quality 75), blur placeholder and responsive renditions
     if media_data.media_type == "image" and media_data.url.startswith("data:image"):
+        derivatives = None
         try:
-            # Extract dimensions
-            width, height = extract_image_dimensions(media_data.url)
-            
-            # Optimize the main image (max 1920x1080, quality 85)
-            optimized_url = optimize_image_base64(media_data.url, max_size=(1920, 1080), quality=85)
-            
-            # Create thumbnail if not provided (400x400, quality 75)
-            if not thumbnail_url:
-                thumbnail_url = create_thumbnail_base64(media_data.url, size=(400, 400), quality=75)
-            
-            # Create blur placeholder for progressive loading
-            blur_placeholder = generate_blur_placeholder(media_data.url)
-            
+            derivatives = await run_image_job(process_image, media_data.url)
+        except ImageWorkersBusy as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": "5"},
+            )
         except Exception as e:
             # If optimization fails, use original
             print(f"Image optimization failed: {e}")
-            optimized_url = media_data.url
+        
+        if derivatives is not None:
+            width, height = derivatives.width, derivatives.height
+            optimized_url = blob_url(await blob_store.put_async(derivatives.optimized, "image/jpeg"))
+            if not thumbnail_url:
+                thumbnail_url = blob_url(await blob_store.put_async(derivatives.thumbnail, "image/jpeg"))
+            blur_placeholder = derivatives.blur_placeholder
+            renditions = await store_renditions(derivatives.renditions)
+    
+    try:
+        optimized_url = await blob_store.store_data_url(optimized_url)
+        thumbnail_url = await blob_store.store_data_url(thumbnail_url)
+    except InvalidBlob as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     media = GalleryMedia(
         media_type=media_data.media_type,
@@ -127,6 +162,7 @@ async def create_gallery_media(
         blur_placeholder=blur_placeholder,
         width=width,
         height=height,
+        renditions=renditions,
         caption=media_data.caption,
         order_index=media_data.order_index,
     )
@@ -162,6 +198,18 @@ async def update_gallery_media(
     
     # Update fields if provided
     update_data = media_data.model_dump(exclude_unset=True)
+    try:
+        for field in ("url", "thumbnail_url"):
+            if field in update_data:
+                update_data[field] = await blob_store.store_data_url(update_data[field])
+    except InvalidBlob as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if "url" in update_data and update_data["url"] != media.url:
+        # Renditions were made from the old image
+        media.renditions = None
     for field, value in update_data.items():
         setattr(media, field, value)
     
@@ -0,0 +1,295 @@
+"""
+Media routes serving gallery content from the blob store, with on-demand
+resizing of gallery and uploaded images.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+from typing import Awaitable, Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, RedirectResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.gallery import GalleryMedia
+from app.services.blob_store import KEY_PATTERN, blob_store, is_data_url, key_from_url, parse_data_url
+from app.services.gallery_renditions import accepts_webp, choose_rendition, read_source
+from app.services.image_workers import ImageWorkersBusy, run_image_job
+from app.services.transform_cache import transform_cache, variant_key
+from app.utils.image_processing import TRANSFORM_FORMATS, transform_image
+
+
+router = APIRouter()
+
+# Blob keys are content hashes, so a response never goes stale
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# /api/media/{id} follows the row, which can be edited
+MEDIA_CACHE_CONTROL = "public, max-age=86400"
+
+# Transform parameters anyone may request; other values need a signature
+ALLOWED_SIZES = frozenset((80, 160, 240, 320, 400, 480, 640, 800, 1024, 1280, 1600, 1920))
+ALLOWED_QUALITIES = frozenset((50, 65, 75, 80, 85))
+FITS = ("contain", "cover")
+DEFAULT_QUALITY = 80
+
+# Files written by app.routes.uploads.upload_image
+UPLOADED_IMAGE_PATTERN = re.compile(r"^[0-9a-f]{32}\.(?:jpg|jpeg|png|gif|webp)$")
+
+
+# ── Transforms ───────────────────────────────────────────────────────
+
+def sign_transform(
+    source: str,
+    w: Optional[int] = None,
+    h: Optional[int] = None,
+    fit: Optional[str] = None,
+    fmt: Optional[str] = None,
+    q: Optional[int] = None,
+) -> str:
+    """
+    Signature allowing a transform outside the whitelist.
+
+    `source` is "gallery:<id>" or "uploads:<filename>"; the parameters must
+    be passed exactly as they will appear in the URL.
+    """
+    message = "|".join("" if part is None else str(part) for part in (source, w, h, fit, fmt, q))
+    return hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def _check_transform(source: str, w, h, fit, fmt, q, signature: Optional[str]) -> None:
+    """Reject unknown fits and formats, and off-whitelist values without a valid signature."""
+    if fit is not None and fit not in FITS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"fit must be one of {', '.join(FITS)}")
+    if fmt is not None and fmt not in TRANSFORM_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fmt must be one of {', '.join(TRANSFORM_FORMATS)}",
+        )
+    whitelisted = (
+        (w is None or w in ALLOWED_SIZES)
+        and (h is None or h in ALLOWED_SIZES)
+        and (q is None or q in ALLOWED_QUALITIES)
+    )
+    if whitelisted:
+        return
+    if signature is None or not hmac.compare_digest(signature, sign_transform(source, w, h, fit, fmt, q)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Transform parameters are not allowed without a valid signature",
+        )
+
+
+async def _transformed_response(
+    request: Request,
+    source: str,
+    identity: str,
+    load: Callable[[], Awaitable[Optional[bytes]]],
+    w: Optional[int],
+    h: Optional[int],
+    fit: Optional[str],
+    fmt: Optional[str],
+    q: Optional[int],
+    cache_control: str,
+) -> Response:
+    """
+    Serve a transformed variant from the disk cache, rendering it on a miss.
+
+    Concurrent misses for the same variant wait for a single render.
+    Without `fmt`, WebP or JPEG is chosen from the Accept header.
+    """
+    headers = {"Cache-Control": cache_control}
+    if fmt is None:
+        fmt = "webp" if accepts_webp(request.headers.get("Accept")) else "jpeg"
+        headers["Vary"] = "Accept"
+    fit = fit or "contain"
+    quality = q or DEFAULT_QUALITY
+    key = variant_key(identity, w, h, fit, fmt, quality)
+
+    async def render() -> bytes:
+        data = await load()
+        if data is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+        output = await run_image_job(transform_image, data, w, h, fit, fmt, quality)
+        await transform_cache.put_async(key, output)
+        return output
+
+    # Read a hit up front: another worker may evict the file before it would
+    # be streamed, which is then just a miss
+    output = None
+    path = transform_cache.get(key)
+    if path is not None:
+        try:
+            output = await asyncio.to_thread(_read_file, path)
+        except FileNotFoundError:
+            transform_cache.discard(key)
+
+    if output is None:
+        try:
+            output = await transform_cache.inflight.do(key, render)
+        except ImageWorkersBusy as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": "5"},
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Media transform failed for {source}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Media cannot be transformed"
+            )
+
+    return Response(content=output, media_type=TRANSFORM_FORMATS[fmt][1], headers=headers)
+
+
+# ── Routes ───────────────────────────────────────────────────────────
+
+def _blob_response(key: str, request: Request, headers: dict) -> Response:
+    """Serve a blob, answering a matching If-None-Match with 304."""
+    headers = {**headers, "ETag": f'"{key.split(".", 1)[0]}"'}
+    if request.headers.get("If-None-Match") == headers["ETag"]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return FileResponse(
+        blob_store.path(key),
+        media_type=blob_store.media_type(key),
+        headers=headers,
+    )
+
+
+@router.get("/blobs/{key}")
+async def get_blob(key: str, request: Request):
+    """
+    Serve a stored blob.
+    Public endpoint - blob URLs are handed out in gallery responses.
+    """
+    if not KEY_PATTERN.match(key) or not blob_store.exists(key):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blob not found"
+        )
+
+    return _blob_response(key, request, {"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+
+@router.get("/uploads/{filename}")
+async def get_uploaded_image(
+    filename: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="Maximum width in pixels"),
+    h: Optional[int] = Query(None, ge=1, le=4096, description="Maximum height in pixels"),
+    fit: Optional[str] = Query(None, description="contain (default) or cover"),
+    fmt: Optional[str] = Query(None, description="webp, jpeg or png; negotiated from Accept if omitted"),
+    q: Optional[int] = Query(None, ge=1, le=100, description="Encoding quality"),
+    s: Optional[str] = Query(None, description="Signature for parameters outside the whitelist"),
+):
+    """
+    Serve an image uploaded through /api/uploads/image, resized on demand.
+    Public endpoint.
+    """
+    path = os.path.join(settings.UPLOAD_DIR, "images", filename)
+    if not UPLOADED_IMAGE_PATTERN.match(filename) or not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    if all(param is None for param in (w, h, fit, fmt, q)):
+        return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+    source = f"uploads:{filename}"
+    _check_transform(source, w, h, fit, fmt, q, s)
+
+    async def load() -> bytes:
+        return await asyncio.to_thread(_read_file, path)
+
+    stat = os.stat(path)
+    return await _transformed_response(
+        request, source, f"{source}:{stat.st_mtime_ns}:{stat.st_size}", load,
+        w, h, fit, fmt, q, IMMUTABLE_CACHE_CONTROL,
+    )
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@router.get("/{media_id}")
+async def get_media(
+    media_id: int,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="Display width in pixels"),
+    h: Optional[int] = Query(None, ge=1, le=4096, description="Maximum height in pixels"),
+    fit: Optional[str] = Query(None, description="contain (default) or cover"),
+    fmt: Optional[str] = Query(None, description="webp, jpeg or png; negotiated from Accept if omitted"),
+    q: Optional[int] = Query(None, ge=1, le=100, description="Encoding quality"),
+    s: Optional[str] = Query(None, description="Signature for parameters outside the whitelist"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Serve a gallery item's image in the best format the client accepts.
+    Public endpoint - anyone can view the gallery.
+
+    With only `w` (or nothing), picks WebP when the Accept header allows it
+    and JPEG otherwise, at the narrowest pre-generated rendition at least
+    `w` pixels wide (the largest without `w`). Any of `h`, `fit`, `fmt` or
+    `q` asks for an on-demand transform of the stored image instead, which
+    is cached on disk; sizes and qualities outside the whitelist need a
+    signature from sign_transform. Items without renditions are
+    transformed when `w` is given, and otherwise served from their
+    stored URL.
+    """
+    result = await db.execute(
+        select(GalleryMedia.media_type, GalleryMedia.url, GalleryMedia.renditions).where(GalleryMedia.id == media_id)
+    )
+    media = result.first()
+
+    if not media:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Media not found"
+        )
+
+    headers = {"Cache-Control": MEDIA_CACHE_CONTROL}
+    wants_transform = h is not None or fit is not None or fmt is not None or q is not None
+    if media.renditions and not wants_transform:
+        preferred = "webp" if accepts_webp(request.headers.get("Accept")) else "jpeg"
+        rendition = choose_rendition(media.renditions, preferred, w) or choose_rendition(media.renditions, "jpeg", w)
+        key = key_from_url(rendition["url"]) if rendition else None
+        if key is not None and blob_store.exists(key):
+            return _blob_response(key, request, {**headers, "Vary": "Accept"})
+
+    if media.media_type == "image" and (wants_transform or w is not None):
+        source = f"gallery:{media_id}"
+        _check_transform(source, w, h, fit, fmt, q, s)
+        # Blob keys change with the content; hash legacy inline data instead
+        identity = key_from_url(media.url) or hashlib.sha256(media.url.encode()).hexdigest()
+        return await _transformed_response(
+            request, source, identity, lambda: read_source(media.url),
+            w, h, fit, fmt, q, MEDIA_CACHE_CONTROL,
+        )
+
+    # No usable rendition: fall back to the stored media itself
+    key = key_from_url(media.url)
+    if key is not None and blob_store.exists(key):
+        return _blob_response(key, request, headers)
+    if is_data_url(media.url):
+        media_type, data = parse_data_url(media.url)
+        return Response(content=data, media_type=media_type, headers=headers)
+    if media.url.startswith(("http://", "https://", "/")):
+        return RedirectResponse(media.url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Media not found"
+    )
@@ -12,6 +12,8 @@ from app.core.database import get_db
 from app.models.message import Message, generate_slug
 from app.schemas.message import MessageCreate, MessageUpdate, MessageResponse, MessageListResponse
 from app.dependencies.auth import get_current_admin
+from app.services.title_registry import title_registry
+from app.services.view_counters import view_counters
 
 router = APIRouter()
 
@@ -160,6 +162,7 @@ async def create_message(
     db.add(message)
     await db.commit()
     await db.refresh(message)
+    title_registry.set_title("message", message.id, message.title)
     
     return MessageResponse.model_validate(message)
 
@@ -211,6 +214,7 @@ async def update_message(
     
     await db.commit()
     await db.refresh(message)
+    title_registry.set_title("message", message.id, message.title)
     
     return MessageResponse.model_validate(message)
 
@@ -237,6 +241,8 @@ async def delete_message(
     
     await db.delete(message)
     await db.commit()
+    view_counters.forget("message", message_id)
+    title_registry.forget("message", message_id)
     
     return None
 
@@ -248,17 +254,16 @@ async def increment_view_count(
 ):
     """
     Increment the view count for a message.
+    
+    The increment is written in the next view counter flush; the returned
+    count is this worker's projection.
     """
-    result = await db.execute(select(Message).where(Message.id == message_id))
-    message = result.scalar_one_or_none()
+    view_count = await view_counters.increment("message", message_id, db)
     
-    if not message:
+    if view_count is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Message not found",
         )
     
-    message.view_count = (message.view_count or 0) + 1
-    await db.commit()
-    
-    return {"view_count": message.view_count}
+    return {"view_count": view_count}
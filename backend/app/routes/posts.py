@@ -11,6 +11,8 @@ from app.core.database import get_db
 from app.models.post import Post
 from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse
 from app.dependencies.auth import get_current_admin
+from app.services.title_registry import title_registry
+from app.services.view_counters import view_counters
 
 router = APIRouter()
 
@@ -112,6 +114,7 @@ async def create_post(
     db.add(post)
     await db.commit()
     await db.refresh(post)
+    title_registry.set_title("post", post.id, post.title)
     
     return PostResponse.model_validate(post)
 
@@ -144,6 +147,7 @@ async def update_post(
     
     await db.commit()
     await db.refresh(post)
+    title_registry.set_title("post", post.id, post.title)
     
     return PostResponse.model_validate(post)
 
@@ -170,5 +174,7 @@ async def delete_post(
     
     await db.delete(post)
     await db.commit()
+    view_counters.forget("post", post_id)
+    title_registry.forget("post", post_id)
     
     return None
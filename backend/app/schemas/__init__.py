@@ -2,7 +2,7 @@
 from app.schemas.post import PostCreate, PostUpdate, PostResponse, PostListResponse
 from app.schemas.analytics import AnalyticsTrack, AnalyticsResponse, VisitorResponse, StatsResponse
 from app.schemas.auth import Token, LoginRequest
-from app.schemas.gallery import GalleryMediaCreate, GalleryMediaUpdate, GalleryMediaResponse, GalleryMediaListResponse
+from app.schemas.gallery import GalleryMediaCreate, GalleryMediaUpdate, GalleryMediaResponse, GalleryMediaSummary, GalleryMediaListResponse
 from app.schemas.music import MusicTrackCreate, MusicTrackUpdate, MusicTrackResponse, MusicTrackListResponse
 from app.schemas.message import MessageCreate, MessageUpdate, MessageResponse, MessageListResponse
 
@@ -10,7 +10,7 @@ __all__ = [
     "PostCreate", "PostUpdate", "PostResponse", "PostListResponse",
     "AnalyticsTrack", "AnalyticsResponse", "VisitorResponse", "StatsResponse",
     "Token", "LoginRequest",
-    "GalleryMediaCreate", "GalleryMediaUpdate", "GalleryMediaResponse", "GalleryMediaListResponse",
+    "GalleryMediaCreate", "GalleryMediaUpdate", "GalleryMediaResponse", "GalleryMediaSummary", "GalleryMediaListResponse",
     "MusicTrackCreate", "MusicTrackUpdate", "MusicTrackResponse", "MusicTrackListResponse",
     "MessageCreate", "MessageUpdate", "MessageResponse", "MessageListResponse"
 ]
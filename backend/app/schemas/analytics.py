@@ -16,6 +16,19 @@ class AnalyticsTrack(BaseModel):
     referrer: Optional[str] = Field(None, description="Referrer URL")
 
 
+class TrackResponse(BaseModel):
+    """Schema for the outcome of a /track request."""
+    status: str = "accepted"
+    accepted: int = Field(..., description="Events queued for writing")
+    deduplicated: int = Field(..., description="Events dropped as recent duplicates")
+
+
+class StreamTicketResponse(BaseModel):
+    """Schema for a single-use ticket opening the live stream."""
+    ticket: str
+    expires_in: int = Field(..., description="Seconds until the ticket expires")
+
+
 class AnalyticsResponse(BaseModel):
     """Schema for analytics entry response."""
     id: int
@@ -59,6 +72,9 @@ class PostStats(BaseModel):
     title: str
     view_count: int
     unique_visitors: int
+    unique_visitors_error: Optional[float] = Field(
+        None, description="Relative standard error when unique_visitors is a HyperLogLog estimate"
+    )
 
 
 class GeoStats(BaseModel):
@@ -84,6 +100,9 @@ class PageTypeStats(BaseModel):
     page_type: str
     views: int
     unique_visitors: int
+    unique_visitors_error: Optional[float] = Field(
+        None, description="Relative standard error when unique_visitors is a HyperLogLog estimate"
+    )
 
 
 class DeviceStats(BaseModel):
@@ -92,6 +111,12 @@ class DeviceStats(BaseModel):
     count: int
 
 
+class BotStats(BaseModel):
+    """Crawler hits turned away by the tracking endpoint."""
+    bot: str
+    hits: int
+
+
 class TopResource(BaseModel):
     """Most viewed resource."""
     page_type: str
@@ -99,6 +124,9 @@ class TopResource(BaseModel):
     title: Optional[str]
     views: int
     unique_visitors: int
+    unique_visitors_error: Optional[float] = Field(
+        None, description="Relative standard error when unique_visitors is a HyperLogLog estimate"
+    )
 
 
 class SessionInfo(BaseModel):
@@ -118,6 +146,9 @@ class StatsResponse(BaseModel):
     """Schema for overall analytics statistics."""
     total_views: int
     total_unique_visitors: int
+    total_unique_visitors_error: Optional[float] = Field(
+        None, description="Relative standard error when unique counts are HyperLogLog estimates"
+    )
     total_posts: int
     views_today: int
     views_this_week: int
@@ -129,21 +160,30 @@ class StatsResponse(BaseModel):
     hourly_stats: List[HourlyStats]
     device_stats: List[DeviceStats]
     top_resources: List[TopResource]
+    bot_stats: List[BotStats] = Field(
+        default_factory=list, description="Crawler hits in the period, which are not counted as views"
+    )
 
 
 class VisitorListResponse(BaseModel):
-    """Paginated visitor list."""
+    """Paginated visitor list, by page number or keyset cursor."""
     visitors: List[VisitorResponse]
     total: int
-    page: int
+    total_is_estimate: bool = False
+    page: Optional[int] = Field(None, description="Page number; not set when paging by cursor")
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next (older) page")
+    prev_cursor: Optional[str] = Field(None, description="Cursor for the previous (newer) page")
 
 
 class SessionListResponse(BaseModel):
-    """Paginated session list."""
+    """Paginated session list, by page number or keyset cursor."""
     sessions: List[SessionInfo]
     total: int
-    page: int
+    total_is_estimate: bool = False
+    page: Optional[int] = Field(None, description="Page number; not set when paging by cursor")
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next (less recently active) page")
+    prev_cursor: Optional[str] = Field(None, description="Cursor for the previous (more recently active) page")
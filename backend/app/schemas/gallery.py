@@ -30,12 +30,47 @@ class GalleryMediaUpdate(BaseModel):
     order_index: Optional[int] = None
 
 
+class GalleryRendition(BaseModel):
+    """One responsive size of a gallery image, ready for srcset."""
+    width: int
+    height: int
+    format: str = Field(..., description="'webp' or 'jpeg'")
+    bytes: int = Field(..., description="Encoded size in bytes")
+    url: str
+
+
 class GalleryMediaResponse(GalleryMediaBase):
     """Schema for gallery media response."""
     id: int
     blur_placeholder: Optional[str] = Field(None, description="Tiny blur placeholder for progressive loading")
     width: Optional[int] = Field(None, description="Original image width")
     height: Optional[int] = Field(None, description="Original image height")
+    renditions: Optional[List[GalleryRendition]] = Field(
+        None, description="Responsive image sizes, largest first, WebP before JPEG at each width"
+    )
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class GalleryMediaSummary(BaseModel):
+    """
+    Schema for a gallery list item.
+
+    Leaves out the full-size media unless the list is asked for it with
+    include_full; GET /api/gallery/{id} and GET /api/media/{id} serve it per item.
+    """
+    id: int
+    media_type: str
+    url: Optional[str] = Field(None, description="Full-size media, only with include_full")
+    thumbnail_url: Optional[str] = None
+    blur_placeholder: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    renditions: Optional[List[GalleryRendition]] = None
+    caption: Optional[str] = None
+    order_index: int
     created_at: datetime
     
     class Config:
@@ -44,5 +79,5 @@ class GalleryMediaResponse(GalleryMediaBase):
 
 class GalleryMediaListResponse(BaseModel):
     """Schema for gallery media list response."""
-    media: List[GalleryMediaResponse]
+    media: List[GalleryMediaSummary]
     total: int
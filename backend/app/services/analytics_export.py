@@ -0,0 +1,126 @@
+"""
+Serialization and streaming of raw analytics rows for exports and
+partition archives.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Optional, Sequence
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import Analytics
+
+
+# Exported columns, in file order
+EXPORT_COLUMNS = (
+    "id",
+    "timestamp",
+    "page_type",
+    "resource_id",
+    "post_id",
+    "ip_address",
+    "country",
+    "city",
+    "user_agent",
+    "device",
+    "referrer",
+    "session_id",
+)
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def csv_header() -> str:
+    """CSV header line for EXPORT_COLUMNS."""
+    return format_csv_rows([EXPORT_COLUMNS])
+
+
+def format_csv_rows(rows: Iterable[Sequence]) -> str:
+    """
+    Format rows (tuples in EXPORT_COLUMNS order) as CSV lines.
+
+    NULLs become empty fields and datetimes are written in ISO 8601.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def format_ndjson_rows(rows: Iterable[Sequence]) -> str:
+    """Format rows (tuples in EXPORT_COLUMNS order) as one JSON object per line."""
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_csv_value, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+# Export formats: media type and row formatter
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", format_ndjson_rows),
+    "csv": ("text/csv", format_csv_rows),
+}
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 2000
+
+
+async def stream_export(
+    export_format: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page_type: Optional[str] = None,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Stream analytics rows oldest first as encoded chunks.
+
+    Rows are read through a server-side cursor in its own session, one
+    fetch at a time, so memory use does not depend on the size of the
+    export. With `compress` the output is a gzip stream.
+    """
+    formatter = EXPORT_FORMATS[export_format][1]
+    columns = [getattr(Analytics, name) for name in EXPORT_COLUMNS]
+    query = (
+        select(*columns)
+        .order_by(Analytics.timestamp, Analytics.id)
+        .execution_options(yield_per=EXPORT_FETCH_SIZE)
+    )
+    if start is not None:
+        query = query.where(Analytics.timestamp >= start)
+    if end is not None:
+        query = query.where(Analytics.timestamp < end)
+    if page_type:
+        query = query.where(Analytics.page_type == page_type)
+
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    header = encode(csv_header()) if export_format == "csv" else b""
+    if header:
+        yield header
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            chunk = encode(formatter(rows))
+            if chunk:  # The compressor may still be buffering
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,358 @@
+"""
+Buffered ingestion pipeline for analytics page views.
+
+The tracking endpoint only enqueues events; a single worker task per process
+drains the queue and writes each batch with one multi-row INSERT in its own
+session, so the hot path never touches the database. A failed write is
+retried with backoff before the batch is dropped. Recent duplicates are
+rejected in memory before they are queued.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import Analytics
+from app.services.geolocation import get_geolocation
+from app.services.rollups import add_to_rollups
+from app.services.unique_sketches import add_to_sketches
+from app.services.visitor_sessions import add_to_sessions
+from app.services.view_counters import view_counters
+from app.utils.user_agent import parse_user_agent
+from app.services.view_dedupe import (
+    DEDUPE_WINDOW,
+    RotatingDedupeIndex,
+    dedupe_key,
+    claim_views,
+    purge_claims,
+)
+
+
+# How often expired claims are deleted in database dedupe mode
+DEDUPE_PURGE_INTERVAL = timedelta(minutes=5)
+
+
+@dataclass(slots=True)
+class TrackedView:
+    """A single page view accepted by the tracking endpoint."""
+    page_type: str
+    resource_id: Optional[int]
+    post_id: Optional[int]
+    ip_address: str
+    user_agent: str
+    session_id: Optional[str]
+    referrer: Optional[str]
+    timestamp: datetime = field(default_factory=datetime.utcnow)
+    dedupe_key: Optional[int] = None
+
+
+class IngestBufferFull(Exception):
+    """
+    Raised when the buffer stays full for longer than the enqueue timeout.
+
+    From `submit_many`, `processed` is the index of the first event that was
+    not queued and `queued` the events before it that were.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.processed = 0
+        self.queued: List["TrackedView"] = []
+
+
+# Marks the end of the stream when the buffer is shutting down
+_STOP = object()
+
+
+class AnalyticsIngestBuffer:
+    """
+    Per-process queue of tracked views, flushed in batches.
+
+    A batch is written when it reaches `batch_size` events or when
+    `flush_interval` seconds have passed since its first event, whichever
+    comes first. When the queue is full, `submit` waits up to
+    `enqueue_timeout` seconds for room before raising IngestBufferFull.
+
+    Duplicate views are dropped before they are queued, using this worker's
+    in-memory dedupe index. With `dedupe_mode="database"` the remaining views
+    are also claimed in the shared dedupe table when the batch is written.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float,
+        dedupe_mode: str = "memory",
+        dedupe_max_keys: int = 500_000,
+        flush_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.dedupe_mode = dedupe_mode
+        self.flush_retries = flush_retries
+        self.retry_backoff = retry_backoff
+        self._dedupe_index = RotatingDedupeIndex(DEDUPE_WINDOW, max_keys=dedupe_max_keys)
+        self._last_purge: Optional[datetime] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = True
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.retries = 0
+        self.flushes = 0
+
+    async def start(self) -> None:
+        """Create the queue and start the flush worker."""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting events and wait for everything queued to be written."""
+        if self._task is None:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, event: TrackedView) -> bool:
+        """
+        Enqueue a tracked view unless it is a recent duplicate.
+
+        Returns:
+            True if the view was queued, False if it was a duplicate
+
+        Raises:
+            IngestBufferFull: if no room frees up within the enqueue timeout
+        """
+        if self._closed:
+            raise IngestBufferFull("Analytics ingest buffer is not running")
+
+        if event.session_id:
+            event.dedupe_key = dedupe_key(
+                event.page_type, event.resource_id, event.ip_address, event.session_id
+            )
+            if self._dedupe_index.seen_or_add(event.dedupe_key):
+                self.deduplicated += 1
+                return False
+
+        # The key is held while waiting for room, so a concurrent copy of the
+        # view is still a duplicate, and released if the view is not queued
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(event), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self._release_keys([event])
+                self.rejected += 1
+                raise IngestBufferFull("Analytics ingest buffer is full")
+            except BaseException:
+                self._release_keys([event])
+                raise
+
+        self.accepted += 1
+        return True
+
+    async def submit_many(self, events: List[TrackedView]) -> List[TrackedView]:
+        """
+        Enqueue a batch of tracked views, dropping recent duplicates.
+
+        Returns:
+            The views that were queued, in order
+
+        Raises:
+            IngestBufferFull: if room runs out partway. Views before
+            `processed` were handled and those from it on were not, so the
+            client should resend only events[processed:]; the view that
+            failed was not recorded as seen, so its resend is not dropped.
+        """
+        queued = []
+        for index, event in enumerate(events):
+            try:
+                if await self.submit(event):
+                    queued.append(event)
+            except IngestBufferFull as e:
+                e.processed = index
+                e.queued = queued
+                raise
+        return queued
+
+    def stats(self) -> dict:
+        """Counters describing the buffer since startup."""
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "deduplicated": self.deduplicated,
+            "dedupe_mode": self.dedupe_mode,
+            "dedupe_keys": len(self._dedupe_index),
+            "failed": self.failed,
+            "retries": self.retries,
+            "flushes": self.flushes,
+        }
+
+    async def _run(self) -> None:
+        """Worker loop: collect batches and write them until stopped."""
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect_batch()
+            if batch:
+                await self._write_batch(batch)
+
+    async def _collect_batch(self) -> Tuple[List[TrackedView], bool]:
+        """Wait for the next event, then gather more until a flush trigger fires."""
+        loop = asyncio.get_running_loop()
+
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                event = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            if event is _STOP:
+                return batch, True
+            batch.append(event)
+
+        return batch, False
+
+    async def _write_batch(self, batch: List[TrackedView]) -> None:
+        """
+        Geolocate and persist one batch and everything derived from it in a single transaction.
+
+        A failed transaction is retried `flush_retries` times with doubling
+        backoff, so pool timeouts, deadlocks between workers and other
+        transient errors do not lose views the client was told were accepted.
+        Only then is the batch dropped and counted as failed.
+        """
+        self.flushes += 1
+
+        ips = list({event.ip_address for event in batch})
+        locations = dict(zip(ips, await asyncio.gather(*(get_geolocation(ip) for ip in ips))))
+
+        delay = self.retry_backoff
+        for attempt in range(self.flush_retries + 1):
+            try:
+                fresh = await self._store_batch(batch, locations)
+                break
+            except Exception as e:
+                if attempt == self.flush_retries:
+                    self.failed += len(batch)
+                    # None of the batch was stored, so a resent view must not be dropped
+                    self._release_keys(batch)
+                    print(f"Analytics flush failed, dropped {len(batch)} events: {e}")
+                    return
+                self.retries += 1
+                print(f"Analytics flush failed, retrying {len(batch)} events in {delay:g}s: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        for event in fresh:
+            view_counters.add(event.page_type, event.resource_id)
+        self.written += len(fresh)
+        self.deduplicated += len(batch) - len(fresh)
+
+    async def _store_batch(self, batch: List[TrackedView], locations: dict) -> List[TrackedView]:
+        """Write one attempt at a batch; returns the views stored, or raises with nothing stored."""
+        async with AsyncSessionLocal() as db:
+            try:
+                fresh = batch
+                if self.dedupe_mode == "database":
+                    fresh = await self._claim_views(db, batch)
+                rows = [
+                    {
+                        "page_type": event.page_type,
+                        "resource_id": event.resource_id,
+                        "post_id": event.post_id if event.page_type == "post" else None,
+                        "ip_address": event.ip_address,
+                        "country": locations[event.ip_address]["country"],
+                        "city": locations[event.ip_address]["city"],
+                        "user_agent": event.user_agent,
+                        "device": parse_user_agent(event.user_agent),
+                        "referrer": event.referrer,
+                        "session_id": event.session_id,
+                        "timestamp": event.timestamp,
+                    }
+                    for event in fresh
+                ]
+                if rows:
+                    await db.execute(insert(Analytics), rows)
+                    await add_to_rollups(db, rows)
+                    await add_to_sketches(db, rows)
+                    await add_to_sessions(db, rows)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+        return fresh
+
+    def _release_keys(self, events: List[TrackedView]) -> None:
+        """Forget the dedupe keys of views that were not stored."""
+        for event in events:
+            if event.dedupe_key is not None:
+                self._dedupe_index.discard(event.dedupe_key)
+
+    async def _claim_views(self, db, batch: List[TrackedView]) -> List[TrackedView]:
+        """
+        Keep only views this worker wins in the shared dedupe table.
+
+        Views without a session are never deduplicated.
+        """
+        now = datetime.utcnow()
+        if self._last_purge is None or now - self._last_purge > DEDUPE_PURGE_INTERVAL:
+            await purge_claims(db, now)
+            self._last_purge = now
+
+        claimed = await claim_views(
+            db,
+            [event.dedupe_key for event in batch if event.dedupe_key is not None],
+            now,
+        )
+        fresh = []
+        for event in batch:
+            if event.dedupe_key is not None:
+                if event.dedupe_key not in claimed:
+                    continue
+                claimed.discard(event.dedupe_key)
+            fresh.append(event)
+        return fresh
+
+
+# Global ingest buffer for this worker process
+ingest_buffer = AnalyticsIngestBuffer(
+    max_size=settings.ANALYTICS_BUFFER_MAX_SIZE,
+    batch_size=settings.ANALYTICS_FLUSH_BATCH_SIZE,
+    flush_interval=settings.ANALYTICS_FLUSH_INTERVAL_SECONDS,
+    enqueue_timeout=settings.ANALYTICS_ENQUEUE_TIMEOUT_SECONDS,
+    dedupe_mode=settings.ANALYTICS_DEDUPE_MODE,
+    dedupe_max_keys=settings.ANALYTICS_DEDUPE_MAX_KEYS,
+    flush_retries=settings.ANALYTICS_FLUSH_RETRIES,
+    retry_backoff=settings.ANALYTICS_FLUSH_RETRY_BACKOFF_SECONDS,
+)
@@ -0,0 +1,216 @@
+"""
+Content-addressed blob store for gallery media on local disk.
+
+A blob's key is the SHA-256 of its bytes plus an extension for its media
+type, and it lives at UPLOAD_DIR/blobs/<aa>/<bb>/<key>. Identical content is
+stored once, and a key never changes meaning, so blobs are served by
+app.routes.media with immutable cache headers. Writes go to a temporary
+file that is renamed into place, so a crash never leaves a partial blob.
+
+Blobs are not deleted with gallery rows, since other rows may share them.
+
+Move base64 data URLs already stored in gallery_media into blobs with:
+    python -m app.services.blob_store migrate
+The migration commits row by row and only picks up rows that still hold
+data URLs, so it can be stopped and rerun.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from typing import Optional, Tuple
+
+from sqlalchemy import or_, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.gallery import GalleryMedia
+
+
+# Media types stored as blobs and the extension used in their keys
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/avif": "avif",
+    "video/mp4": "mp4",
+    "video/webm": "webm",
+    "video/ogg": "ogv",
+    "video/quicktime": "mov",
+}
+MEDIA_TYPES = {extension: media_type for media_type, extension in EXTENSIONS.items()}
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]{2,4}$")
+DATA_URL_PATTERN = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(?:;[\w.+-]+=[\w.+-]+)*;base64,", re.I)
+
+# URL prefix blobs are served under (see app.routes.media)
+BLOB_URL_PREFIX = "/api/media/blobs/"
+
+
+class InvalidBlob(ValueError):
+    """Raised for data that cannot be stored as a blob."""
+
+
+def parse_data_url(url: str) -> Tuple[str, bytes]:
+    """
+    Split a base64 data URL into its media type and decoded bytes.
+
+    Raises:
+        InvalidBlob: if `url` is not a base64 data URL
+    """
+    match = DATA_URL_PATTERN.match(url)
+    if match is None:
+        raise InvalidBlob("Not a base64 data URL")
+    try:
+        data = base64.b64decode(url[match.end():], validate=False)
+    except (binascii.Error, ValueError) as e:
+        raise InvalidBlob(f"Invalid base64 data: {e}")
+    return (match.group(1) or "application/octet-stream").lower(), data
+
+
+def is_data_url(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith("data:")
+
+
+def blob_url(key: str) -> str:
+    """Public URL of a stored blob."""
+    return f"{BLOB_URL_PREFIX}{key}"
+
+
+def key_from_url(url: Optional[str]) -> Optional[str]:
+    """Blob key referenced by a URL, or None if it is not a blob URL."""
+    if url and url.startswith(BLOB_URL_PREFIX):
+        key = url[len(BLOB_URL_PREFIX):]
+        if KEY_PATTERN.match(key):
+            return key
+    return None
+
+
+class BlobStore:
+    """Stores and locates blobs under one root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        """
+        Filesystem path for a key.
+
+        Raises:
+            InvalidBlob: if `key` is not a well-formed blob key
+        """
+        if not KEY_PATTERN.match(key):
+            raise InvalidBlob("Invalid blob key")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def media_type(self, key: str) -> str:
+        return MEDIA_TYPES.get(key.rsplit(".", 1)[1], "application/octet-stream")
+
+    def put(self, data: bytes, media_type: str) -> str:
+        """
+        Store bytes and return their key. Storing existing content is a no-op.
+
+        Raises:
+            InvalidBlob: if `media_type` is not one blobs are kept for
+        """
+        extension = EXTENSIONS.get(media_type.lower())
+        if extension is None:
+            raise InvalidBlob(f"Unsupported media type '{media_type}'")
+        key = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        path = self.path(key)
+        if os.path.isfile(path):
+            return key
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return key
+
+    async def put_async(self, data: bytes, media_type: str) -> str:
+        """`put` on a worker thread, for use from request handlers."""
+        return await asyncio.to_thread(self.put, data, media_type)
+
+    async def store_data_url(self, value: Optional[str]) -> Optional[str]:
+        """
+        Move a base64 data URL into the store and return its blob URL.
+
+        Anything that is not a data URL (including None) is returned as-is.
+
+        Raises:
+            InvalidBlob: if the data URL is malformed or of an unsupported type
+        """
+        if not is_data_url(value):
+            return value
+        media_type, data = parse_data_url(value)
+        return blob_url(await self.put_async(data, media_type))
+
+
+# Global blob store
+blob_store = BlobStore(os.path.join(settings.UPLOAD_DIR, "blobs"))
+
+
+# ── Migration ────────────────────────────────────────────────────────
+
+# Columns moved out of the row; blur_placeholder stays inline on purpose
+MIGRATED_COLUMNS = ("url", "thumbnail_url")
+
+
+async def migrate_data_urls() -> None:
+    """Move data URLs in gallery_media into the store, one committed row at a time."""
+    columns = [getattr(GalleryMedia, name) for name in MIGRATED_COLUMNS]
+    pending = or_(*(column.startswith("data:") for column in columns))
+
+    async with AsyncSessionLocal() as db:
+        ids = (await db.execute(
+            select(GalleryMedia.id).where(pending).order_by(GalleryMedia.id)
+        )).scalars().all()
+    print(f"{len(ids)} gallery rows hold data URLs")
+
+    moved = failed = 0
+    for media_id in ids:
+        # One row per session keeps only a single row's payload in memory
+        async with AsyncSessionLocal() as db:
+            media = (await db.execute(
+                select(GalleryMedia).where(GalleryMedia.id == media_id, pending)
+            )).scalar_one_or_none()
+            if media is None:
+                continue  # Migrated or deleted meanwhile
+            try:
+                for name in MIGRATED_COLUMNS:
+                    setattr(media, name, await blob_store.store_data_url(getattr(media, name)))
+            except InvalidBlob as e:
+                failed += 1
+                print(f"Skipping gallery media {media_id}: {e}")
+                continue
+            await db.commit()
+        moved += 1
+        if moved % 50 == 0:
+            print(f"Moved {moved}/{len(ids)}")
+
+    print(f"Moved {moved} rows into blobs, {failed} skipped")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["migrate"]:
+        print("Usage: python -m app.services.blob_store migrate")
+        sys.exit(1)
+    asyncio.run(migrate_data_urls())
@@ -0,0 +1,86 @@
+"""
+Write-behind daily counters for crawler hits on the tracking endpoint.
+
+Bot traffic is recognised from the user agent before anything else happens
+in track_view, so it costs no geolocation lookup, dedupe check or row
+insert. Depending on ANALYTICS_BOT_MODE the hits are dropped ("drop") or
+counted per (day, bot) in memory and added to bot_hits every
+BOT_HITS_FLUSH_INTERVAL_SECONDS ("count").
+"""
+
+from collections import Counter
+from datetime import date, datetime
+from typing import Tuple
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import BotHit
+from app.services.periodic import PeriodicTask
+
+
+BotKey = Tuple[date, str]
+
+
+class BotHitCounter(PeriodicTask):
+    """Per-worker pending bot hit counts, flushed every `interval` seconds."""
+
+    run_on_stop = True
+
+    def __init__(self, interval: float, mode: str = "count"):
+        super().__init__(interval)
+        self.mode = mode
+        self._pending: Counter = Counter()
+        self.seen = 0
+        self.flushed = 0
+
+    def add(self, bot: str, hits: int = 1) -> None:
+        """Record hits from a crawler; only counted in "count" mode."""
+        self.seen += hits
+        if self.mode == "count":
+            self._pending[(datetime.utcnow().date(), bot)] += hits
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "seen": self.seen,
+            "pending_hits": sum(self._pending.values()),
+            "flushed_hits": self.flushed,
+        }
+
+    async def run_once(self) -> None:
+        """Add all pending hits to bot_hits in one upsert."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, Counter()
+        committed = False
+        try:
+            async with AsyncSessionLocal() as db:
+                stmt = pg_insert(BotHit).values([
+                    {"day": day, "bot": bot, "hits": hits}
+                    # Stable order keeps concurrent upserts from deadlocking
+                    for (day, bot), hits in sorted(pending.items())
+                ])
+                await db.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[BotHit.day, BotHit.bot],
+                        set_={"hits": BotHit.hits + stmt.excluded.hits},
+                    )
+                )
+                await db.commit()
+                committed = True
+        finally:
+            if not committed:
+                # Put the hits back so the next flush retries them
+                self._pending.update(pending)
+
+        self.flushed += sum(pending.values())
+
+
+# Global bot hit counter for this worker process
+bot_hits = BotHitCounter(
+    interval=settings.BOT_HITS_FLUSH_INTERVAL_SECONDS,
+    mode=settings.ANALYTICS_BOT_MODE,
+)
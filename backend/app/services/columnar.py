@@ -0,0 +1,317 @@
+"""
+Optional in-memory columnar copy of recent analytics for dashboard breakdowns.
+
+When ANALYTICS_COLUMNAR_ENABLED is set and NumPy is installed, each worker
+keeps the last ANALYTICS_COLUMNAR_WINDOW_DAYS of views as NumPy arrays:
+timestamps as int64 seconds and page_type, resource_id, country and device
+dictionary-encoded into small ints. New rows are tailed by id every
+ANALYTICS_COLUMNAR_REFRESH_SECONDS, and the whole window is rebuilt every
+ANALYTICS_COLUMNAR_REBUILD_SECONDS to pick up rows whose ids committed out
+of order and rows deleted with their post.
+
+Breakdowns are answered with bincount over the arrays instead of SQL.
+Compare the two paths with:
+    python -m benchmarks.columnar
+"""
+
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import Analytics
+from app.services.periodic import PeriodicTask
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency; the engine stays disabled without it
+    np = None
+
+
+EPOCH = datetime(1970, 1, 1)
+
+# Rows per query while tailing and rebuilding
+FETCH_SIZE = 50000
+
+
+class Dictionary:
+    """Maps values to dense small-int codes, in first-seen order."""
+
+    def __init__(self):
+        self.values: List = []
+        self._codes: Dict = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def code(self, value) -> Optional[int]:
+        """Code of a value, or None if it was never encoded."""
+        return self._codes.get(value)
+
+    def encode(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnStore:
+    """
+    Growable NumPy columns for one snapshot of the window.
+
+    page_type, country and device apply the same sentinels as the hourly
+    rollups so both paths report identical breakdowns.
+    """
+
+    COLUMNS = ("ids", "timestamps", "page_types", "resources", "countries", "devices")
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.last_id = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.page_types = np.empty(capacity, dtype=np.int16)
+        self.resources = np.empty(capacity, dtype=np.int32)
+        self.countries = np.empty(capacity, dtype=np.int32)
+        self.devices = np.empty(capacity, dtype=np.int32)
+        self.page_type_dict = Dictionary()
+        self.resource_dict = Dictionary()
+        self.country_dict = Dictionary()
+        self.device_dict = Dictionary()
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, rows: Sequence) -> None:
+        """Append (id, timestamp, page_type, resource_id, country, device) rows."""
+        if not rows:
+            return
+        count = len(rows)
+        self._reserve(count)
+        end = self.size + count
+        ids, timestamps, page_types, resources, countries, devices = zip(*rows)
+
+        self.ids[self.size:end] = ids
+        # Much faster than converting through datetime64 for naive datetimes
+        self.timestamps[self.size:end] = np.fromiter(
+            ((timestamp - EPOCH).total_seconds() for timestamp in timestamps),
+            dtype=np.float64,
+            count=count,
+        )
+        self.page_types[self.size:end] = [self.page_type_dict.encode(value or "post") for value in page_types]
+        self.resources[self.size:end] = [self.resource_dict.encode(value or 0) for value in resources]
+        self.countries[self.size:end] = [self.country_dict.encode(value or "Unknown") for value in countries]
+        self.devices[self.size:end] = [self.device_dict.encode(value or "Unknown") for value in devices]
+
+        self.size = end
+        self.last_id = max(self.last_id, int(self.ids[:end].max()))
+
+    def expire(self, cutoff: int) -> None:
+        """Drop rows with timestamps before `cutoff` (epoch seconds)."""
+        keep = self.timestamps[:self.size] >= cutoff
+        kept = int(keep.sum())
+        if kept == self.size:
+            return
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[:kept] = column[:self.size][keep]
+        self.size = kept
+
+    def since(self, cutoff: int):
+        """Boolean mask of rows at or after `cutoff` (epoch seconds)."""
+        return self.timestamps[:self.size] >= cutoff
+
+
+def _epoch_seconds(moment: datetime) -> int:
+    return int((moment - EPOCH).total_seconds())
+
+
+def _ranked(counts, labels: Sequence, limit: Optional[int]) -> List[Tuple[object, int]]:
+    """Nonzero (label, count) pairs by descending count."""
+    order = np.argsort(counts, kind="stable")[::-1]
+    if limit is not None:
+        order = order[:limit]
+    return [(labels[code], int(counts[code])) for code in order if counts[code]]
+
+
+class ColumnarAnalytics(PeriodicTask):
+    """
+    Per-worker columnar window over the analytics table.
+
+    Queries are synchronous and only read the current store; refreshes build
+    on the side or append, so readers never see a partial rebuild.
+    """
+
+    def __init__(self, window_days: int, interval: float, rebuild_interval: float):
+        super().__init__(interval)
+        self.window_days = window_days
+        self.rebuild_interval = rebuild_interval
+        self._store: Optional["ColumnStore"] = None
+        self._built_at: Optional[float] = None
+        self.rebuilds = 0
+        self.tailed_rows = 0
+
+    @property
+    def available(self) -> bool:
+        return np is not None
+
+    def window_start(self, now: Optional[datetime] = None) -> datetime:
+        """Start of the retained window: midnight `window_days` days ago."""
+        today = (now or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=self.window_days)
+
+    def covers(self, since: datetime) -> bool:
+        """Whether breakdowns from `since` onwards can be served from memory."""
+        return self._store is not None and since >= self.window_start()
+
+    def stats(self) -> dict:
+        store = self._store
+        return {
+            "available": self.available,
+            "ready": store is not None,
+            "rows": store.size if store is not None else 0,
+            "last_id": store.last_id if store is not None else 0,
+            "rebuilds": self.rebuilds,
+            "tailed_rows": self.tailed_rows,
+        }
+
+    # ── Refresh ────────────────────────────────────────────────────
+
+    def _query(self):
+        return select(
+            Analytics.id,
+            Analytics.timestamp,
+            Analytics.page_type,
+            Analytics.resource_id,
+            Analytics.country,
+            Analytics.device,
+        )
+
+    async def rebuild(self) -> None:
+        """Load the whole window into a new store and swap it in."""
+        store = ColumnStore()
+        query = (
+            self._query()
+            .where(Analytics.timestamp >= self.window_start())
+            .execution_options(yield_per=FETCH_SIZE)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                store.append(rows)
+        self._store = store
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+
+    async def tail(self) -> None:
+        """Append rows with ids past the last one loaded and expire old ones."""
+        store = self._store
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    self._query()
+                    .where(Analytics.id > store.last_id)
+                    .order_by(Analytics.id)
+                    .limit(FETCH_SIZE)
+                )
+                rows = result.all()
+                if store is not self._store:
+                    return  # Rebuilt meanwhile
+                store.append(rows)
+                self.tailed_rows += len(rows)
+                if len(rows) < FETCH_SIZE:
+                    break
+        store.expire(_epoch_seconds(self.window_start()))
+
+    async def run_once(self) -> None:
+        if self._store is None or time.monotonic() - self._built_at >= self.rebuild_interval:
+            await self.rebuild()
+        else:
+            await self.tail()
+
+    async def _loop(self) -> None:
+        # Build right away instead of waiting for the first interval
+        try:
+            await self.rebuild()
+        except Exception as e:
+            print(f"{type(self).__name__} failed: {e}")
+        await super()._loop()
+
+    # ── Breakdowns ─────────────────────────────────────────────────
+
+    def daily_views(self, since: datetime) -> List[Tuple[date, int]]:
+        store = self._store
+        days = store.timestamps[:store.size][store.since(_epoch_seconds(since))] // 86400
+        if not len(days):
+            return []
+        first = int(days.min())
+        counts = np.bincount(days - first)
+        return [
+            ((EPOCH + timedelta(days=first + offset)).date(), int(views))
+            for offset, views in enumerate(counts)
+            if views
+        ]
+
+    def hourly_views(self, since: datetime) -> List[Tuple[int, int]]:
+        store = self._store
+        hours = store.timestamps[:store.size][store.since(_epoch_seconds(since))] // 3600 % 24
+        counts = np.bincount(hours, minlength=24)
+        return [(hour, int(views)) for hour, views in enumerate(counts) if views]
+
+    def page_type_views(self, since: datetime) -> List[Tuple[str, int]]:
+        store = self._store
+        codes = store.page_types[:store.size][store.since(_epoch_seconds(since))]
+        counts = np.bincount(codes, minlength=len(store.page_type_dict))
+        return _ranked(counts, store.page_type_dict.values, None)
+
+    def device_views(self, since: datetime, limit: int) -> List[Tuple[str, int]]:
+        store = self._store
+        codes = store.devices[:store.size][store.since(_epoch_seconds(since))]
+        counts = np.bincount(codes, minlength=len(store.device_dict))
+        return _ranked(counts, store.device_dict.values, limit)
+
+    def country_views(self, since: datetime, limit: int) -> List[Tuple[str, int]]:
+        store = self._store
+        codes = store.countries[:store.size][store.since(_epoch_seconds(since))]
+        counts = np.bincount(codes, minlength=len(store.country_dict))
+        return _ranked(counts, store.country_dict.values, limit)
+
+    def top_resources(self, since: datetime, limit: int) -> List[Tuple[str, int, int]]:
+        """(page_type, resource_id, views) for the most viewed resources, excluding id 0."""
+        store = self._store
+        mask = store.since(_epoch_seconds(since))
+        resource_count = len(store.resource_dict)
+        keys = store.page_types[:store.size][mask].astype(np.int64) * resource_count + store.resources[:store.size][mask]
+        counts = np.bincount(keys, minlength=len(store.page_type_dict) * resource_count)
+
+        no_resource = store.resource_dict.code(0)
+        if no_resource is not None:
+            counts[no_resource::resource_count] = 0
+
+        ranked = []
+        for key, views in _ranked(counts, range(len(counts)), limit):
+            page_code, resource_code = divmod(key, resource_count)
+            ranked.append((store.page_type_dict.values[page_code], store.resource_dict.values[resource_code], views))
+        return ranked
+
+
+# Global columnar engine for this worker process (started only when enabled)
+columnar_analytics = ColumnarAnalytics(
+    window_days=settings.ANALYTICS_COLUMNAR_WINDOW_DAYS,
+    interval=settings.ANALYTICS_COLUMNAR_REFRESH_SECONDS,
+    rebuild_interval=settings.ANALYTICS_COLUMNAR_REBUILD_SECONDS,
+)
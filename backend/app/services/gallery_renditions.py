@@ -0,0 +1,147 @@
+"""
+Responsive renditions of gallery images.
+
+Every gallery image gets WebP and JPEG encodings at the widths in
+app.utils.image_processing.RENDITION_WIDTHS, stored as blobs. The row keeps
+a list of {width, height, format, bytes, url} dicts, which the gallery
+response exposes for srcset and GET /api/media/{id} uses to pick a size
+and format for the client.
+
+Generate renditions for images created before they existed with:
+    python -m app.services.gallery_renditions backfill
+Those rows only kept the optimized image (at most 1920x1080), so their
+renditions are made from it. The backfill commits row by row and skips
+rows that already have renditions, so it can be stopped and rerun.
+"""
+
+import asyncio
+import os
+import sys
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.gallery import GalleryMedia
+from app.services.blob_store import InvalidBlob, blob_store, blob_url, is_data_url, key_from_url, parse_data_url
+from app.services.image_workers import run_image_job
+from app.utils.image_processing import Rendition, process_image
+
+
+# Rendition format names and the media types their blobs are stored as
+FORMAT_MEDIA_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+async def store_renditions(renditions: List[Rendition]) -> List[dict]:
+    """Write renditions to the blob store and describe them for the row."""
+    stored = []
+    for rendition in renditions:
+        key = await blob_store.put_async(rendition.data, FORMAT_MEDIA_TYPES[rendition.format])
+        stored.append({
+            "width": rendition.width,
+            "height": rendition.height,
+            "format": rendition.format,
+            "bytes": len(rendition.data),
+            "url": blob_url(key),
+        })
+    return stored
+
+
+def accepts_webp(accept: Optional[str]) -> bool:
+    """Whether an Accept header lists image/webp (or image/*) with a nonzero q."""
+    for part in (accept or "").split(","):
+        media_range, _, params = part.strip().partition(";")
+        if media_range.strip().lower() not in ("image/webp", "image/*"):
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            return True
+    return False
+
+
+def choose_rendition(renditions: List[dict], fmt: str, width: Optional[int] = None) -> Optional[dict]:
+    """
+    The rendition to serve in format `fmt`.
+
+    The narrowest one at least `width` wide, or the widest when none is
+    (or no width is asked for). None when there is no rendition in `fmt`.
+    """
+    candidates = sorted(
+        (rendition for rendition in renditions if rendition["format"] == fmt),
+        key=lambda rendition: rendition["width"],
+    )
+    if not candidates:
+        return None
+    if width is not None:
+        for rendition in candidates:
+            if rendition["width"] >= width:
+                return rendition
+    return candidates[-1]
+
+
+async def read_source(url: Optional[str]) -> Optional[bytes]:
+    """Bytes of a stored image from its blob or data URL; None for anything else."""
+    key = key_from_url(url)
+    if key is not None:
+        path = blob_store.path(key)
+        if not os.path.isfile(path):
+            return None
+        return await asyncio.to_thread(_read_file, path)
+    if is_data_url(url):
+        return parse_data_url(url)[1]
+    return None
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# ── Backfill ─────────────────────────────────────────────────────────
+
+async def backfill_renditions() -> None:
+    """Generate renditions for images that have none, one committed row at a time."""
+    pending = (GalleryMedia.media_type == "image") & GalleryMedia.renditions.is_(None)
+
+    async with AsyncSessionLocal() as db:
+        ids = (await db.execute(
+            select(GalleryMedia.id).where(pending).order_by(GalleryMedia.id)
+        )).scalars().all()
+    print(f"{len(ids)} gallery images without renditions")
+
+    done = skipped = 0
+    for media_id in ids:
+        async with AsyncSessionLocal() as db:
+            media = (await db.execute(
+                select(GalleryMedia).where(GalleryMedia.id == media_id, pending)
+            )).scalar_one_or_none()
+            if media is None:
+                continue
+            try:
+                source = await read_source(media.url)
+                if source is None:
+                    raise InvalidBlob("image is not stored locally")
+                derivatives = await run_image_job(process_image, source)
+            except Exception as e:
+                skipped += 1
+                print(f"Skipping gallery media {media_id}: {e}")
+                continue
+            media.renditions = await store_renditions(derivatives.renditions)
+            await db.commit()
+        done += 1
+
+    print(f"Generated renditions for {done} images, {skipped} skipped")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m app.services.gallery_renditions backfill")
+        sys.exit(1)
+    asyncio.run(backfill_renditions())
@@ -0,0 +1,211 @@
+"""
+Offline IP geolocation backed by a memory-mapped range index.
+
+A CSV range database is compiled once into a compact binary file:
+
+    header     magic, IPv4 range count, IPv6 range count, location count
+    IPv4       sorted 4-byte big-endian range starts, range ends, location ids
+    IPv6       sorted 16-byte big-endian range starts, range ends, location ids
+    locations  offsets into a UTF-8 blob of "country\\x1fcity" strings
+
+Big-endian keys compare byte-wise in the same order as the addresses, so a
+lookup is a binary search over slices of the mapped file. The file is opened
+read-only with mmap, so every worker process shares the same page cache copy.
+
+Usage:
+    python -m app.services.geoip_index build ranges.csv ranges.csv.idx
+"""
+
+import csv
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"LTLGEO01"
+HEADER = struct.Struct("<8sIII")
+LOCATION_ID = struct.Struct("<I")
+SEPARATOR = "\x1f"
+
+IPV4_MAPPED = ipaddress.ip_network("::ffff:0:0/96")
+
+
+def _parse_address(value: str) -> Tuple[int, int]:
+    """
+    Parse a CSV range bound, given either as an address or as an integer.
+
+    Returns:
+        Tuple of (version, integer value). IPv4-mapped IPv6 values are
+        reported as IPv4 so both CSV flavours land in the same table.
+    """
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        if number <= 0xFFFFFFFF:
+            return 4, number
+        address = ipaddress.IPv6Address(number)
+    else:
+        address = ipaddress.ip_address(value)
+
+    if address.version == 6 and address in IPV4_MAPPED:
+        return 4, int(address) & 0xFFFFFFFF
+    return address.version, int(address)
+
+
+def build_index(csv_path: str, index_path: str) -> int:
+    """
+    Compile a range CSV into a binary index file.
+
+    The CSV needs at least four columns: range start, range end, country and
+    city. Extra columns are ignored and a header row is skipped.
+
+    Returns:
+        Number of ranges written
+    """
+    ranges: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+    locations: Dict[str, int] = {}
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 4:
+                continue
+            try:
+                start_version, start = _parse_address(row[0])
+                end_version, end = _parse_address(row[1])
+            except ValueError:
+                continue  # Header row or malformed line
+            if start_version != end_version or end < start:
+                continue
+
+            country = row[2].strip() or "Unknown"
+            city = row[3].strip() or "Unknown"
+            location = locations.setdefault(f"{country}{SEPARATOR}{city}", len(locations))
+            ranges[start_version].append((start, end, location))
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, len(ranges[4]), len(ranges[6]), len(locations)))
+
+        for version, width in ((4, 4), (6, 16)):
+            rows = sorted(ranges[version])
+            out.write(b"".join(start.to_bytes(width, "big") for start, _, _ in rows))
+            out.write(b"".join(end.to_bytes(width, "big") for _, end, _ in rows))
+            out.write(b"".join(LOCATION_ID.pack(location) for _, _, location in rows))
+
+        blob = bytearray()
+        offsets = []
+        for name in locations:  # Dicts keep insertion order, i.e. location id order
+            offsets.append(len(blob))
+            blob += name.encode("utf-8")
+        offsets.append(len(blob))
+        out.write(b"".join(LOCATION_ID.pack(offset) for offset in offsets))
+        out.write(bytes(blob))
+
+    # Atomic swap so workers never map a half-written file
+    os.replace(tmp_path, index_path)
+    return len(ranges[4]) + len(ranges[6])
+
+
+class GeoIPIndex:
+    """Read-only view of a compiled index file."""
+
+    def __init__(self, index_path: str):
+        with open(index_path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, n4, n6, n_locations = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{index_path} is not a geolocation index")
+
+        offset = HEADER.size
+        self._tables = {}
+        for version, width, count in ((4, 4, n4), (6, 16, n6)):
+            starts = offset
+            ends = starts + count * width
+            location_ids = ends + count * width
+            self._tables[version] = (starts, ends, location_ids, count, width)
+            offset = location_ids + count * LOCATION_ID.size
+
+        self._location_offsets = offset
+        self._strings = offset + (n_locations + 1) * LOCATION_ID.size
+        self._locations: Dict[int, Tuple[str, str]] = {}
+        self.size = n4 + n6
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def lookup(self, ip_address: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the (country, city) for an address.
+
+        Returns:
+            Tuple of (country, city), or None if the address is invalid or
+            not covered by any range
+        """
+        try:
+            address = ipaddress.ip_address(ip_address)
+        except ValueError:
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+
+        starts, ends, location_ids, count, width = self._tables[address.version]
+        key = address.packed
+        mm = self._mm
+
+        # Rightmost range whose start is <= key
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            position = starts + mid * width
+            if mm[position:position + width] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        index = lo - 1
+        position = ends + index * width
+        if mm[position:position + width] < key:
+            return None
+
+        (location_id,) = LOCATION_ID.unpack_from(mm, location_ids + index * LOCATION_ID.size)
+        return self._location(location_id)
+
+    def _location(self, location_id: int) -> Tuple[str, str]:
+        """Decode a location string, memoizing the handful of distinct values."""
+        location = self._locations.get(location_id)
+        if location is None:
+            start, end = struct.unpack_from(
+                "<II", self._mm, self._location_offsets + location_id * LOCATION_ID.size
+            )
+            country, city = self._mm[self._strings + start:self._strings + end].decode("utf-8").split(SEPARATOR)
+            location = self._locations[location_id] = (country, city)
+        return location
+
+
+def open_index(database_path: str) -> GeoIPIndex:
+    """
+    Open a geolocation database.
+
+    A CSV path is compiled to a sibling `.idx` file first, unless that file
+    already exists and is newer than the CSV.
+    """
+    if database_path.lower().endswith(".csv"):
+        index_path = f"{database_path}.idx"
+        if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(database_path):
+            build_index(database_path, index_path)
+        database_path = index_path
+    return GeoIPIndex(database_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "build":
+        print("Usage: python -m app.services.geoip_index build <ranges.csv> <output.idx>")
+        sys.exit(1)
+    count = build_index(sys.argv[2], sys.argv[3])
+    print(f"Wrote {count} ranges to {sys.argv[3]}")
@@ -0,0 +1,161 @@
+"""
+IP geolocation lookups used by the analytics ingest pipeline.
+
+Addresses are resolved from the local range index when GEOIP_DATABASE_PATH is
+configured; GEOIP_API_URL is only called for addresses the index does not
+cover, and can be left empty to disable the HTTP fallback entirely. HTTP
+results are kept in a bounded LRU cache, and concurrent lookups of the same
+address share one request over an app-lifetime keep-alive client.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.services.geoip_index import GeoIPIndex, open_index
+from app.utils.singleflight import SingleFlight
+
+
+UNKNOWN_LOCATION = {"country": "Unknown", "city": "Unknown"}
+
+
+class GeolocationCache:
+    """
+    Bounded LRU cache of IP -> location with per-entry expiry.
+
+    Failed lookups ("Unknown") are cached too, but for `negative_ttl` seconds
+    so that a transient API error does not stick for a whole day.
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, ip_address: str) -> Optional[dict]:
+        """Return the cached location, or None if missing or expired."""
+        entry = self._entries.get(ip_address)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[ip_address]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(ip_address)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, ip_address: str, location: dict) -> None:
+        """Store a location, evicting the least recently used entry when full."""
+        ttl = self.negative_ttl if location["country"] == "Unknown" else self.ttl
+        self._entries[ip_address] = (time.monotonic() + ttl, location)
+        self._entries.move_to_end(ip_address)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Per-worker state, set up by start_geolocation()
+geoip_index: Optional[GeoIPIndex] = None
+http_client: Optional[httpx.AsyncClient] = None
+geolocation_cache = GeolocationCache(
+    max_size=settings.GEOIP_CACHE_SIZE,
+    ttl=settings.GEOIP_CACHE_TTL_SECONDS,
+    negative_ttl=settings.GEOIP_NEGATIVE_CACHE_TTL_SECONDS,
+)
+_inflight = SingleFlight()
+
+
+async def start_geolocation() -> None:
+    """Open the local geolocation database and the fallback HTTP client."""
+    global geoip_index, http_client
+    if settings.GEOIP_DATABASE_PATH:
+        try:
+            geoip_index = await asyncio.to_thread(open_index, settings.GEOIP_DATABASE_PATH)
+        except Exception as e:
+            print(f"Could not load geolocation database {settings.GEOIP_DATABASE_PATH}: {e}")
+    if settings.GEOIP_API_URL:
+        http_client = httpx.AsyncClient(
+            timeout=5.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+
+
+async def stop_geolocation() -> None:
+    """Release the local geolocation database and close the HTTP client."""
+    global geoip_index, http_client
+    if geoip_index is not None:
+        geoip_index.close()
+        geoip_index = None
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+
+def geolocation_stats() -> dict:
+    """Cache counters plus the number of API requests currently in flight."""
+    return {
+        "local_database_ranges": geoip_index.size if geoip_index is not None else 0,
+        "cache": geolocation_cache.stats(),
+        "in_flight": len(_inflight),
+        "coalesced": _inflight.coalesced,
+    }
+
+
+async def _fetch_geolocation(ip_address: str) -> dict:
+    """Query the geolocation API and cache the result."""
+    location = UNKNOWN_LOCATION
+    try:
+        response = await http_client.get(f"{settings.GEOIP_API_URL}/{ip_address}")
+        if response.status_code == 200:
+            data = response.json()
+            if data.get("status") == "success":
+                location = {
+                    "country": data.get("country", "Unknown"),
+                    "city": data.get("city", "Unknown"),
+                }
+    except Exception:
+        pass
+
+    geolocation_cache.set(ip_address, location)
+    return location
+
+
+async def get_geolocation(ip_address: str) -> dict:
+    """
+    Get geolocation data for an IP address.
+    """
+    if ip_address in ["127.0.0.1", "localhost", "::1"] or ip_address.startswith("192.168.") or ip_address.startswith("10."):
+        return {"country": "Local", "city": "Development"}
+
+    if geoip_index is not None:
+        location = geoip_index.lookup(ip_address)
+        if location:
+            return {"country": location[0], "city": location[1]}
+
+    if http_client is None:
+        return UNKNOWN_LOCATION
+
+    cached = geolocation_cache.get(ip_address)
+    if cached is not None:
+        return cached
+
+    return await _inflight.do(ip_address, _fetch_geolocation, ip_address)
@@ -0,0 +1,86 @@
+"""
+Process pool for CPU-bound image work, owned by the app lifespan.
+
+Decoding and re-encoding a large upload takes long enough to stall every
+other request on the worker, and Pillow holds the GIL for much of it, so
+threads do not help. Jobs run in a small ProcessPoolExecutor instead, with
+at most IMAGE_WORKER_MAX_PENDING jobs queued or running per app worker;
+beyond that callers get ImageWorkersBusy rather than an unbounded backlog.
+
+Outside the app (CLI scripts, the blob migration) no pool is started and
+jobs run on a thread.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from app.core.config import settings
+
+
+T = TypeVar("T")
+
+
+class ImageWorkersBusy(Exception):
+    """Raised when the pending job limit is reached."""
+
+
+# Per-worker state, set up by start_image_workers()
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_completed = 0
+_rejected = 0
+
+
+async def start_image_workers() -> None:
+    """Start the process pool."""
+    global _executor
+    _executor = ProcessPoolExecutor(
+        max_workers=settings.IMAGE_WORKERS,
+        # Forking a process that runs an event loop and a connection pool is unsafe
+        mp_context=multiprocessing.get_context("spawn"),
+        # Recycle children so Pillow's allocations do not accumulate
+        max_tasks_per_child=settings.IMAGE_WORKER_MAX_TASKS,
+    )
+
+
+async def stop_image_workers() -> None:
+    """Wait for running jobs and shut the pool down."""
+    global _executor
+    if _executor is not None:
+        await asyncio.to_thread(_executor.shutdown, wait=True, cancel_futures=True)
+        _executor = None
+
+
+async def run_image_job(func: Callable[..., T], *args) -> T:
+    """
+    Run a picklable function on the image pool and await its result.
+
+    Raises:
+        ImageWorkersBusy: if IMAGE_WORKER_MAX_PENDING jobs are already pending
+    """
+    global _pending, _completed, _rejected
+    if _executor is None:
+        return await asyncio.to_thread(func, *args)
+
+    if _pending >= settings.IMAGE_WORKER_MAX_PENDING:
+        _rejected += 1
+        raise ImageWorkersBusy("Image processing is busy, try again later")
+    _pending += 1
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        _pending -= 1
+    _completed += 1
+    return result
+
+
+def image_worker_stats() -> dict:
+    return {
+        "running": _executor is not None,
+        "workers": settings.IMAGE_WORKERS,
+        "pending": _pending,
+        "completed": _completed,
+        "rejected": _rejected,
+    }
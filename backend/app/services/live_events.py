@@ -0,0 +1,118 @@
+"""
+In-process pub/sub feeding the live visitor stream.
+
+The tracking route publishes every accepted view; each SSE client holds a
+subscription. Publishing never blocks: a subscriber that falls behind
+loses its oldest events, and aggregate subscribers only keep counters.
+Subscribers only see views tracked by the worker process they are
+connected to.
+"""
+
+import asyncio
+from collections import Counter, deque
+from typing import List, Set, Tuple
+
+from app.core.config import settings
+
+
+class TooManySubscribers(Exception):
+    """Raised when the subscriber limit is reached."""
+
+
+class Subscription:
+    """
+    One client's view of the stream.
+
+    In event mode it buffers up to `max_size` events, dropping the oldest
+    when full. In aggregate mode it counts views by page type and device.
+    """
+
+    def __init__(self, max_size: int, aggregate: bool = False):
+        self.aggregate = aggregate
+        self.events: deque = deque(maxlen=max_size)
+        self.views = 0
+        self.page_types: Counter = Counter()
+        self.devices: Counter = Counter()
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def push(self, event: dict) -> None:
+        if self.aggregate:
+            self.views += 1
+            self.page_types[event["page_type"]] += 1
+            self.devices[event["device"]] += 1
+        else:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+        self._ready.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait until something was pushed; False if `timeout` passed first."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def drain_events(self) -> Tuple[List[dict], int]:
+        """Buffered events and the number dropped since the last drain."""
+        events = list(self.events)
+        self.events.clear()
+        dropped, self.dropped = self.dropped, 0
+        self._ready.clear()
+        return events, dropped
+
+    def drain_aggregate(self) -> dict:
+        """Counts since the last drain."""
+        aggregate = {
+            "views": self.views,
+            "page_types": dict(self.page_types),
+            "devices": dict(self.devices),
+        }
+        self.views = 0
+        self.page_types = Counter()
+        self.devices = Counter()
+        self._ready.clear()
+        return aggregate
+
+
+class LiveEventHub:
+    """Fans published events out to every current subscription."""
+
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscriptions: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self, aggregate: bool = False) -> Subscription:
+        if len(self._subscriptions) >= self.max_subscribers:
+            raise TooManySubscribers()
+        subscription = Subscription(self.queue_size, aggregate=aggregate)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def publish(self, event: dict) -> None:
+        """Deliver an event to every subscriber without waiting."""
+        if not self._subscriptions:
+            return
+        self.published += 1
+        for subscription in self._subscriptions:
+            subscription.push(event)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+        }
+
+
+# Global live event hub for this worker process
+live_events = LiveEventHub(
+    queue_size=settings.LIVE_SUBSCRIBER_QUEUE_SIZE,
+    max_subscribers=settings.LIVE_MAX_SUBSCRIBERS,
+)
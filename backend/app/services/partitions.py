@@ -0,0 +1,216 @@
+"""
+Monthly range partitions of the analytics table.
+
+analytics is partitioned on timestamp, one partition per calendar month
+named analytics_YYYY_MM. Maintenance keeps ANALYTICS_PARTITIONS_AHEAD
+future months created, and when ANALYTICS_RETENTION_MONTHS is set it
+detaches older months, archives each one to
+ANALYTICS_ARCHIVE_DIR/analytics_YYYY_MM.csv.gz and drops it. Rollups,
+sketches and session summaries are unaffected by retention.
+
+Partitions detached here are marked with a table comment, and only marked
+tables are archived and dropped; monthly tables detached or restored by hand
+are left alone.
+
+Every worker runs maintenance at startup and then periodically; a Postgres
+advisory lock makes concurrent runs skip instead of racing. It can also be
+run by hand with:
+    python -m app.services.partitions maintain
+"""
+
+import asyncio
+import gzip
+import os
+import re
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.analytics_export import EXPORT_COLUMNS, csv_header, format_csv_rows
+from app.services.periodic import PeriodicTask
+
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+MAINTENANCE_LOCK_KEY = 0x4C544C50  # "LTLP"
+
+PARTITION_NAME_PATTERN = re.compile(r"^analytics_(\d{4})_(\d{2})$")
+
+# Rows fetched per round trip while archiving
+ARCHIVE_FETCH_SIZE = 5000
+
+# Table comment marking a partition detached by retention, due for archiving
+RETENTION_MARKER = "detached for retention by app.services.partitions"
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of the month containing `moment`."""
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift a month start by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"analytics_{month:%Y_%m}"
+
+
+def create_partition_sql(month: datetime) -> str:
+    """DDL creating the partition for the month starting at `month`, if missing."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF analytics "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    )
+
+
+async def _attached_partitions(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'analytics'"
+    ))
+    return [name for name in result.scalars().all() if PARTITION_NAME_PATTERN.match(name)]
+
+
+async def _detached_partitions(conn: AsyncConnection) -> List[str]:
+    """Monthly tables that retention detached and that are waiting to be archived."""
+    result = await conn.execute(text(
+        "SELECT relname FROM pg_class "
+        "WHERE relkind = 'r' AND relname ~ '^analytics_[0-9]{4}_[0-9]{2}$' "
+        "AND NOT relispartition AND obj_description(oid, 'pg_class') = :marker"
+    ), {"marker": RETENTION_MARKER})
+    return sorted(result.scalars().all())
+
+
+async def ensure_partitions(conn: AsyncConnection, now: datetime) -> None:
+    """Create partitions from the current month through the months ahead."""
+    current = month_start(now)
+    for offset in range(settings.ANALYTICS_PARTITIONS_AHEAD + 1):
+        await conn.execute(text(create_partition_sql(add_months(current, offset))))
+    await conn.commit()
+
+
+async def detach_expired_partitions(conn: AsyncConnection, now: datetime) -> List[str]:
+    """Detach partitions entirely older than the retention window."""
+    if settings.ANALYTICS_RETENTION_MONTHS is None:
+        return []
+
+    cutoff = add_months(month_start(now), -settings.ANALYTICS_RETENTION_MONTHS)
+    detached = []
+    for name in sorted(await _attached_partitions(conn)):
+        year, month = PARTITION_NAME_PATTERN.match(name).groups()
+        if add_months(datetime(int(year), int(month), 1), 1) <= cutoff:
+            await conn.execute(text(f"ALTER TABLE analytics DETACH PARTITION {name}"))
+            await conn.execute(text(f"COMMENT ON TABLE {name} IS '{RETENTION_MARKER}'"))
+            await conn.commit()
+            detached.append(name)
+    return detached
+
+
+async def archive_partition(conn: AsyncConnection, name: str) -> str:
+    """
+    Write a detached partition to a gzipped CSV file, then drop it.
+
+    The file is written under a temporary name and renamed when complete, so
+    an interrupted run leaves the table in place to be archived again. File
+    writes and compression run on a worker thread, off the event loop.
+
+    Returns:
+        Path of the archive file
+    """
+    path = os.path.join(settings.ANALYTICS_ARCHIVE_DIR, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+
+    result = await conn.stream(
+        text(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM {name} ORDER BY timestamp, id"),
+        execution_options={"yield_per": ARCHIVE_FETCH_SIZE},
+    )
+    archive = await asyncio.to_thread(_open_archive, tmp_path)
+    try:
+        async for rows in result.partitions():
+            await asyncio.to_thread(_write_rows, archive, rows)
+    finally:
+        await asyncio.to_thread(archive.close)
+    await asyncio.to_thread(os.replace, tmp_path, path)
+
+    await conn.execute(text(f"DROP TABLE {name}"))
+    await conn.commit()
+    return path
+
+
+def _open_archive(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    archive = gzip.open(path, "wt", encoding="utf-8", newline="")
+    archive.write(csv_header())
+    return archive
+
+
+def _write_rows(archive, rows) -> None:
+    archive.write(format_csv_rows(rows))
+
+
+async def maintain_partitions(now: Optional[datetime] = None) -> bool:
+    """
+    Run one maintenance pass unless another process is already running one.
+
+    Returns:
+        Whether this process held the lock and ran the pass
+    """
+    now = now or datetime.utcnow()
+    async with engine.connect() as conn:
+        locked = (await conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+        )).scalar()
+        await conn.commit()
+        if not locked:
+            return False
+        try:
+            await ensure_partitions(conn, now)
+            await detach_expired_partitions(conn, now)
+            for name in await _detached_partitions(conn):
+                path = await archive_partition(conn, name)
+                print(f"Archived analytics partition {name} to {path}")
+        finally:
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+            await conn.commit()
+    return True
+
+
+class PartitionMaintenance(PeriodicTask):
+    """
+    Runs partition maintenance at startup and every `interval` seconds.
+
+    The startup pass runs before `start` returns, so a fresh database has a
+    partition for the current month before the first view is written.
+    """
+
+    async def start(self) -> None:
+        try:
+            await self.run_once()
+        except Exception as e:
+            print(f"Partition maintenance failed at startup: {e}")
+        await super().start()
+
+    async def run_once(self) -> None:
+        await maintain_partitions()
+
+
+# Global partition maintenance task for this worker process
+partition_maintenance = PartitionMaintenance(interval=settings.ANALYTICS_PARTITION_CHECK_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["maintain"]:
+        print("Usage: python -m app.services.partitions maintain")
+        sys.exit(1)
+    ran = asyncio.run(maintain_partitions())
+    print("Partition maintenance done" if ran else "Partition maintenance is running elsewhere, skipped")
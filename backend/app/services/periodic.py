@@ -0,0 +1,52 @@
+"""
+Base class for per-worker background jobs started by the app lifespan.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class PeriodicTask(ABC):
+    """
+    Runs `run_once` every `interval` seconds until stopped.
+
+    Failures are reported and the loop keeps going. Subclasses that buffer
+    state set `run_on_stop` so `stop` performs a final run after the loop is
+    cancelled.
+    """
+
+    run_on_stop = False
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background loop."""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Cancel the background loop, then run once more if configured to."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.run_on_stop:
+            await self.run_once()
+
+    @abstractmethod
+    async def run_once(self) -> None:
+        """One pass of the job."""
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"{type(self).__name__} failed: {e}")
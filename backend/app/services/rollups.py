@@ -0,0 +1,148 @@
+"""
+Hourly analytics rollups.
+
+Every ingest batch adds its views to analytics_hourly in the same transaction
+as the raw rows, keyed by (hour, page_type, resource_id, country,
+device_class), so the dashboard can aggregate a few thousand rollup rows
+instead of scanning analytics.
+
+Rebuild the rollups from the raw table with:
+    python -m app.services.rollups backfill
+"""
+
+import asyncio
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Tuple
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import Analytics, AnalyticsHourly
+
+
+# Rows per INSERT statement when writing rollups
+WRITE_CHUNK_SIZE = 1000
+
+RollupKey = Tuple[datetime, str, int, str, str]
+
+
+def rollup_key(
+    timestamp: datetime,
+    page_type: str,
+    resource_id: int,
+    country: str,
+    device: str,
+) -> RollupKey:
+    """Map one view to its rollup bucket, replacing missing values with sentinels."""
+    return (
+        timestamp.replace(minute=0, second=0, microsecond=0),
+        page_type or "post",
+        resource_id or 0,
+        country or "Unknown",
+        device or "Unknown",
+    )
+
+
+async def add_to_rollups(db: AsyncSession, views: Iterable[dict]) -> None:
+    """
+    Add analytics rows (as inserted by the ingest pipeline) to the rollups.
+
+    Runs on the caller's session so the rollup increments commit together
+    with the raw rows.
+    """
+    counts = Counter(
+        rollup_key(
+            view["timestamp"],
+            view["page_type"],
+            view["resource_id"],
+            view["country"],
+            view["device"],
+        )
+        for view in views
+    )
+    await _write_counts(db, counts)
+
+
+async def _write_counts(db: AsyncSession, counts: Counter) -> None:
+    """Upsert rollup counts, adding to any existing bucket."""
+    items = sorted(counts.items())  # Stable order keeps concurrent upserts from deadlocking
+    for start in range(0, len(items), WRITE_CHUNK_SIZE):
+        stmt = pg_insert(AnalyticsHourly).values([
+            {
+                "hour": hour,
+                "page_type": page_type,
+                "resource_id": resource_id,
+                "country": country,
+                "device_class": device_class,
+                "views": views,
+            }
+            for (hour, page_type, resource_id, country, device_class), views in items[start:start + WRITE_CHUNK_SIZE]
+        ])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    AnalyticsHourly.hour,
+                    AnalyticsHourly.page_type,
+                    AnalyticsHourly.resource_id,
+                    AnalyticsHourly.country,
+                    AnalyticsHourly.device_class,
+                ],
+                set_={"views": AnalyticsHourly.views + stmt.excluded.views},
+            )
+        )
+
+
+async def backfill_rollups() -> int:
+    """
+    Rebuild analytics_hourly from the raw analytics table.
+
+    Runs in one transaction holding an EXCLUSIVE lock on analytics_hourly.
+    Ingest writes its rollups under ROW EXCLUSIVE, which conflicts with it,
+    so a batch either committed before the lock was granted (its raw rows are
+    in the scan and its rollup increments are deleted) or cannot write its
+    increments, and so cannot commit its raw rows, until the rebuild has
+    committed. Either way each view is counted once. Ingest flushes wait for
+    the rebuild meanwhile, so run it at a quiet time.
+
+    Returns:
+        Number of rollup rows written
+    """
+    hour = func.date_trunc("hour", Analytics.timestamp)
+    query = (
+        select(
+            hour.label("hour"),
+            Analytics.page_type,
+            Analytics.resource_id,
+            Analytics.country,
+            Analytics.device,
+            func.count(Analytics.id).label("views"),
+        )
+        .group_by(hour, Analytics.page_type, Analytics.resource_id, Analytics.country, Analytics.device)
+        .execution_options(yield_per=WRITE_CHUNK_SIZE)
+    )
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(f"LOCK TABLE {AnalyticsHourly.__tablename__} IN EXCLUSIVE MODE"))
+        await db.execute(delete(AnalyticsHourly))
+
+        counts = Counter()
+        result = await db.stream(query)
+        async for row in result:
+            counts[rollup_key(row.hour, row.page_type, row.resource_id, row.country, row.device)] += row.views
+
+        await _write_counts(db, counts)
+        await db.commit()
+
+    return len(counts)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m app.services.rollups backfill")
+        sys.exit(1)
+    written = asyncio.run(backfill_rollups())
+    print(f"Wrote {written} hourly rollup rows")
@@ -0,0 +1,118 @@
+"""
+Stale-while-revalidate cache for serialized dashboard payloads.
+
+Entries are fresh for `ttl` seconds. After that the stale payload is still
+served immediately while a single background task recomputes it; only
+entries older than `max_stale` (or missing) make the caller wait. Each
+worker process keeps its own cache.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+from app.core.config import settings
+from app.utils.singleflight import SingleFlight
+
+
+# Outcome of a lookup, reported to clients alongside the payload's age
+CACHE_HIT = "hit"
+CACHE_STALE = "stale"
+CACHE_MISS = "miss"
+CACHE_BYPASS = "bypass"
+
+
+class StaleWhileRevalidateCache:
+    """
+    Payload cache keyed by request parameters.
+
+    Concurrent misses and refreshes for the same key share one computation.
+    """
+
+    def __init__(self, ttl: float, max_stale: float):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[Hashable, Tuple[bytes, float]] = {}
+        self._refreshes = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_failures = 0
+
+    async def get(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[bytes]],
+        fresh: bool = False,
+    ) -> Tuple[bytes, float, str]:
+        """
+        Return the payload for `key`, computing it if needed.
+
+        Args:
+            key: Cache key
+            compute: Coroutine function producing the payload
+            fresh: Skip the cached copy and wait for a recompute
+
+        Returns:
+            Tuple of (payload, age in seconds, cache outcome)
+        """
+        if fresh:
+            # Skips the cached copy, but still joins a recompute already running
+            payload = await self._refreshes.do(key, self._refresh, key, compute)
+            return payload, 0.0, CACHE_BYPASS
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            payload, computed_at = entry
+            age = time.monotonic() - computed_at
+            if age <= self.ttl:
+                self.hits += 1
+                return payload, age, CACHE_HIT
+            if age <= self.max_stale:
+                self.stale_hits += 1
+                self._revalidate(key, compute)
+                return payload, age, CACHE_STALE
+
+        self.misses += 1
+        payload = await self._refreshes.do(key, self._refresh, key, compute)
+        return payload, 0.0, CACHE_MISS
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshes),
+            "refresh_failures": self.refresh_failures,
+        }
+
+    async def _refresh(self, key: Hashable, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        payload = await compute()
+        self._entries[key] = (payload, time.monotonic())
+        return payload
+
+    def _revalidate(self, key: Hashable, compute: Callable[[], Awaitable[bytes]]) -> None:
+        """Start a background refresh unless one is already running for `key`."""
+        if self._refreshes.in_flight(key):
+            return
+        task = asyncio.ensure_future(self._revalidate_in_background(key, compute))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _revalidate_in_background(self, key: Hashable, compute: Callable[[], Awaitable[bytes]]) -> None:
+        try:
+            await self._refreshes.do(key, self._refresh, key, compute)
+        except Exception as e:
+            # The stale entry keeps being served; the next request retries
+            self.refresh_failures += 1
+            print(f"Stats cache refresh failed for {key!r}: {e}")
+
+
+# Global dashboard stats cache for this worker process
+stats_cache = StaleWhileRevalidateCache(
+    ttl=settings.STATS_CACHE_TTL_SECONDS,
+    max_stale=settings.STATS_CACHE_MAX_STALE_SECONDS,
+)
@@ -0,0 +1,96 @@
+"""
+In-process registry of post and message titles for analytics responses.
+
+All titles are loaded in one query per type the first time they are needed
+and kept in memory, so analytics endpoints decorate rows without touching
+the database. The write routes update this worker's registry directly;
+edits made through other workers are picked up by the periodic reload.
+"""
+
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post
+from app.models.message import Message
+from app.utils.singleflight import SingleFlight
+
+
+TITLED_MODELS = {"post": Post, "message": Message}
+
+TitleKey = Tuple[str, int]
+
+
+class TitleRegistry:
+    """
+    Titles keyed by (page_type, resource_id), reloaded every `ttl` seconds.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._titles: Dict[TitleKey, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._loads = SingleFlight()
+        # Writes that land while a reload is reading, replayed on top of it
+        self._changes_during_load: Optional[Dict[TitleKey, Optional[str]]] = None
+        self.loads = 0
+
+    async def get_titles(self, resources: Iterable[TitleKey]) -> Dict[TitleKey, str]:
+        """Titles for the given resources; unknown ones are left out."""
+        await self._ensure_loaded()
+        return {key: self._titles[key] for key in resources if key in self._titles}
+
+    def set_title(self, page_type: str, resource_id: int, title: str) -> None:
+        """Record a created or renamed resource."""
+        self._apply((page_type, resource_id), title)
+
+    def forget(self, page_type: str, resource_id: int) -> None:
+        """Drop a deleted resource."""
+        self._apply((page_type, resource_id), None)
+
+    def stats(self) -> dict:
+        return {
+            "titles": len(self._titles),
+            "loads": self.loads,
+            "age_seconds": None if self._loaded_at is None else int(time.monotonic() - self._loaded_at),
+        }
+
+    def _apply(self, key: TitleKey, title: Optional[str]) -> None:
+        if title is None:
+            self._titles.pop(key, None)
+        else:
+            self._titles[key] = title
+        if self._changes_during_load is not None:
+            self._changes_during_load[key] = title
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        await self._loads.do("titles", self._load)
+
+    async def _load(self) -> None:
+        self._changes_during_load = {}
+        try:
+            titles = {}
+            async with AsyncSessionLocal() as db:
+                for page_type, model in TITLED_MODELS.items():
+                    result = await db.execute(select(model.id, model.title))
+                    titles.update({(page_type, row.id): row.title for row in result.all()})
+
+            for key, title in self._changes_during_load.items():
+                if title is None:
+                    titles.pop(key, None)
+                else:
+                    titles[key] = title
+            self._titles = titles
+            self._loaded_at = time.monotonic()
+            self.loads += 1
+        finally:
+            self._changes_during_load = None
+
+
+# Global title registry for this worker process
+title_registry = TitleRegistry(ttl=settings.TITLE_REGISTRY_TTL_SECONDS)
@@ -0,0 +1,161 @@
+"""
+Size-bounded disk cache for on-demand media transforms.
+
+Transformed images are stored under MEDIA_TRANSFORM_CACHE_DIR, one file per
+variant named by a hash of its source and parameters. Each worker keeps an
+in-memory LRU index of the files (loaded from the directory at startup,
+oldest access first) and evicts least recently used files once the total
+passes MEDIA_TRANSFORM_CACHE_MAX_BYTES. Workers sharing the directory each
+enforce the budget on their own view, and a file another worker evicted
+is simply a miss.
+
+The index is only read and changed on the event loop; worker threads just
+write files.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.singleflight import SingleFlight
+
+
+def variant_key(*parts) -> str:
+    """Cache key for a source and transform parameters."""
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class DiskLRUCache:
+    """Files in one directory, evicted least recently used first past `max_bytes`."""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Concurrent misses for the same variant share one encode
+        self.inflight = SingleFlight()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def load(self) -> None:
+        """Index the files already on disk, least recently accessed first."""
+        entries = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._size = sum(self._index.values())
+        self._loaded = True
+        self._evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of a cached variant, or None on a miss."""
+        if not self._loaded:
+            self.load()
+        if key in self._index:
+            path = self._path(key)
+            if os.path.isfile(path):
+                self._index.move_to_end(key)
+                self.hits += 1
+                return path
+            # Evicted by another worker
+            self.discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes) -> str:
+        """Store a variant, evicting old ones past the budget, and return its path."""
+        path = self._write(key, data)
+        self._record(key, len(data))
+        return path
+
+    async def put_async(self, key: str, data: bytes) -> str:
+        """
+        `put` for request handlers: the file is written on a worker thread,
+        and the index is only touched back on the event loop.
+        """
+        path = await asyncio.to_thread(self._write, key, data)
+        self._record(key, len(data))
+        return path
+
+    def discard(self, key: str) -> None:
+        """Drop a variant whose file turned out to be gone."""
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    def _write(self, key: str, data: bytes) -> str:
+        """Write a variant's file atomically. Touches no shared state."""
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return path
+
+    def _record(self, key: str, size: int) -> None:
+        if not self._loaded:
+            self.load()
+        self._size -= self._index.pop(key, 0)
+        self._index[key] = size
+        self._size += size
+        self._evict(keep=key)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        while self._size > self.max_bytes and self._index:
+            key, size = next(iter(self._index.items()))
+            if key == keep:
+                break  # A single variant larger than the budget
+            del self._index[key]
+            self._size -= size
+            self.evictions += 1
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self._index),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "coalesced": self.inflight.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+# Global transform cache for this worker process
+transform_cache = DiskLRUCache(
+    root=settings.MEDIA_TRANSFORM_CACHE_DIR,
+    max_bytes=settings.MEDIA_TRANSFORM_CACHE_MAX_BYTES,
+)
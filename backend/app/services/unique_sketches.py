@@ -0,0 +1,283 @@
+"""
+Daily HyperLogLog sketches of visitor IPs for approximate unique counts.
+
+Every ingest batch folds its visitors into analytics_uniques, and into the
+all-time sketches in analytics_uniques_total, in the same transaction as the
+raw rows. Counts over a window are answered by merging the daily sketches
+involved and all-time counts read the totals, instead of
+`count(distinct ip_address)` over the raw table. Sketches with few visitors
+are stored sparse, a few bytes each.
+
+Sketch merges are idempotent, so existing history can be folded in at any
+time (and either command re-run safely) with:
+    python -m app.services.unique_sketches backfill
+and the all-time sketches rebuilt from the daily ones with:
+    python -m app.services.unique_sketches totals
+"""
+
+import asyncio
+import sys
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.analytics import Analytics, AnalyticsUniques, AnalyticsUniquesTotal
+from app.utils.hyperloglog import HyperLogLog
+
+
+# Page type of the whole-site sketch
+ALL_PAGES = "*"
+
+# Relative standard error of every count answered from sketches
+SKETCH_RELATIVE_ERROR = round(HyperLogLog().relative_error, 4)
+
+# Sketches per statement when writing (each is at most 4 KiB)
+WRITE_CHUNK_SIZE = 250
+
+SketchKey = Tuple[date, str, int]
+TotalKey = Tuple[str, int]
+
+
+def sketch_keys(day: date, page_type: Optional[str], resource_id: Optional[int]) -> List[SketchKey]:
+    """Every sketch a view on `day` contributes to."""
+    page_type = page_type or "post"
+    keys = [(day, ALL_PAGES, 0), (day, page_type, 0)]
+    if resource_id:
+        keys.append((day, page_type, resource_id))
+    return keys
+
+
+async def add_to_sketches(db: AsyncSession, views: Iterable[dict]) -> None:
+    """
+    Add analytics rows (as inserted by the ingest pipeline) to the sketches.
+
+    Runs on the caller's session so the sketches commit together with the
+    raw rows.
+    """
+    sketches: Dict[SketchKey, HyperLogLog] = defaultdict(HyperLogLog)
+    for view in views:
+        for key in sketch_keys(view["timestamp"].date(), view["page_type"], view["resource_id"]):
+            sketches[key].add(view["ip_address"] or "")
+    await _merge_sketches(db, AnalyticsUniques.__table__, sketches)
+    await _merge_sketches(db, AnalyticsUniquesTotal.__table__, _totals(sketches))
+
+
+def _totals(sketches: Dict[SketchKey, HyperLogLog]) -> Dict[TotalKey, HyperLogLog]:
+    """Daily sketches merged per scope, for the all-time table."""
+    totals: Dict[TotalKey, HyperLogLog] = defaultdict(HyperLogLog)
+    for (_, page_type, resource_id), sketch in sketches.items():
+        totals[(page_type, resource_id)].merge(sketch)
+    return totals
+
+
+async def _merge_sketches(db: AsyncSession, table, sketches: Dict[tuple, HyperLogLog]) -> None:
+    """
+    Merge sketches into `table`, keyed by its primary key columns in order.
+
+    New keys are inserted directly; existing rows are locked in key order,
+    merged in Python and written back. Sorted keys keep concurrent workers
+    from deadlocking on each other's rows.
+    """
+    key_columns = list(table.primary_key.columns)
+    names = [column.name for column in key_columns]
+    keys = sorted(sketches)
+
+    for start in range(0, len(keys), WRITE_CHUNK_SIZE):
+        chunk = keys[start:start + WRITE_CHUNK_SIZE]
+
+        inserted = await db.execute(
+            pg_insert(table)
+            .values([{**dict(zip(names, key)), "sketch": sketches[key].to_bytes()} for key in chunk])
+            .on_conflict_do_nothing()
+            .returning(*key_columns)
+        )
+        inserted_keys = {tuple(row) for row in inserted.all()}
+        existing = [key for key in chunk if key not in inserted_keys]
+        if not existing:
+            continue
+
+        result = await db.execute(
+            select(*key_columns, table.c.sketch)
+            .where(tuple_(*key_columns).in_(existing))
+            .order_by(*key_columns)
+            .with_for_update()
+        )
+        merged_rows = []
+        for row in result.all():
+            key = tuple(row[:len(names)])
+            merged = HyperLogLog.from_bytes(row.sketch)
+            merged.merge(sketches[key])
+            merged_rows.append({
+                **{f"b_{name}": value for name, value in zip(names, key)},
+                "b_sketch": merged.to_bytes(),
+            })
+
+        await db.execute(
+            update(table)
+            .where(*(column == bindparam(f"b_{column.name}") for column in key_columns))
+            .values(sketch=bindparam("b_sketch")),
+            merged_rows,
+        )
+
+
+async def _count_merged(db: AsyncSession, query, key_columns: int) -> Dict[Hashable, int]:
+    """
+    Merge the sketches returned by `query` by its leading `key_columns`
+    columns and estimate each group. The sketch must be the last column.
+    """
+    merged: Dict[Hashable, HyperLogLog] = {}
+    result = await db.execute(query)
+    for row in result.all():
+        key = row[0] if key_columns == 1 else tuple(row[:key_columns])
+        sketch = HyperLogLog.from_bytes(row[-1])
+        if key in merged:
+            merged[key].merge(sketch)
+        else:
+            merged[key] = sketch
+    return {key: sketch.count() for key, sketch in merged.items()}
+
+
+async def count_total_uniques(db: AsyncSession, since: Optional[date] = None) -> int:
+    """Approximate unique visitors across the site, all time or since a day."""
+    if since is None:
+        query = select(AnalyticsUniquesTotal.sketch).where(
+            AnalyticsUniquesTotal.page_type == ALL_PAGES,
+            AnalyticsUniquesTotal.resource_id == 0,
+        )
+    else:
+        query = select(AnalyticsUniques.sketch).where(
+            AnalyticsUniques.page_type == ALL_PAGES,
+            AnalyticsUniques.resource_id == 0,
+            AnalyticsUniques.day >= since,
+        )
+
+    merged = HyperLogLog()
+    result = await db.execute(query)
+    for sketch in result.scalars().all():
+        merged.merge(HyperLogLog.from_bytes(sketch))
+    return merged.count()
+
+
+async def count_uniques_by_page_type(db: AsyncSession, since: date) -> Dict[str, int]:
+    """Approximate unique visitors per page type since a day."""
+    query = select(AnalyticsUniques.page_type, AnalyticsUniques.sketch).where(
+        AnalyticsUniques.day >= since,
+        AnalyticsUniques.page_type != ALL_PAGES,
+        AnalyticsUniques.resource_id == 0,
+    )
+    return await _count_merged(db, query, 1)
+
+
+async def count_uniques_by_resource(
+    db: AsyncSession,
+    resources: Iterable[Tuple[str, int]],
+    since: Optional[date] = None,
+) -> Dict[Tuple[str, int], int]:
+    """Approximate unique visitors for each (page_type, resource_id), all time or since a day."""
+    resources = list(resources)
+    if not resources:
+        return {}
+    # All-time counts read one sketch per resource instead of every day's
+    table = AnalyticsUniquesTotal if since is None else AnalyticsUniques
+    query = select(
+        table.page_type,
+        table.resource_id,
+        table.sketch,
+    ).where(tuple_(table.page_type, table.resource_id).in_(resources))
+    if since is not None:
+        query = query.where(AnalyticsUniques.day >= since)
+    return await _count_merged(db, query, 2)
+
+
+async def backfill_sketches() -> int:
+    """
+    Fold the raw analytics history into the sketches, one day per transaction.
+
+    Returns:
+        Number of days processed
+    """
+    day_column = func.date(Analytics.timestamp)
+    query = (
+        select(day_column.label("day"), Analytics.page_type, Analytics.resource_id, Analytics.ip_address)
+        .distinct()
+        .order_by(day_column)
+        .execution_options(yield_per=5000)
+    )
+
+    days = 0
+    async with AsyncSessionLocal() as reader, AsyncSessionLocal() as writer:
+        current_day = None
+        sketches: Dict[SketchKey, HyperLogLog] = defaultdict(HyperLogLog)
+        result = await reader.stream(query)
+        async for row in result:
+            if row.day != current_day and sketches:
+                await _merge_sketches(writer, AnalyticsUniques.__table__, sketches)
+                await _merge_sketches(writer, AnalyticsUniquesTotal.__table__, _totals(sketches))
+                await writer.commit()
+                sketches = defaultdict(HyperLogLog)
+                days += 1
+            current_day = row.day
+            for key in sketch_keys(row.day, row.page_type, row.resource_id):
+                sketches[key].add(row.ip_address or "")
+        if sketches:
+            await _merge_sketches(writer, AnalyticsUniques.__table__, sketches)
+            await _merge_sketches(writer, AnalyticsUniquesTotal.__table__, _totals(sketches))
+            await writer.commit()
+            days += 1
+
+    return days
+
+
+async def rollup_totals() -> int:
+    """
+    Fold the daily sketches into the all-time sketches, one scope at a time.
+
+    Works from the daily sketches, so it also covers days whose raw rows
+    retention has already dropped.
+
+    Returns:
+        Number of scopes processed
+    """
+    query = (
+        select(AnalyticsUniques.page_type, AnalyticsUniques.resource_id, AnalyticsUniques.sketch)
+        .order_by(AnalyticsUniques.page_type, AnalyticsUniques.resource_id)
+        .execution_options(yield_per=1000)
+    )
+
+    scopes = 0
+    async with AsyncSessionLocal() as reader, AsyncSessionLocal() as writer:
+        current: Optional[TotalKey] = None
+        total = HyperLogLog()
+        result = await reader.stream(query)
+        async for row in result:
+            key = (row.page_type, row.resource_id)
+            if key != current and current is not None:
+                await _merge_sketches(writer, AnalyticsUniquesTotal.__table__, {current: total})
+                await writer.commit()
+                total = HyperLogLog()
+                scopes += 1
+            current = key
+            total.merge(HyperLogLog.from_bytes(row.sketch))
+        if current is not None:
+            await _merge_sketches(writer, AnalyticsUniquesTotal.__table__, {current: total})
+            await writer.commit()
+            scopes += 1
+
+    return scopes
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        processed = asyncio.run(backfill_sketches())
+        print(f"Merged sketches for {processed} days")
+    elif sys.argv[1:] == ["totals"]:
+        processed = asyncio.run(rollup_totals())
+        print(f"Rolled up all-time sketches for {processed} scopes")
+    else:
+        print("Usage: python -m app.services.unique_sketches backfill|totals")
+        sys.exit(1)
@@ -0,0 +1,137 @@
+"""
+Write-behind accumulator for Post.view_count and Message.view_count.
+
+Views are counted in memory per (page_type, id) and periodically written as a
+single `UPDATE ... SET view_count = view_count + v.n FROM (VALUES ...) v` per
+table, so increments are atomic in Postgres and nothing has to load the row.
+"""
+
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Integer, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post
+from app.models.message import Message
+from app.services.periodic import PeriodicTask
+
+
+COUNTED_MODELS = {"post": Post, "message": Message}
+
+CounterKey = Tuple[str, int]
+
+
+class ViewCounterAccumulator(PeriodicTask):
+    """
+    Per-worker pending view counts, flushed every `interval` seconds.
+
+    Alongside the pending increments it remembers the last count read from
+    the database for each resource it has been asked about, so projected
+    counts can be served without a round trip. The remembered counts are
+    dropped after every flush, which keeps them to the resources viewed
+    since the last one and picks up other workers' flushes on the next read.
+    Projections are per worker: increments other workers have not flushed
+    yet are not included.
+    """
+
+    run_on_stop = True
+
+    def __init__(self, interval: float):
+        super().__init__(interval)
+        self._pending: Counter = Counter()
+        self._flushing: Counter = Counter()
+        self._known: Dict[CounterKey, int] = {}
+        self.flushed = 0
+
+    def add(self, page_type: str, resource_id: int, views: int = 1) -> None:
+        """Count views for a post or message without reading anything."""
+        if page_type in COUNTED_MODELS and resource_id:
+            self._pending[(page_type, resource_id)] += views
+
+    async def increment(self, page_type: str, resource_id: int, db: AsyncSession) -> Optional[int]:
+        """
+        Count one view and return the projected view count.
+
+        Only the first call for a resource reads its stored count (a single
+        column, not the row).
+
+        Returns:
+            Projected view count, or None if the resource does not exist
+        """
+        key = (page_type, resource_id)
+        if key not in self._known:
+            model = COUNTED_MODELS[page_type]
+            result = await db.execute(select(model.view_count).where(model.id == resource_id))
+            row = result.first()
+            if row is None:
+                return None
+            # Another call may have loaded it while we were waiting
+            self._known.setdefault(key, row.view_count or 0)
+
+        self._pending[key] += 1
+        return self._known[key] + self._flushing[key] + self._pending[key]
+
+    def forget(self, page_type: str, resource_id: int) -> None:
+        """Drop pending and cached counts for a deleted resource."""
+        self._pending.pop((page_type, resource_id), None)
+        self._known.pop((page_type, resource_id), None)
+
+    def stats(self) -> dict:
+        return {
+            "pending_resources": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "known_resources": len(self._known),
+            "flushed_views": self.flushed,
+        }
+
+    async def run_once(self) -> None:
+        """Write all pending increments, one UPDATE per table."""
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, Counter()
+        self._flushing = pending
+        committed = False
+        try:
+            async with AsyncSessionLocal() as db:
+                for page_type, model in COUNTED_MODELS.items():
+                    rows = [
+                        (resource_id, views)
+                        for (kind, resource_id), views in pending.items()
+                        if kind == page_type
+                    ]
+                    if not rows:
+                        continue
+                    increments = values(
+                        column("id", Integer),
+                        column("views", Integer),
+                        name="increments",
+                    ).data(rows)
+                    table = model.__table__
+                    await db.execute(
+                        update(table)
+                        .where(table.c.id == increments.c.id)
+                        .values(
+                            view_count=func.coalesce(table.c.view_count, 0) + increments.c.views,
+                            # A view is not an edit; keep onupdate from bumping it
+                            updated_at=table.c.updated_at,
+                        )
+                    )
+                await db.commit()
+                committed = True
+        finally:
+            self._flushing = Counter()
+            if not committed:
+                # Put the increments back so the next flush retries them
+                self._pending.update(pending)
+
+        # The stored counts now include the flush; re-read them on next use
+        self._known.clear()
+        self.flushed += sum(pending.values())
+
+
+# Global view counter accumulator for this worker process
+view_counters = ViewCounterAccumulator(interval=settings.VIEW_COUNT_FLUSH_INTERVAL_SECONDS)
@@ -0,0 +1,126 @@
+"""
+Duplicate view detection for the analytics ingest pipeline.
+
+A view is a duplicate when the same page type, resource, IP and session was
+recorded within the dedupe window. Each worker answers that from a rotating
+in-memory index; with ANALYTICS_DEDUPE_MODE=database the pipeline also claims
+every view in the shared analytics_dedupe table, so views of one session that
+land on different uvicorn workers are counted once.
+"""
+
+import hashlib
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import AnalyticsDedupe
+
+
+DEDUPE_WINDOW = timedelta(minutes=30)
+
+
+def dedupe_key(page_type: str, resource_id: Optional[int], ip_address: str, session_id: str) -> int:
+    """Stable signed 64-bit hash of a view's identity, shared by all workers."""
+    digest = hashlib.blake2b(
+        f"{page_type}\x1f{resource_id}\x1f{ip_address}\x1f{session_id}".encode("utf-8"),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class RotatingDedupeIndex:
+    """
+    Remembers view keys for `window`, using time buckets for cheap expiry.
+
+    Each bucket maps a key to the time it was recorded, so "seen recently?"
+    is exact to the second; whole buckets are dropped once they fall out of
+    the window. If more than `max_keys` keys are held, the oldest buckets are
+    dropped early, trading a few missed duplicates for bounded memory.
+    """
+
+    def __init__(self, window: timedelta, buckets: int = 6, max_keys: int = 500_000):
+        self.window = window.total_seconds()
+        self.bucket_seconds = self.window / buckets
+        self.max_keys = max_keys
+        self._buckets: Deque[Tuple[int, Dict[int, float]]] = deque()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def seen_or_add(self, key: int, now: Optional[float] = None) -> bool:
+        """
+        Check whether `key` was recorded within the window, recording it if not.
+
+        Returns:
+            True if the key is a duplicate
+        """
+        now = time.time() if now is None else now
+        self._rotate(now)
+
+        cutoff = now - self.window
+        for _, entries in self._buckets:
+            seen_at = entries.get(key)
+            if seen_at is not None and seen_at > cutoff:
+                return True
+
+        self._buckets[-1][1][key] = now
+        self._size += 1
+        return False
+
+    def discard(self, key: int) -> None:
+        """Forget `key`, so a view that was never stored is not taken for a duplicate."""
+        for _, entries in self._buckets:
+            if entries.pop(key, None) is not None:
+                self._size -= 1
+
+    def _rotate(self, now: float) -> None:
+        """Open the bucket for `now` and drop buckets that are out of the window."""
+        number = int(now // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != number:
+            self._buckets.append((number, {}))
+
+        oldest = number - int(self.window // self.bucket_seconds)
+        while self._buckets and (
+            self._buckets[0][0] < oldest
+            or (self._size > self.max_keys and len(self._buckets) > 1)
+        ):
+            _, entries = self._buckets.popleft()
+            self._size -= len(entries)
+
+
+async def claim_views(db: AsyncSession, keys: List[int], seen_at: datetime) -> Set[int]:
+    """
+    Claim view keys in the shared dedupe table.
+
+    A key is claimed when it is new, or when its previous claim is older than
+    the dedupe window (the claim is then moved forward). Keys another worker
+    claimed within the window are not returned.
+
+    Returns:
+        The subset of `keys` that this call claimed
+    """
+    if not keys:
+        return set()
+
+    stmt = pg_insert(AnalyticsDedupe).values(
+        [{"dedupe_key": key, "seen_at": seen_at} for key in set(keys)]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnalyticsDedupe.dedupe_key],
+        set_={"seen_at": stmt.excluded.seen_at},
+        where=AnalyticsDedupe.seen_at <= stmt.excluded.seen_at - DEDUPE_WINDOW,
+    ).returning(AnalyticsDedupe.dedupe_key)
+
+    result = await db.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def purge_claims(db: AsyncSession, now: datetime) -> None:
+    """Delete claims that can no longer cause a duplicate."""
+    await db.execute(delete(AnalyticsDedupe).where(AnalyticsDedupe.seen_at < now - DEDUPE_WINDOW))
@@ -0,0 +1,86 @@
+"""
+Per-session summaries maintained at ingest time.
+
+Every ingest batch upserts one visitor_sessions row per session it contains,
+in the same transaction as the raw rows, so the sessions listing reads a
+page of rows by last_seen instead of grouping the analytics table.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.analytics import VisitorSession
+
+
+# Bit per known page type in visitor_sessions.page_types; any other page
+# type sets OTHER_PAGE_TYPE_BIT. Never renumber existing entries.
+PAGE_TYPE_BITS = {
+    "home": 1 << 0,
+    "post": 1 << 1,
+    "message": 1 << 2,
+    "music": 1 << 3,
+    "memories": 1 << 4,
+}
+OTHER_PAGE_TYPE_BIT = 1 << 14
+
+# Sessions per INSERT statement
+WRITE_CHUNK_SIZE = 1000
+
+
+def page_type_bit(page_type: Optional[str]) -> int:
+    """Bit recorded for a page type (missing page types count as posts)."""
+    return PAGE_TYPE_BITS.get(page_type or "post", OTHER_PAGE_TYPE_BIT)
+
+
+def count_page_types(page_types: int) -> int:
+    """Number of distinct page types in a bitmask."""
+    return (page_types or 0).bit_count()
+
+
+async def add_to_sessions(db: AsyncSession, views: Iterable[dict]) -> None:
+    """
+    Fold analytics rows (as inserted by the ingest pipeline) into their sessions.
+
+    Runs on the caller's session so the session rows commit together with the
+    raw rows. Views without a session are ignored.
+    """
+    sessions: Dict[str, dict] = {}
+    for view in sorted(
+        (view for view in views if view["session_id"]),
+        key=lambda view: view["timestamp"],
+    ):
+        session = sessions.get(view["session_id"])
+        if session is None:
+            sessions[view["session_id"]] = {
+                "session_id": view["session_id"],
+                "ip_address": view["ip_address"],
+                "country": view["country"],
+                "city": view["city"],
+                "device": view["device"],
+                "first_seen": view["timestamp"],
+                "last_seen": view["timestamp"],
+                "visit_count": 1,
+                "page_types": page_type_bit(view["page_type"]),
+            }
+        else:
+            session["last_seen"] = view["timestamp"]
+            session["visit_count"] += 1
+            session["page_types"] |= page_type_bit(view["page_type"])
+
+    rows = [sessions[session_id] for session_id in sorted(sessions)]  # Stable order avoids deadlocks
+    for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+        stmt = pg_insert(VisitorSession).values(rows[start:start + WRITE_CHUNK_SIZE])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[VisitorSession.session_id],
+                set_={
+                    "first_seen": func.least(VisitorSession.first_seen, stmt.excluded.first_seen),
+                    "last_seen": func.greatest(VisitorSession.last_seen, stmt.excluded.last_seen),
+                    "visit_count": VisitorSession.visit_count + stmt.excluded.visit_count,
+                    "page_types": VisitorSession.page_types.op("|")(stmt.excluded.page_types),
+                },
+            )
+        )
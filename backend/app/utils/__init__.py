@@ -4,10 +4,12 @@ from app.utils.image_processing import (
     optimize_image_base64,
     create_thumbnail_base64,
     extract_image_dimensions,
+    process_image,
 )
 
 __all__ = [
     "optimize_image_base64",
     "create_thumbnail_base64",
     "extract_image_dimensions",
+    "process_image",
 ]
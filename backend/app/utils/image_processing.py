@@ -4,7 +4,8 @@ Image processing utilities for optimization and thumbnail generation.
 
 import base64
 import io
-from typing import Tuple, Optional
+from dataclasses import dataclass, field
+from typing import List, Tuple, Optional, Union
 from PIL import Image
 
 
@@ -173,3 +174,189 @@ def generate_blur_placeholder(
             
     except Exception:
         return None
+
+
+# Widths of the responsive renditions made for every gallery image
+RENDITION_WIDTHS = (320, 640, 1024, 1920)
+
+# Rendition encodings: format name, Pillow format and save options
+RENDITION_FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", {"quality": 82, "optimize": True}),
+)
+
+
+@dataclass
+class Rendition:
+    """One encoded size/format of an image."""
+    width: int
+    height: int
+    format: str  # "webp" or "jpeg"
+    data: bytes
+
+
+@dataclass
+class ImageDerivatives:
+    """Everything the gallery stores for an uploaded image."""
+    width: int
+    height: int
+    optimized: bytes  # JPEG
+    thumbnail: bytes  # JPEG
+    blur_placeholder: str  # Data URL
+    renditions: List[Rendition] = field(default_factory=list)
+
+
+def _flatten_to_rgb(img: Image.Image) -> Image.Image:
+    """Convert to RGB, compositing any transparency onto white."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    return img
+
+
+def _encode_jpeg(img: Image.Image, quality: int, optimize: bool = True) -> bytes:
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=quality, optimize=optimize)
+    return output.getvalue()
+
+
+def _make_renditions(img: Image.Image, widths: Tuple[int, ...]) -> List[Rendition]:
+    """
+    Encode `img` at each width it is at least as wide as, in every format.
+    
+    An image narrower than all widths gets a single rendition at its own
+    size. Largest first, each size resized from the previous one.
+    """
+    targets = sorted((width for width in widths if width < img.width), reverse=True)
+    if max(widths) >= img.width:
+        targets.insert(0, img.width)
+    
+    renditions = []
+    current = img
+    for width in targets:
+        if width != current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for name, pil_format, options in RENDITION_FORMATS:
+            output = io.BytesIO()
+            current.save(output, format=pil_format, **options)
+            renditions.append(Rendition(current.width, current.height, name, output.getvalue()))
+    return renditions
+
+
+def process_image(
+    image: Union[str, bytes],
+    max_size: Tuple[int, int] = (1920, 1080),
+    quality: int = 85,
+    thumbnail_size: Tuple[int, int] = (400, 400),
+    thumbnail_quality: int = 75,
+    placeholder_size: Tuple[int, int] = (10, 10),
+    rendition_widths: Tuple[int, ...] = RENDITION_WIDTHS,
+) -> ImageDerivatives:
+    """
+    Decode an image once and produce every gallery derivative from it.
+    
+    JPEGs are decoded in draft mode at the smallest DCT scale that still
+    covers `max_size`, and each resize uses reduce() before LANCZOS
+    (reducing_gap). The thumbnail is made from the optimized image and the
+    placeholder from the thumbnail, so each step starts from the smallest
+    image available. Renditions are made from the decoded image at each
+    of `rendition_widths` it is wider than, in WebP and JPEG.
+    CPU-bound; the gallery runs it in the image worker pool
+    (app.services.image_workers).
+    
+    Args:
+        image: Base64 data (with or without data URL prefix) or raw bytes
+    
+    Raises:
+        PIL.UnidentifiedImageError, OSError: if the image cannot be decoded
+    """
+    data = decode_base64_image(image) if isinstance(image, str) else image
+    
+    with Image.open(io.BytesIO(data)) as img:
+        width, height = img.size
+        if img.format == "JPEG":
+            img.draft("RGB", (max(max_size[0], *rendition_widths), max_size[1]))
+        decoded = _flatten_to_rgb(img)
+        decoded.load()
+    
+    renditions = _make_renditions(decoded, rendition_widths) if rendition_widths else []
+    optimized = decoded
+    optimized.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    
+    thumbnail = optimized.copy()
+    thumbnail.thumbnail(thumbnail_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    placeholder = thumbnail.copy()
+    placeholder.thumbnail(placeholder_size, Image.Resampling.LANCZOS)
+    
+    return ImageDerivatives(
+        width=width,
+        height=height,
+        optimized=_encode_jpeg(optimized, quality),
+        thumbnail=_encode_jpeg(thumbnail, thumbnail_quality),
+        blur_placeholder=encode_base64_image(_encode_jpeg(placeholder, 20, optimize=False), "jpeg"),
+        renditions=renditions,
+    )
+
+
+# Pillow formats and media types for on-demand transforms
+TRANSFORM_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "png": ("PNG", "image/png"),
+}
+
+
+def transform_image(
+    data: bytes,
+    width: Optional[int],
+    height: Optional[int],
+    fit: str = "contain",
+    fmt: str = "jpeg",
+    quality: int = 80,
+) -> bytes:
+    """
+    Resize and re-encode an image for the media transform endpoint.
+    
+    "contain" scales the image to fit inside width x height; "cover" scales
+    it to fill the box and crops the overflow around the center. A missing
+    dimension is unconstrained. Images are never enlarged.
+    
+    CPU-bound; run it in the image worker pool.
+    """
+    pil_format = TRANSFORM_FORMATS[fmt][0]
+    with Image.open(io.BytesIO(data)) as img:
+        source_width, source_height = img.size
+        box = (width or source_width, height or source_height)
+        if img.format == "JPEG":
+            img.draft("RGB", box)
+        if pil_format == "JPEG":
+            img = _flatten_to_rgb(img)
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img.load()
+    
+    if fit == "cover" and width and height:
+        scale = max(width / img.width, height / img.height)
+        if scale < 1:
+            size = (max(width, round(img.width * scale)), max(height, round(img.height * scale)))
+            img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        left = max(0, (img.width - width) // 2)
+        top = max(0, (img.height - height) // 2)
+        img = img.crop((left, top, left + min(width, img.width), top + min(height, img.height)))
+    else:
+        img.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    
+    if pil_format == "PNG":
+        options = {"optimize": True}
+    elif pil_format == "WEBP":
+        options = {"quality": quality, "method": 4}
+    else:
+        options = {"quality": quality, "optimize": True}
+    output = io.BytesIO()
+    img.save(output, format=pil_format, **options)
+    return output.getvalue()
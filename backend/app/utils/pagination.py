@@ -0,0 +1,56 @@
+"""
+Opaque keyset cursors for paginated listings.
+
+A cursor records the (timestamp, id) of a boundary row and which way to
+read from it; the id is an integer or, for tables keyed by one, a string.
+Clients only pass cursors back; the encoding is not part of the API.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple, Type, Union
+
+
+# Cursor directions
+NEXT = "next"  # Older rows, after the boundary
+PREV = "prev"  # Newer rows, before the boundary
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded."""
+
+
+def encode_cursor(timestamp: datetime, row_id: Union[int, str], direction: str) -> str:
+    """Encode a boundary row as a URL-safe cursor."""
+    raw = json.dumps([timestamp.isoformat(), row_id, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: Type[Union[int, str]] = int) -> Tuple[datetime, Union[int, str], str]:
+    """
+    Decode a cursor from `encode_cursor`.
+
+    Args:
+        cursor: Cursor passed back by the client
+        id_type: Type of the listing's row ids, int or str
+
+    Returns:
+        Tuple of (timestamp, id, direction)
+
+    Raises:
+        InvalidCursor: If the cursor is malformed, its id is not an `id_type`
+            or its timestamp carries a UTC offset (columns are naive UTC)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id, direction = json.loads(base64.urlsafe_b64decode(padded))
+        # type() rather than isinstance(): JSON true/false decode to bools
+        if direction not in (NEXT, PREV) or type(row_id) is not id_type:
+            raise ValueError(direction)
+        timestamp = datetime.fromisoformat(timestamp)
+        if timestamp.tzinfo is not None:
+            raise ValueError(timestamp)
+        return timestamp, row_id, direction
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,38 @@
+"""
+Coalescing of concurrent async calls that share a key.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+
+    Callers that arrive while a call for their key is in flight wait for that
+    call's result instead of starting their own. A waiter being cancelled does
+    not cancel the shared call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call for `key` is currently running."""
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """Await `func(*args)`, sharing the call with concurrent callers for `key`."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
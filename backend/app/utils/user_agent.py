@@ -0,0 +1,117 @@
+"""
+User agent classification for analytics.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+
+# Known crawlers and the user agent token that identifies each, most specific
+# first; anything else matching the generic tokens is reported as "Other bot"
+BOT_TOKENS = (
+    ("Googlebot", r'googlebot|google-inspectiontool|googleother|storebot-google'),
+    ("Google Ads", r'adsbot-google|mediapartners-google'),
+    ("Bingbot", r'bingbot|bingpreview|msnbot|adidxbot'),
+    ("Yahoo Slurp", r'slurp'),
+    ("DuckDuckBot", r'duckduckbot|duckassistbot'),
+    ("Baiduspider", r'baiduspider'),
+    ("YandexBot", r'yandex(?:bot|images|metrika|mobilebot)'),
+    ("Applebot", r'applebot'),
+    ("Facebook", r'facebookexternalhit|facebookcatalog|meta-externalagent'),
+    ("Twitterbot", r'twitterbot'),
+    ("LinkedInBot", r'linkedinbot'),
+    ("Slackbot", r'slackbot|slack-imgproxy'),
+    ("Discordbot", r'discordbot'),
+    ("TelegramBot", r'telegrambot'),
+    ("WhatsApp", r'whatsapp'),
+    ("Pinterestbot", r'pinterestbot'),
+    ("AhrefsBot", r'ahrefsbot|ahrefssiteaudit'),
+    ("SemrushBot", r'semrushbot'),
+    ("MJ12bot", r'mj12bot'),
+    ("DotBot", r'dotbot'),
+    ("PetalBot", r'petalbot'),
+    ("Bytespider", r'bytespider'),
+    ("GPTBot", r'gptbot|chatgpt-user|oai-searchbot'),
+    ("ClaudeBot", r'claudebot|claude-web|anthropic-ai'),
+    ("CCBot", r'ccbot'),
+    ("PerplexityBot", r'perplexitybot'),
+    ("Amazonbot", r'amazonbot'),
+    ("Headless browser", r'headlesschrome|phantomjs|puppeteer|playwright'),
+    ("HTTP library", r'python-requests|python-urllib|aiohttp|httpx|go-http-client|okhttp|java/|libwww-perl|wget|curl/|axios|node-fetch'),
+    ("Uptime monitor", r'uptimerobot|pingdom|statuscake|site24x7|better\s?uptime'),
+    ("Other bot", r'bot\b|bot/|crawl|spider|scrap|fetcher|lighthouse'),
+)
+
+# One alternation with a named group per bot; the group that matched names it
+BOT_PATTERN = re.compile(
+    "|".join(f"(?P<b{index}>{token})" for index, (_, token) in enumerate(BOT_TOKENS)),
+    re.I,
+)
+APPLE_MOBILE_PATTERN = re.compile(r'iPhone|iPad|iPod')
+
+# Checked in order; the first match wins
+DEVICE_PATTERNS = (
+    ("Android", re.compile(r'Android')),
+    ("Mac", re.compile(r'Mac OS X')),
+    ("Windows", re.compile(r'Windows')),
+    ("Linux", re.compile(r'Linux')),
+)
+BROWSER_PATTERNS = (
+    ("Edge", re.compile(r'Edg/')),
+    ("Chrome", re.compile(r'Chrome/')),
+    ("Safari", re.compile(r'Safari/')),
+    ("Firefox", re.compile(r'Firefox/')),
+    ("IE", re.compile(r'MSIE|Trident')),
+)
+
+
+@lru_cache(maxsize=4096)
+def detect_bot(ua: str) -> Optional[str]:
+    """
+    Name of the crawler a user agent belongs to, or None for browsers.
+
+    Memoized like parse_user_agent; the tracking route calls this first so
+    bot hits never reach geolocation or the ingest buffer.
+    """
+    if not ua:
+        return None
+    match = BOT_PATTERN.search(ua)
+    if match is None:
+        return None
+    return BOT_TOKENS[int(match.lastgroup[1:])][0]
+
+
+@lru_cache(maxsize=4096)
+def parse_user_agent(ua: str) -> str:
+    """
+    Extract a readable device/browser string from user agent.
+
+    Results are memoized per user agent string; real traffic only has a few
+    thousand distinct ones.
+    """
+    if not ua:
+        return "Unknown"
+
+    # Detect bots
+    if detect_bot(ua):
+        return "Bot"
+
+    # Detect device
+    device = "Desktop"
+    if APPLE_MOBILE_PATTERN.search(ua):
+        device = "iPhone" if "iPhone" in ua else "iPad"
+    else:
+        for name, pattern in DEVICE_PATTERNS:
+            if pattern.search(ua):
+                device = name
+                break
+
+    # Detect browser (Edge and Chrome also claim Safari, so order matters)
+    browser = "Other"
+    for name, pattern in BROWSER_PATTERNS:
+        if pattern.search(ua):
+            browser = name
+            break
+
+    return f"{device} / {browser}"
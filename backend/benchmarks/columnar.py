@@ -0,0 +1,164 @@
+"""
+Benchmark the columnar analytics engine against the SQL breakdowns.
+
+Builds a synthetic window in memory, checks every breakdown against a plain
+Python reference, and times building, tailing and querying the engine. With
+--sql it also times the rollup queries get_stats runs against DATABASE_URL.
+
+Usage:
+    python -m benchmarks.columnar --rows 1000000 --days 90 [--sql] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.services.columnar import FETCH_SIZE, ColumnStore, ColumnarAnalytics, np
+
+
+PAGE_TYPES = ("home", "post", "message", "music", "memories", None)
+COUNTRIES = ("Malaysia", "Singapore", "United States", "United Kingdom", "Japan", None)
+DEVICES = ("iPhone / Safari", "Android / Chrome", "Mac / Chrome", "Windows / Edge", "Bot", None)
+
+
+def synthetic_rows(count: int, days: int, seed: int = 7):
+    """Rows shaped like the engine's query: (id, timestamp, page_type, resource_id, country, device)."""
+    rng = random.Random(seed)
+    end = datetime.utcnow()
+    span = days * 86400
+    rows = []
+    for row_id in range(1, count + 1):
+        page_type = rng.choice(PAGE_TYPES)
+        resource_id = rng.randint(1, 200) if page_type in ("post", "message") else None
+        rows.append((
+            row_id,
+            end - timedelta(seconds=rng.randrange(span)),
+            page_type,
+            resource_id,
+            rng.choice(COUNTRIES),
+            rng.choice(DEVICES),
+        ))
+    return rows
+
+
+def timed(func, repeat: int = 5) -> dict:
+    """Median and best wall time of `func` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "best_ms": round(min(samples), 3)}
+
+
+def reference_breakdowns(rows, since: datetime) -> dict:
+    """The same breakdowns computed row by row in Python."""
+    window = [row for row in rows if row[1] >= since]
+    resources = Counter(
+        (row[2] or "post", row[3]) for row in window if row[3]
+    )
+    return {
+        "daily": sorted(Counter(row[1].date() for row in window).items()),
+        "hourly": sorted(Counter(row[1].hour for row in window).items()),
+        "page_types": dict(Counter(row[2] or "post" for row in window)),
+        "devices": dict(Counter(row[5] or "Unknown" for row in window)),
+        "top_resources": {key: views for key, views in resources.items()},
+    }
+
+
+def check(engine: ColumnarAnalytics, rows, since: datetime) -> None:
+    """Fail loudly if any engine breakdown differs from the reference."""
+    expected = reference_breakdowns(rows, since)
+    assert engine.daily_views(since) == expected["daily"], "daily breakdown differs"
+    assert engine.hourly_views(since) == expected["hourly"], "hourly breakdown differs"
+    assert dict(engine.page_type_views(since)) == expected["page_types"], "page type breakdown differs"
+    assert dict(engine.device_views(since, limit=None)) == expected["devices"], "device breakdown differs"
+    top = engine.top_resources(since, limit=10)
+    top_views = sorted(expected["top_resources"].values(), reverse=True)[:10]
+    assert [views for _, _, views in top] == top_views, "top resources differ"
+    for page_type, resource_id, views in top:
+        assert expected["top_resources"][(page_type, resource_id)] == views, "top resource counts differ"
+
+
+async def sql_timings(since: datetime, repeat: int) -> dict:
+    """Time the rollup queries get_stats runs for the same breakdowns."""
+    from app.routes import analytics as routes
+
+    sections = {
+        "daily": (routes._stats_daily, (since, False)),
+        "hourly": (routes._stats_hourly, (since, False)),
+        "page_types": (routes._stats_page_type_views, (since, False)),
+        "devices": (routes._stats_devices, (since, False)),
+    }
+    timings = {}
+    for name, (section, args) in sections.items():
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            await routes._run_section(section, *args)
+            samples.append((time.perf_counter() - started) * 1000)
+        timings[name] = {"median_ms": round(statistics.median(samples), 3), "best_ms": round(min(samples), 3)}
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=90, help="Width of the synthetic window")
+    parser.add_argument("--query-days", type=int, default=30, help="Period each breakdown covers")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sql", action="store_true", help="Also time the SQL breakdowns against DATABASE_URL")
+    parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    if np is None:
+        print("numpy is not installed")
+        return 1
+
+    rows = synthetic_rows(args.rows, args.days)
+    engine = ColumnarAnalytics(window_days=args.days, interval=0, rebuild_interval=0)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    since = today - timedelta(days=args.query_days)
+
+    def build():
+        store = ColumnStore()
+        for start in range(0, len(rows), FETCH_SIZE):
+            store.append(rows[start:start + FETCH_SIZE])
+        engine._store = store
+
+    report = {"rows": args.rows, "window_days": args.days, "query_days": args.query_days}
+    report["build"] = timed(build, repeat=1)
+    check(engine, rows, since)
+
+    tail_batch = synthetic_rows(500, 1, seed=11)
+    base_id = engine._store.last_id
+    tail_batch = [(base_id + row[0],) + row[1:] for row in tail_batch]
+    report["tail_500_rows"] = timed(lambda: engine._store.append(tail_batch), repeat=1)
+    report["memory_bytes"] = sum(getattr(engine._store, name).nbytes for name in ColumnStore.COLUMNS)
+
+    report["columnar"] = {
+        "daily": timed(lambda: engine.daily_views(since), args.repeat),
+        "hourly": timed(lambda: engine.hourly_views(since), args.repeat),
+        "page_types": timed(lambda: engine.page_type_views(since), args.repeat),
+        "devices": timed(lambda: engine.device_views(since, limit=15), args.repeat),
+        "top_resources": timed(lambda: engine.top_resources(since, limit=10), args.repeat),
+    }
+    if args.sql:
+        report["sql"] = asyncio.run(sql_timings(since, args.repeat))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
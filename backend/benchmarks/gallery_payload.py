@@ -0,0 +1,143 @@
+"""
+Response-size check for the gallery list (GET /api/gallery).
+
+The list is the public page's first request, and before it honoured
+include_full it carried every item's full-size media, often as base64 data.
+This builds synthetic rows shaped like the ones the list query selects
+(legacy items hold a data URL of --image-kb), serializes them the way the
+endpoint does, and fails if the default list grows past --max-item-bytes
+per item or starts returning `url` again. With --sql it also fetches the
+list from DATABASE_URL through the app and checks the real payload. The
+regression test is tests/test_gallery_payload.py.
+
+Usage:
+    python -m benchmarks.gallery_payload [--items 100] [--image-kb 300] [--max-item-bytes 4096] [--sql] [--output report.json]
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import httpx
+
+from app.routes.gallery import gallery_list_query
+from app.schemas.gallery import GalleryMediaListResponse
+from app.services.blob_store import blob_url
+
+
+def _blob(rng: random.Random, extension: str) -> str:
+    return blob_url(f"{rng.getrandbits(256):064x}.{extension}")
+
+
+def synthetic_items(count: int, image_kb: int, seed: int = 7) -> list:
+    """
+    Full gallery rows as dicts. Half are legacy rows whose full-size image is
+    still an inline data URL, half are blob-backed with renditions.
+    """
+    rng = random.Random(seed)
+    legacy_url = "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(image_kb * 1024)).decode()
+    placeholder = "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(600)).decode()
+    created = datetime.utcnow()
+
+    items = []
+    for media_id in range(1, count + 1):
+        legacy = media_id % 2 == 0
+        renditions = None if legacy else [
+            {"width": width, "height": width * 2 // 3, "format": fmt, "bytes": width * 60, "url": _blob(rng, ext)}
+            for width in (1920, 1024, 640, 320)
+            for fmt, ext in (("webp", "webp"), ("jpeg", "jpg"))
+        ]
+        items.append({
+            "id": media_id,
+            "media_type": "image",
+            "url": legacy_url if legacy else _blob(rng, "jpg"),
+            "thumbnail_url": _blob(rng, "jpg"),
+            "blur_placeholder": placeholder,
+            "width": 1920,
+            "height": 1280,
+            "renditions": renditions,
+            "caption": f"Memory {media_id}",
+            "order_index": media_id,
+            "created_at": created - timedelta(days=media_id),
+        })
+    return items
+
+
+def list_payload(items: list, include_full: bool) -> bytes:
+    """JSON body of the list for `items`, keeping only the columns the list query selects."""
+    names = [column.name for column in gallery_list_query(include_full).selected_columns]
+    rows = [SimpleNamespace(**{name: item[name] for name in names}) for item in items]
+    return GalleryMediaListResponse(media=rows, total=len(rows)).model_dump_json().encode()
+
+
+def measure(payload: bytes, count: int) -> dict:
+    media = json.loads(payload)["media"]
+    return {
+        "items": count,
+        "bytes": len(payload),
+        "bytes_per_item": round(len(payload) / count) if count else 0,
+        "items_with_url": sum(1 for item in media if item.get("url")),
+    }
+
+
+def check(report: dict, max_item_bytes: int) -> list:
+    """Problems with a default (include_full=False) payload report."""
+    problems = []
+    if report["items_with_url"]:
+        problems.append(f"{report['items_with_url']} items carry url without include_full")
+    if report["bytes_per_item"] > max_item_bytes:
+        problems.append(f"{report['bytes_per_item']} bytes per item exceeds {max_item_bytes}")
+    return problems
+
+
+async def sql_payloads(limit: int) -> dict:
+    """Fetch the list from DATABASE_URL through the app, with and without include_full."""
+    from app.main import app
+
+    sizes = {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        for include_full in (False, True):
+            response = await client.get("/api/gallery", params={"limit": limit, "include_full": include_full})
+            response.raise_for_status()
+            sizes[include_full] = measure(response.content, len(response.json()["media"]))
+    return {"default": sizes[False], "include_full": sizes[True]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--image-kb", type=int, default=300, help="Size of a legacy full-size image")
+    parser.add_argument("--max-item-bytes", type=int, default=4096, help="Budget per item in the default list")
+    parser.add_argument("--sql", action="store_true", help="Also measure the list served from DATABASE_URL")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    items = synthetic_items(args.items, args.image_kb)
+    report = {
+        "synthetic": {
+            "default": measure(list_payload(items, include_full=False), len(items)),
+            "include_full": measure(list_payload(items, include_full=True), len(items)),
+        },
+    }
+    problems = [f"synthetic: {problem}" for problem in check(report["synthetic"]["default"], args.max_item_bytes)]
+
+    if args.sql:
+        report["sql"] = asyncio.run(sql_payloads(args.items))
+        problems += [f"sql: {problem}" for problem in check(report["sql"]["default"], args.max_item_bytes)]
+
+    report["problems"] = problems
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
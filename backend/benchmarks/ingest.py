@@ -0,0 +1,425 @@
+"""
+Load generator for the analytics ingest path (POST /api/analytics/track).
+
+Sends tracking requests at a fixed rate, either in-process through httpx's
+ASGI transport (the app's lifespan is run here, so the ingest buffer,
+geolocation client and pool are the ones being measured) or over HTTP to a
+running server. A local fake geolocation API with configurable latency
+stands in for GEOIP_API_URL so runs do not depend on ip-api.com.
+
+Requests are scheduled open-loop: request i is due at start + i / rate and
+its latency is measured from that due time, so a stalled server shows up
+as latency instead of silently lowering the offered rate.
+
+Rows persisted are counted in DATABASE_URL by the run's session id prefix,
+so HTTP runs must point at the same database as the server. The analytics
+SQL is PostgreSQL-specific (upserts, partitions), so there is no embedded
+stand-in; use a scratch database, since rows, rollups and sessions written
+by the run are not cleaned up.
+
+Usage:
+    python -m benchmarks.ingest run --rate 500 --duration 30 [--geo-latency-ms 80] [--output report.json]
+    python -m benchmarks.ingest run --url http://localhost:10000 --geo-port 8765 --rate 500
+    python -m benchmarks.ingest geo --port 8765 --latency-ms 80
+    python -m benchmarks.ingest compare baseline.json candidate.json
+
+For HTTP runs start the server with GEOIP_API_URL=http://127.0.0.1:<geo-port>
+and no GEOIP_DATABASE_PATH so lookups reach the fake API.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+import httpx
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import MAX_OVERFLOW, POOL_SIZE, AsyncSessionLocal, engine
+from app.models.analytics import Analytics
+
+
+PAGE_TYPES = ("home", "post", "message", "music", "memories")
+USER_AGENTS = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Version/17.0 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/120.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/120.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/120.0 Safari/537.36 Edg/120.0",
+)
+COUNTRIES = (("Malaysia", "Kuala Lumpur"), ("Singapore", "Singapore"), ("Japan", "Tokyo"), ("United States", "Austin"))
+
+# Seconds to wait for the ingest buffer to drain once persisted rows stop growing
+DRAIN_IDLE_SECONDS = 5.0
+
+
+# ── Fake geolocation API ──────────────────────────────────────────────
+
+class FakeGeolocationServer:
+    """
+    Minimal HTTP/1.1 server answering ip-api.com style lookups after a delay.
+
+    Serves `GET /<ip>` with a deterministic country per address and keeps
+    connections alive, like the real API does for the shared httpx client.
+    """
+
+    def __init__(self, latency: float, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.lookups = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                # Skip headers; lookups are GETs without a body
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                ip_address = request_line.split(b" ")[1].decode().rsplit("/", 1)[-1]
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.lookups += 1
+                country, city = COUNTRIES[sum(ip_address.encode()) % len(COUNTRIES)]
+                body = json.dumps({"status": "success", "country": country, "city": city}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+
+# ── Load generation ──────────────────────────────────────────────────
+
+def percentile(samples: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of unsorted samples, in the samples' unit."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def synthetic_ips(count: int, seed: int) -> List[str]:
+    """Public-looking addresses, so they skip the local-address shortcut in geolocation."""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice((23, 45, 81, 103, 121, 175, 203))}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+        for _ in range(count)
+    ]
+
+
+class PoolSampler:
+    """Samples engine.pool.checkedout() while the load runs (in-process only)."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            self.samples.append(engine.pool.checkedout())
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    def report(self) -> dict:
+        capacity = POOL_SIZE + MAX_OVERFLOW
+        peak = max(self.samples, default=0)
+        return {
+            "pool_size": POOL_SIZE,
+            "capacity": capacity,
+            "checked_out_peak": peak,
+            "checked_out_mean": round(sum(self.samples) / len(self.samples), 2) if self.samples else 0,
+            "saturation_peak": round(peak / capacity, 3) if capacity else None,
+            "saturated_fraction": round(
+                sum(1 for sample in self.samples if sample >= capacity) / len(self.samples), 3
+            ) if self.samples else 0,
+        }
+
+
+async def count_persisted(session_prefix: str, since: datetime) -> int:
+    """Rows this run has written so far."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(func.count())
+            .select_from(Analytics)
+            .where(Analytics.timestamp >= since, Analytics.session_id.like(f"{session_prefix}%"))
+        )
+        return result.scalar()
+
+
+async def wait_for_drain(session_prefix: str, since: datetime, expected: int) -> tuple:
+    """
+    Poll persisted rows until they reach `expected` or stop growing.
+
+    Returns:
+        (rows persisted, monotonic time the last row was seen)
+    """
+    persisted = 0
+    last_growth = time.monotonic()
+    while persisted < expected and time.monotonic() - last_growth < DRAIN_IDLE_SECONDS:
+        await asyncio.sleep(0.25)
+        count = await count_persisted(session_prefix, since)
+        if count > persisted:
+            persisted = count
+            last_growth = time.monotonic()
+    return persisted, last_growth
+
+
+async def generate_load(client: httpx.AsyncClient, args, session_prefix: str) -> dict:
+    """Send `rate * duration` tracking requests on schedule and collect results."""
+    rng = random.Random(args.seed)
+    ips = synthetic_ips(args.ips, args.seed)
+    total = int(args.rate * args.duration)
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    statuses: dict = {}
+
+    async def send(index: int, due: float) -> None:
+        page_type = rng.choice(PAGE_TYPES)
+        payload = {
+            "page_type": page_type,
+            "resource_id": rng.randint(1, 50) if page_type in ("post", "message") else None,
+            # A fresh session per request keeps dedupe from discarding views
+            "session_id": f"{session_prefix}{index}",
+            "referrer": None,
+        }
+        headers = {"X-Forwarded-For": rng.choice(ips), "User-Agent": rng.choice(USER_AGENTS)}
+        async with gate:
+            try:
+                response = await client.post("/api/analytics/track", json=payload, headers=headers)
+                outcome = str(response.status_code)
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+        latencies.append((time.monotonic() - due) * 1000)
+        statuses[outcome] = statuses.get(outcome, 0) + 1
+
+    started = time.monotonic()
+    tasks = []
+    for index in range(total):
+        due = started + index / args.rate
+        delay = due - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(index, due)))
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    accepted = statuses.get("202", 0)
+    return {
+        "started": started,
+        "sent": total,
+        "elapsed_s": round(elapsed, 3),
+        "statuses": statuses,
+        "accepted": accepted,
+        "accepted_per_s": round(accepted / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2) if latencies else None,
+            "p95": round(percentile(latencies, 0.95), 2) if latencies else None,
+            "p99": round(percentile(latencies, 0.99), 2) if latencies else None,
+            "max": round(max(latencies), 2) if latencies else None,
+        },
+    }
+
+
+async def run(args) -> dict:
+    session_prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    since = datetime.utcnow()
+    geo = FakeGeolocationServer(args.geo_latency_ms / 1000, port=args.geo_port)
+    await geo.start()
+    sampler = None
+
+    try:
+        if args.url:
+            async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+                load = await generate_load(client, args, session_prefix)
+        else:
+            from app.main import app
+
+            settings.GEOIP_API_URL = geo.url
+            settings.GEOIP_DATABASE_PATH = None
+            sampler = PoolSampler()
+            transport = httpx.ASGITransport(app=app)
+            async with app.router.lifespan_context(app):
+                sampler.start()
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30) as client:
+                    load = await generate_load(client, args, session_prefix)
+                persisted, last_row_at = await wait_for_drain(session_prefix, since, load["accepted"])
+                await sampler.stop()
+        if args.url:
+            persisted, last_row_at = await wait_for_drain(session_prefix, since, load["accepted"])
+    finally:
+        await geo.stop()
+
+    persist_elapsed = last_row_at - load.pop("started")
+    report = {
+        "mode": "http" if args.url else "in-process",
+        "target": args.url,
+        "rate": args.rate,
+        "duration_s": args.duration,
+        "concurrency": args.concurrency,
+        "distinct_ips": args.ips,
+        "geo_latency_ms": args.geo_latency_ms,
+        "geo_lookups": geo.lookups,
+        **load,
+        "persisted": persisted,
+        "persisted_per_s": round(persisted / persist_elapsed, 1) if persisted and persist_elapsed > 0 else 0,
+        "pool": sampler.report() if sampler else None,
+        "settings": {
+            "ANALYTICS_FLUSH_BATCH_SIZE": settings.ANALYTICS_FLUSH_BATCH_SIZE,
+            "ANALYTICS_FLUSH_INTERVAL_SECONDS": settings.ANALYTICS_FLUSH_INTERVAL_SECONDS,
+            "ANALYTICS_BUFFER_MAX_SIZE": settings.ANALYTICS_BUFFER_MAX_SIZE,
+            "ANALYTICS_DEDUPE_MODE": settings.ANALYTICS_DEDUPE_MODE,
+        },
+    }
+    if not args.url:
+        await engine.dispose()
+    return report
+
+
+# ── Comparison ───────────────────────────────────────────────────────
+
+# Metrics compared across reports, and whether higher is better
+COMPARED_METRICS = (
+    ("accepted_per_s", True),
+    ("persisted_per_s", True),
+    ("latency_ms.p50", False),
+    ("latency_ms.p95", False),
+    ("latency_ms.p99", False),
+    ("pool.saturation_peak", False),
+)
+
+
+def _metric(report: dict, path: str):
+    value = report
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def compare(baseline: dict, candidate: dict) -> dict:
+    """Per-metric baseline, candidate and relative change (positive is better)."""
+    comparison = {}
+    for path, higher_is_better in COMPARED_METRICS:
+        before, after = _metric(baseline, path), _metric(candidate, path)
+        change = None
+        if before and after is not None:
+            change = (after - before) / before
+            if not higher_is_better:
+                change = -change
+            change = round(change, 4)
+        comparison[path] = {"baseline": before, "candidate": after, "improvement": change}
+    return comparison
+
+
+# ── CLI ──────────────────────────────────────────────────────────────
+
+def write_report(report: dict, output: Optional[str]) -> None:
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+
+
+async def serve_geolocation(args) -> None:
+    geo = FakeGeolocationServer(args.latency_ms / 1000, port=args.port)
+    await geo.start()
+    print(f"Fake geolocation API on {geo.url} with {args.latency_ms} ms latency")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await geo.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Generate load and report")
+    run_parser.add_argument("--url", help="Base URL of a running server; in-process through ASGI if omitted")
+    run_parser.add_argument("--rate", type=float, default=200.0, help="Requests per second")
+    run_parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    run_parser.add_argument("--concurrency", type=int, default=256, help="Requests in flight at most")
+    run_parser.add_argument("--ips", type=int, default=2000, help="Distinct client addresses")
+    run_parser.add_argument("--geo-latency-ms", type=float, default=50.0)
+    run_parser.add_argument("--geo-port", type=int, default=0, help="Fake geolocation port (0 picks one)")
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--baseline", help="Earlier report to compare against")
+    run_parser.add_argument("--output", help="Write the JSON report here as well as to stdout")
+
+    geo_parser = commands.add_parser("geo", help="Serve only the fake geolocation API")
+    geo_parser.add_argument("--port", type=int, default=8765)
+    geo_parser.add_argument("--latency-ms", type=float, default=50.0)
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    args = parser.parse_args()
+
+    if args.command == "geo":
+        try:
+            asyncio.run(serve_geolocation(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        write_report(compare(baseline, candidate), None)
+        return 0
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(json.load(f), report)
+    write_report(report, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Response-size regression test for the gallery list (GET /api/gallery).
+
+Seeds gallery_media in TEST_DATABASE_URL (an in-memory SQLite database by
+default) and calls the route through the app, so the list query, the schema
+and the include_full parameter are all exercised. Run from backend/ with:
+    python -m pytest
+"""
+
+import base64
+import os
+import random
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, get_db
+from app.main import app
+from app.models.gallery import GalleryMedia
+from app.services.blob_store import blob_url
+
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "sqlite+aiosqlite://")
+
+ITEMS = 20
+LEGACY_IMAGE_KB = 300
+# Bytes per item the default list may use: thumbnail, placeholder and
+# renditions, never the full-size media
+MAX_ITEM_BYTES = 4096
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _gallery_rows(rng: random.Random) -> list:
+    """Half legacy rows holding the full image as a data URL, half blob-backed with renditions."""
+    def blob(extension):
+        return blob_url(f"{rng.getrandbits(256):064x}.{extension}")
+
+    legacy_url = "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(LEGACY_IMAGE_KB * 1024)).decode()
+    placeholder = "data:image/jpeg;base64," + base64.b64encode(rng.randbytes(600)).decode()
+    created = datetime.utcnow()
+
+    rows = []
+    for index in range(1, ITEMS + 1):
+        legacy = index % 2 == 0
+        rows.append(GalleryMedia(
+            media_type="image",
+            url=legacy_url if legacy else blob("jpg"),
+            thumbnail_url=blob("jpg"),
+            blur_placeholder=placeholder,
+            width=1920,
+            height=1280,
+            renditions=None if legacy else [
+                {"width": width, "height": width * 2 // 3, "format": fmt, "bytes": width * 60, "url": blob(ext)}
+                for width in (1920, 1024, 640, 320)
+                for fmt, ext in (("webp", "webp"), ("jpeg", "jpg"))
+            ],
+            caption=f"Memory {index}",
+            order_index=index,
+            created_at=created - timedelta(days=index),
+        ))
+    return rows
+
+
+@pytest.fixture
+async def client():
+    if TEST_DATABASE_URL.startswith("sqlite+aiosqlite"):
+        pytest.importorskip("aiosqlite")
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=StaticPool)
+    tables = [GalleryMedia.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessions() as db:
+        db.add_all(_gallery_rows(random.Random(7)))
+        await db.commit()
+
+    async def test_db():
+        async with sessions() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = test_db
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all, tables=tables)
+        await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_default_list_leaves_out_full_media(client):
+    response = await client.get("/api/gallery", params={"limit": ITEMS})
+    assert response.status_code == 200
+
+    media = response.json()["media"]
+    assert len(media) == ITEMS
+    assert all(item["url"] is None for item in media)
+    assert all(item["thumbnail_url"] for item in media)
+    assert len(response.content) / len(media) <= MAX_ITEM_BYTES
+
+
+@pytest.mark.anyio
+async def test_include_full_returns_full_media(client):
+    response = await client.get("/api/gallery", params={"limit": ITEMS, "include_full": True})
+    assert response.status_code == 200
+
+    media = response.json()["media"]
+    assert len(media) == ITEMS
+    assert all(item["url"] for item in media)
+    assert any(item["url"].startswith("data:image/") for item in media)
@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from 'react'
-import { analyticsApi, getSessionId } from '../services/api'
+import { analyticsApi, getSessionId, galleryMediaUrl, galleryMediaSrcSet } from '../services/api'
 import { useMemories } from '../hooks/useQueryData'
 import { MemoriesPageSkeleton } from '../components/skeletons'
 import { X, ChevronLeft, ChevronRight, Play } from 'lucide-react'
@@ -47,9 +47,8 @@ function Memories() {
     return () => window.removeEventListener('keydown', handleKeyDown)
   }, [lightbox.open])
 
-  const isVideo = (item) => {
-    return item.media_type === 'video' || item.url?.endsWith('.mp4') || item.url?.endsWith('.webm') || item.url?.endsWith('.mov')
-  }
+  // The list carries no url (see galleryApi.getAll), so media_type decides
+  const isVideo = (item) => item.media_type === 'video'
 
   if (isLoading) return <MemoriesPageSkeleton count={12} />
 
@@ -98,7 +97,8 @@ function Memories() {
                   />
                 ) : (
                   <video
-                    src={item.url}
+                    src={galleryMediaUrl(item)}
+                    preload="metadata"
                     className="w-full h-full object-cover"
                     muted
                   />
@@ -109,7 +109,7 @@ function Memories() {
               </>
             ) : (
               <img
-                src={item.thumbnail_url || item.url}
+                src={item.thumbnail_url || galleryMediaUrl(item, 320)}
                 alt={item.caption || ''}
                 className="w-full h-full object-cover"
                 loading="lazy"
@@ -164,16 +164,18 @@ function Memories() {
             <div className="max-w-full max-h-full flex items-center justify-center">
               {isVideo(currentMedia) ? (
                 <video
-                  key={currentMedia.url}
-                  src={currentMedia.url}
+                  key={currentMedia.id}
+                  src={galleryMediaUrl(currentMedia)}
                   className="max-w-full max-h-[calc(100vh-180px)] object-contain rounded-lg"
                   controls
                   autoPlay
                 />
               ) : (
                 <img
-                  key={currentMedia.url}
-                  src={currentMedia.url}
+                  key={currentMedia.id}
+                  src={galleryMediaUrl(currentMedia)}
+                  srcSet={galleryMediaSrcSet(currentMedia)}
+                  sizes="100vw"
                   alt={currentMedia.caption || ''}
                   className="max-w-full max-h-[calc(100vh-180px)] object-contain rounded-lg"
                 />
@@ -217,7 +219,7 @@ function Memories() {
                     </div>
                   ) : (
                     <img
-                      src={item.thumbnail_url || item.url}
+                      src={item.thumbnail_url || galleryMediaUrl(item, 320)}
                       alt=""
                       className="w-full h-full object-cover"
                     />
@@ -1,7 +1,7 @@
 import { useState, useEffect, useCallback } from 'react'
 import {
   BarChart3, Eye, Users, Globe, Clock, Monitor, TrendingUp,
-  ChevronLeft, ChevronRight, Filter, RefreshCw, Calendar,
+  ChevronLeft, ChevronRight, Filter, RefreshCw, Calendar, Activity,
 } from 'lucide-react'
 import {
   AreaChart, Area, BarChart, Bar, PieChart, Pie, Cell,
@@ -60,6 +60,101 @@ function CustomTooltip({ active, payload, label }) {
   )
 }
 
+/* ── Live Views ───────────────────────────────────────────────────── */
+const LIVE_WINDOW_MS = 60000
+const LIVE_RECONNECT_MS = 3000
+const LIVE_MAX_RECONNECT_MS = 30000
+
+function LiveViews() {
+  const [seconds, setSeconds] = useState([])
+  const [connected, setConnected] = useState(false)
+
+  useEffect(() => {
+    let source = null
+    let timer = null
+    let delay = LIVE_RECONNECT_MS
+    let stopped = false
+
+    const reconnect = () => {
+      if (stopped) return
+      timer = setTimeout(connect, delay)
+      delay = Math.min(delay * 2, LIVE_MAX_RECONNECT_MS)
+    }
+
+    const connect = async () => {
+      let stream
+      try {
+        stream = await analyticsApi.openLiveStream('aggregate')
+      } catch (err) {
+        console.error('Failed to open live stream:', err)
+        reconnect()
+        return
+      }
+      if (stopped) {
+        stream.close()
+        return
+      }
+      source = stream
+      stream.onopen = () => {
+        setConnected(true)
+        delay = LIVE_RECONNECT_MS
+      }
+      stream.addEventListener('aggregate', (e) => {
+        const aggregate = JSON.parse(e.data)
+        setSeconds(prev => [...prev, { at: Date.now(), ...aggregate }])
+      })
+      // The ticket in the URL is spent, so EventSource's own reconnect would
+      // be refused; reopen the stream with a new ticket instead
+      stream.onerror = () => {
+        stream.close()
+        setConnected(false)
+        reconnect()
+      }
+    }
+
+    connect()
+    const prune = setInterval(() => {
+      const cutoff = Date.now() - LIVE_WINDOW_MS
+      setSeconds(prev => (prev.length && prev[0].at < cutoff ? prev.filter(s => s.at >= cutoff) : prev))
+    }, 1000)
+
+    return () => {
+      stopped = true
+      clearTimeout(timer)
+      clearInterval(prune)
+      source?.close()
+    }
+  }, [])
+
+  const views = seconds.reduce((sum, s) => sum + s.views, 0)
+  const pageCounts = {}
+  seconds.forEach(s => {
+    Object.entries(s.page_types).forEach(([pageType, count]) => {
+      pageCounts[pageType] = (pageCounts[pageType] || 0) + count
+    })
+  })
+  const topPages = Object.entries(pageCounts).sort((a, b) => b[1] - a[1]).slice(0, 3)
+
+  return (
+    <div className="p-4 bg-white dark:bg-gray-900 border border-gray-200 dark:border-gray-800 rounded-xl">
+      <div className="flex items-center gap-2 text-gray-500 dark:text-gray-400 mb-2">
+        <Activity className="w-4 h-4" />
+        <span className="text-sm">Live · last minute</span>
+        <span
+          className={`ml-auto w-2 h-2 rounded-full ${connected ? 'bg-green-500' : 'bg-gray-300 dark:bg-gray-600'}`}
+          title={connected ? 'Connected' : 'Reconnecting'}
+        />
+      </div>
+      <p className="text-2xl font-semibold text-gray-900 dark:text-white">{views}</p>
+      <p className="text-xs text-gray-400 dark:text-gray-500 mt-1">
+        {topPages.length
+          ? topPages.map(([pageType, count]) => `${PAGE_LABELS[pageType] || pageType} ${count}`).join(' · ')
+          : 'No views right now'}
+      </p>
+    </div>
+  )
+}
+
 /* ── Main Analytics Dashboard ─────────────────────────────────────── */
 function AdminAnalytics() {
   const [stats, setStats] = useState(null)
@@ -68,7 +163,7 @@ function AdminAnalytics() {
   const [loading, setLoading] = useState(true)
   const [activeTab, setActiveTab] = useState('overview') // overview | visitors | sessions
   const [visitorPage, setVisitorPage] = useState(1)
-  const [sessionPage, setSessionPage] = useState(1)
+  const [sessionPage, setSessionPage] = useState({ number: 1, cursor: null })
   const [pageTypeFilter, setPageTypeFilter] = useState('')
   const [days, setDays] = useState(30)
   const [refreshing, setRefreshing] = useState(false)
@@ -102,7 +197,7 @@ function AdminAnalytics() {
   // Fetch sessions
   useEffect(() => {
     if (activeTab === 'sessions') {
-      analyticsApi.getSessions(sessionPage, 30)
+      analyticsApi.getSessions(sessionPage.cursor, 30)
         .then(setSessions)
         .catch(console.error)
     }
@@ -228,6 +323,8 @@ function AdminAnalytics() {
             <StatCard icon={BarChart3} label="Total Posts" value={stats.total_posts} />
           </div>
 
+          <LiveViews />
+
           {/* Daily Views Chart */}
           {dailyData.length > 0 && (
             <div className="bg-white dark:bg-gray-900 border border-gray-200 dark:border-gray-800 rounded-xl p-6">
@@ -550,7 +647,7 @@ function AdminAnalytics() {
         <div className="space-y-4">
           {sessions && (
             <p className="text-sm text-gray-500 dark:text-gray-400">
-              {sessions.total} unique sessions tracked
+              {sessions.total_is_estimate ? 'About ' : ''}{sessions.total} unique sessions tracked
             </p>
           )}
 
@@ -594,22 +691,22 @@ function AdminAnalytics() {
             </div>
 
             {/* Pagination */}
-            {sessions && sessions.total_pages > 1 && (
+            {sessions && (sessions.next_cursor || sessions.prev_cursor) && (
               <div className="flex items-center justify-between px-4 py-3 border-t border-gray-100 dark:border-gray-800">
                 <span className="text-sm text-gray-500 dark:text-gray-400">
-                  Page {sessions.page} of {sessions.total_pages}
+                  Page {sessionPage.number} of {sessions.total_is_estimate ? 'about ' : ''}{sessions.total_pages}
                 </span>
                 <div className="flex gap-2">
                   <button
-                    onClick={() => setSessionPage(p => Math.max(1, p - 1))}
-                    disabled={sessionPage <= 1}
+                    onClick={() => setSessionPage(p => ({ number: p.number - 1, cursor: sessions.prev_cursor }))}
+                    disabled={!sessions.prev_cursor}
                     className="p-2 text-gray-500 hover:text-gray-900 dark:hover:text-white hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg disabled:opacity-30 transition-colors"
                   >
                     <ChevronLeft className="w-4 h-4" />
                   </button>
                   <button
-                    onClick={() => setSessionPage(p => Math.min(sessions.total_pages, p + 1))}
-                    disabled={sessionPage >= sessions.total_pages}
+                    onClick={() => setSessionPage(p => ({ number: p.number + 1, cursor: sessions.next_cursor }))}
+                    disabled={!sessions.next_cursor}
                     className="p-2 text-gray-500 hover:text-gray-900 dark:hover:text-white hover:bg-gray-100 dark:hover:bg-gray-800 rounded-lg disabled:opacity-30 transition-colors"
                   >
                     <ChevronRight className="w-4 h-4" />
@@ -18,7 +18,8 @@ function AdminGallery() {
 
   const fetchMedia = async () => {
     try {
-      const data = await galleryApi.getAll(200, 0)
+      // The editor needs every item's url
+      const data = await galleryApi.getAll(200, 0, true)
       setMediaItems(data.media || [])
     } catch (err) {
       console.error('Failed to fetch gallery:', err)
@@ -152,13 +152,15 @@ export const messagesApi = {
 
 // ─── Gallery API (replaces memoriesAPI) ───────────────────────────────
 // Response shape: { media: [], total }
-// GalleryMedia shape: { id, media_type, url, thumbnail_url, blur_placeholder, width, height, caption, order_index, created_at }
+// GalleryMedia shape: { id, media_type, url, thumbnail_url, blur_placeholder, width, height, renditions, caption, order_index, created_at }
+// The list leaves url null unless includeFull is set; use galleryMediaUrl for the full media.
 export const galleryApi = {
-  getAll: async (limit = 50, offset = 0) => {
+  getAll: async (limit = 50, offset = 0, includeFull = false) => {
     const params = new URLSearchParams({
       limit: limit.toString(),
       offset: offset.toString(),
     })
+    if (includeFull) params.set('include_full', 'true')
     return fetchApi(`/api/gallery?${params}`)
   },
 
@@ -194,6 +196,17 @@ export const galleryApi = {
   },
 }
 
+/** URL serving a gallery item's media, at a display width for images (format picked by the server) */
+export function galleryMediaUrl(item, width) {
+  return width ? `/api/media/${item.id}?w=${width}` : `/api/media/${item.id}`
+}
+
+/** srcset for a gallery image from the widths of its renditions */
+export function galleryMediaSrcSet(item) {
+  const widths = [...new Set((item.renditions || []).map(r => r.width))].sort((a, b) => a - b)
+  return widths.map(w => `${galleryMediaUrl(item, w)} ${w}w`).join(', ') || undefined
+}
+
 // ─── Music API (replaces vibesAPI) ────────────────────────────────────
 // Response shape: { tracks: [], total }
 // MusicTrack shape: { id, title, artist, audio_url, cover_url, duration, is_active, order_index, created_at }
@@ -242,22 +255,64 @@ export const musicApi = {
 }
 
 // ─── Analytics API ────────────────────────────────────────────────────
-export const analyticsApi = {
-  track: async (pageType, resourceId, sessionId) => {
-    try {
-      await fetch(`${API_URL}/api/analytics/track`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          page_type: pageType,
-          resource_id: resourceId || null,
-          post_id: pageType === 'post' ? resourceId : null,
-          session_id: sessionId,
-          referrer: document.referrer || null,
-        }),
+
+// Views are queued and sent together; the backend accepts up to 50 per request
+const TRACK_URL = `${API_URL}/api/analytics/track`
+const TRACK_FLUSH_DELAY_MS = 2000
+const TRACK_MAX_BATCH = 20
+
+let trackQueue = []
+let trackTimer = null
+
+/**
+ * Send every queued view. On page hide this uses sendBeacon, which survives
+ * the page unloading; its text/plain body also skips the CORS preflight.
+ * When the server is overloaded it answers 503 with the index of the first
+ * event it did not queue, and only those events are queued again.
+ */
+function flushTracking(useBeacon = false) {
+  clearTimeout(trackTimer)
+  trackTimer = null
+  while (trackQueue.length) {
+    const batch = trackQueue.splice(0, TRACK_MAX_BATCH)
+    const body = JSON.stringify(batch)
+    if (useBeacon && navigator.sendBeacon?.(TRACK_URL, body)) continue
+    fetch(TRACK_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'text/plain' },
+      body,
+      keepalive: true,
+    })
+      .then(async (response) => {
+        if (response.status !== 503) return
+        const { resume_from: resumeFrom = 0 } = await response.json().catch(() => ({}))
+        trackQueue.unshift(...batch.slice(resumeFrom))
+        if (!trackTimer) trackTimer = setTimeout(flushTracking, TRACK_FLUSH_DELAY_MS)
       })
-    } catch (error) {
-      console.error('Analytics tracking error:', error)
+      .catch((error) => console.error('Analytics tracking error:', error))
+  }
+}
+
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', () => flushTracking(true))
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flushTracking(true)
+  })
+}
+
+export const analyticsApi = {
+  track: (pageType, resourceId, sessionId) => {
+    trackQueue.push({
+      page_type: pageType,
+      resource_id: resourceId || null,
+      post_id: pageType === 'post' ? resourceId : null,
+      session_id: sessionId,
+      referrer: document.referrer || null,
+    })
+    if (trackQueue.length >= TRACK_MAX_BATCH) {
+      flushTracking()
+    } else if (!trackTimer) {
+      trackTimer = setTimeout(flushTracking, TRACK_FLUSH_DELAY_MS)
     }
   },
 
@@ -275,13 +330,20 @@ export const analyticsApi = {
     return fetchApi(`/api/analytics/visitors?${params}`)
   },
 
-  getSessions: async (page = 1, pageSize = 50) => {
-    const params = new URLSearchParams({
-      page: page.toString(),
-      page_size: pageSize.toString(),
-    })
+  // Pass next_cursor / prev_cursor from the previous response to page by keyset
+  getSessions: async (cursor = null, pageSize = 50) => {
+    const params = new URLSearchParams({ page_size: pageSize.toString() })
+    if (cursor) params.set('cursor', cursor)
     return fetchApi(`/api/analytics/sessions?${params}`)
   },
+
+  // EventSource cannot send the auth header, so /live is opened with a
+  // short-lived single-use ticket; every (re)connect needs a new one
+  openLiveStream: async (mode = 'aggregate') => {
+    const { ticket } = await fetchApi('/api/analytics/live/ticket', { method: 'POST' })
+    const params = new URLSearchParams({ mode, ticket })
+    return new EventSource(`${API_URL}/api/analytics/live?${params}`)
+  },
 }
 
 // ─── Session & Utility Helpers ────────────────────────────────────────